@@ -0,0 +1,74 @@
+DEFAULT_WINDOW = 60 * 60
+DEFAULT_DIGEST_PERIOD = 6 * 60 * 60
+OVERFLOW_FINGERPRINT = "overflow"
+
+
+def fingerprint(error):
+    """Отпечаток ошибки: класс исключения и его существенные параметры.
+
+    Текст ошибки в отпечаток не входит: он может содержать весь ответ API
+    и меняться от запроса к запросу.
+    """
+    if hasattr(error, "fingerprint"):
+        return error.fingerprint()
+    if isinstance(error, TypeError) and len(error.args) == 2:
+        (value, expected_type) = error.args
+        return f"TypeError:{type(value).__name__}:{expected_type}"
+    return type(error).__name__
+
+
+def initial_state():
+    """Состояние алертов получателя до первой ошибки."""
+    return {"sent": {}, "suppressed": {}, "digest_at": None}
+
+
+class AlertPolicy:
+    """Подавление повторяющихся ошибок и периодическая сводка по ним.
+
+    Ошибка с данным отпечатком отправляется сразу не чаще одного раза
+    за window секунд, остальные повторы копятся в сводке, которая
+    отправляется раз в digest_period. Число различаемых отпечатков
+    ограничено max_fingerprints, поэтому объём уведомлений ограничен
+    при любой длительности и характере сбоя.
+    """
+
+    def __init__(self, window, digest_period, max_fingerprints=20):
+        """Констуктор."""
+        self.window = window
+        self.digest_period = digest_period
+        self.max_fingerprints = max_fingerprints
+
+    def report(self, alert_state, error, message, now):
+        """Учитывает ошибку; возвращает True, если о ней надо сообщить."""
+        key = fingerprint(error)
+        sent = alert_state["sent"]
+        self._forget_expired(sent, now)
+        if key not in sent and len(sent) < self.max_fingerprints:
+            sent[key] = now
+            return True
+        suppressed = alert_state["suppressed"]
+        if key not in suppressed and len(suppressed) >= self.max_fingerprints:
+            key = OVERFLOW_FINGERPRINT
+            message = "Прочие ошибки"
+        count, _ = suppressed.get(key, (0, message))
+        suppressed[key] = (count + 1, message)
+        if alert_state["digest_at"] is None:
+            alert_state["digest_at"] = now + self.digest_period
+        return False
+
+    def digest(self, alert_state, now):
+        """Возвращает сводку подавленных ошибок, если пришло её время."""
+        digest_at = alert_state["digest_at"]
+        if digest_at is None or now < digest_at:
+            return ""
+        lines = ["Сводка повторяющихся ошибок:"]
+        for count, message in alert_state["suppressed"].values():
+            lines.append(f"{message} — повторений: {count}")
+        alert_state["suppressed"] = {}
+        alert_state["digest_at"] = None
+        return "\n".join(lines)
+
+    def _forget_expired(self, sent, now):
+        for key, sent_at in list(sent.items()):
+            if now - sent_at >= self.window:
+                del sent[key]
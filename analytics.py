@@ -0,0 +1,178 @@
+import threading
+import time
+
+from clock import parse_date
+
+QUANTILES = (0.5, 0.9, 0.99)
+REVIEW_STARTED = "reviewing"
+REVIEW_FINISHED = ("approved", "rejected")
+MAX_PENDING = 10000
+MAX_REVIEW_AGE = 30 * 24 * 60 * 60
+
+
+class TDigest:
+    """Потоковая оценка квантилей с ограниченным объёмом памяти.
+
+    Упрощённый merging t-digest: значения копятся в буфере и периодически
+    сливаются в центроиды, вес которых ограничен тем сильнее, чем ближе
+    центроид к краям распределения. Не потокобезопасна: доступ из
+    нескольких потоков синхронизирует владелец.
+    """
+
+    def __init__(self, compression=100):
+        """Констуктор."""
+        self.compression = compression
+        self.count = 0
+        self.min = None
+        self.max = None
+        self._centroids = []
+        self._buffer = []
+
+    def add(self, value, weight=1):
+        """Добавляет наблюдение."""
+        self._buffer.append((value, weight))
+        self.count += weight
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        if len(self._buffer) >= self.compression * 5:
+            self._compress()
+
+    def _compress(self):
+        if not self._buffer:
+            return
+        points = sorted(self._centroids + self._buffer)
+        self._buffer = []
+        merged = []
+        cumulative = 0
+        for mean, weight in points:
+            if merged:
+                last_mean, last_weight = merged[-1]
+                new_weight = last_weight + weight
+                q = (cumulative + new_weight / 2) / self.count
+                limit = 4 * self.count * q * (1 - q) / self.compression
+                if new_weight <= limit:
+                    merged[-1] = (
+                        last_mean + (mean - last_mean) * weight / new_weight,
+                        new_weight)
+                    continue
+                cumulative += last_weight
+            merged.append((mean, weight))
+        self._centroids = merged
+
+    def quantile(self, q):
+        """Возвращает оценку квантиля q или None, если данных нет."""
+        self._compress()
+        if not self._centroids:
+            return None
+        target = q * self.count
+        cumulative = 0
+        previous_mean, previous_middle = self.min, 0
+        for mean, weight in self._centroids:
+            middle = cumulative + weight / 2
+            if target < middle:
+                share = (target - previous_middle) / (middle - previous_middle)
+                return previous_mean + (mean - previous_mean) * share
+            previous_mean, previous_middle = mean, middle
+            cumulative += weight
+        if cumulative == previous_middle:
+            return self.max
+        share = (target - previous_middle) / (cumulative - previous_middle)
+        return previous_mean + (self.max - previous_mean) * share
+
+    def __len__(self):
+        """Количество центроидов, включая несжатый буфер."""
+        return len(self._centroids) + len(self._buffer)
+
+
+class ReviewTurnaround:
+    """Время от взятия работы на ревью до вердикта в разрезе проектов.
+
+    Начатые ревью, вердикт по которым не пришёл за max_age секунд,
+    забываются; сверх max_pending вытесняются начатые раньше всех.
+    Методы можно вызывать из нескольких потоков.
+    """
+
+    def __init__(self, compression=100, max_pending=MAX_PENDING,
+                 max_age=MAX_REVIEW_AGE):
+        """Констуктор."""
+        self.compression = compression
+        self.max_pending = max_pending
+        self.max_age = max_age
+        self._started = {}
+        self._digests = {}
+        self._lock = threading.Lock()
+
+    def observe(self, homework, now=None):
+        """Учитывает переход статуса, обнаруженный parse_status.
+
+        Возвращает длительность ревью в секундах, если переход его
+        завершил, иначе None.
+        """
+        timestamp = parse_date(homework.get("date_updated"))
+        if timestamp is None:
+            timestamp = time.time() if now is None else now
+        with self._lock:
+            return self._observe(homework, timestamp)
+
+    def _observe(self, homework, timestamp):
+        key = homework.get("id") or homework.get("homework_name")
+        status = homework.get("status")
+        self._expire(timestamp)
+        if status == REVIEW_STARTED:
+            self._started.setdefault(key, timestamp)
+            while len(self._started) > self.max_pending:
+                del self._started[next(iter(self._started))]
+            return None
+        if status not in REVIEW_FINISHED:
+            return None
+        started = self._started.pop(key, None)
+        if started is None:
+            return None
+        duration = max(timestamp - started, 0)
+        project = homework.get("lesson_name") or homework.get("homework_name")
+        if project not in self._digests:
+            self._digests[project] = TDigest(self.compression)
+        self._digests[project].add(duration)
+        return duration
+
+    def _expire(self, now):
+        while self._started:
+            key, started = next(iter(self._started.items()))
+            if now - started <= self.max_age:
+                return
+            del self._started[key]
+
+    def percentiles(self, project):
+        """Возвращает p50/p90/p99 длительности ревью проекта."""
+        with self._lock:
+            return self._percentiles(project)
+
+    def _percentiles(self, project):
+        digest = self._digests.get(project)
+        if digest is None:
+            return {}
+        return {q: digest.quantile(q) for q in QUANTILES}
+
+    def projects(self):
+        """Проекты, по которым есть хотя бы одно завершённое ревью."""
+        with self._lock:
+            return sorted(self._digests)
+
+    def digest_message(self):
+        """Формирует сводку по времени ревью для отправки в Telegram."""
+        with self._lock:
+            if not self._digests:
+                return ""
+            lines = ["Время проверки работ (p50 / p90 / p99):"]
+            for project in sorted(self._digests):
+                values = " / ".join(
+                    _format_duration(value)
+                    for value in self._percentiles(project).values())
+                count = self._digests[project].count
+                lines.append(f"{project}: {values} (проверок: {count})")
+        return "\n".join(lines)
+
+
+def _format_duration(seconds):
+    hours, seconds = divmod(int(seconds), 3600)
+    return f"{hours}ч {seconds // 60:02d}м"
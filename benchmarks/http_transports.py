@@ -0,0 +1,93 @@
+"""Сравнение HTTP-транспортов бота на локальной заглушке API.
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.http_transports --requests 2000 --threads 8
+
+Заглушка работает в отдельном процессе, поэтому процессорное время
+на запрос относится только к клиенту.
+"""
+import argparse
+import gzip
+import json
+import multiprocessing
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import http_transport
+
+PAYLOAD = gzip.compress(json.dumps({
+    "homeworks": [{"homework_name": f"hw{n}", "status": "reviewing"}
+                  for n in range(20)],
+    "current_date": 1000,
+}).encode())
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(PAYLOAD)))
+        self.end_headers()
+        self.wfile.write(PAYLOAD)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(port):
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    server.daemon_threads = True
+    server.serve_forever()
+
+
+def measure(transport, url, total, threads):
+    headers = {"Authorization": "OAuth token", "Accept-Encoding": "gzip"}
+
+    def request(number):
+        response = transport.get(url, headers, {"from_date": number}, 5)
+        assert response.status_code == 200
+        response.json()
+
+    for number in range(threads):
+        request(number)
+    started, cpu_started = time.perf_counter(), time.process_time()
+    with ThreadPoolExecutor(threads) as executor:
+        list(executor.map(request, range(total)))
+    elapsed = time.perf_counter() - started
+    cpu = time.process_time() - cpu_started
+    return total / elapsed, cpu / total * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    server = multiprocessing.Process(
+        target=serve, args=(args.port,), daemon=True)
+    server.start()
+    time.sleep(0.5)
+    url = f"http://127.0.0.1:{args.port}/api/"
+    print(f"{'транспорт':<10} {'запросов/с':>12} {'CPU мкс/запрос':>16}")
+    try:
+        for name in http_transport.TRANSPORTS:
+            transport = http_transport.build(name, pool_size=args.threads)
+            try:
+                rate, cpu = measure(
+                    transport, url, args.requests, args.threads)
+            finally:
+                transport.close()
+            print(f"{name:<10} {rate:>12.0f} {cpu:>16.0f}")
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
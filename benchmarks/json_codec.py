@@ -0,0 +1,66 @@
+"""Разбор ответа API и сохранение состояния: json против кодека.
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.json_codec --homeworks 500 --number 2000
+
+text — прежний путь requests: байты декодируются в строку
+(response.text), затем json.loads. Для каждого кодека из codec.CODECS
+loads разбирает байты ответа напрямую, а dumps сериализует состояние
+получателей так же, как state.save.
+"""
+import argparse
+import json
+import timeit
+
+import codec
+import state
+
+
+def history(size):
+    return json.dumps({
+        "homeworks": [
+            {
+                "id": number,
+                "status": ("approved", "reviewing", "rejected")[number % 3],
+                "homework_name": f"username__hw{number}_проект.zip",
+                "reviewer_comment": "Всё отлично, работа принята! " * 3,
+                "date_updated": "2024-05-01T10:00:00Z",
+                "lesson_name": f"Спринт {number // 10}",
+            }
+            for number in range(size)
+        ],
+        "current_date": 1714557600,
+    }, ensure_ascii=False).encode()
+
+
+def states(size):
+    return {f"tg{number}": state.initial() for number in range(size)}
+
+
+def per_call(function, number):
+    seconds = min(timeit.repeat(function, number=number, repeat=3))
+    return seconds / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--homeworks", type=int, default=500)
+    parser.add_argument("--tenants", type=int, default=1000)
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+    payload, saved = history(args.homeworks), states(args.tenants)
+    print(f"ответ {len(payload)} байт, состояние {args.tenants} получателей")
+    print(f"{'путь':<10} {'разбор мкс':>12} {'сохранение мкс':>16}")
+    baseline = per_call(
+        lambda: json.loads(payload.decode("utf-8")), args.number)
+    print(f"{'text':<10} {baseline:>12.1f} {'-':>16}")
+    for name, candidate in codec.CODECS.items():
+        decode = per_call(lambda: candidate.loads(payload), args.number)
+        encode = per_call(
+            lambda: candidate.dumps(saved), max(args.number // 10, 1))
+        print(f"{name:<10} {decode:>12.1f} {encode:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Проверка ответа API: исключения против скомпилированного валидатора.
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.validation --number 200000
+
+legacy — проверка в прежнем виде: check_response/parse_status с raise
+при каждом нарушении и try/except в вызывающем коде. wrapped — нынешние
+check_response/parse_status: функции из validation и raise по описанию
+нарушения (путь main()). compiled — функции из validation без исключений,
+как в Engine с inspect (режим --config).
+"""
+import argparse
+import timeit
+
+import exceptions
+import validation
+
+VERDICTS = {
+    "approved": "Работа проверена: ревьюеру всё понравилось. Ура!",
+    "reviewing": "Работа взята на проверку ревьюером.",
+    "rejected": "Работа проверена: у ревьюера есть замечания.",
+}
+TEMPLATE = "Изменился статус проверки работы \"{name}\". {verdict}"
+
+PAYLOADS = {
+    "valid": {
+        "homeworks": [{"homework_name": "hw1", "status": "approved"}],
+        "current_date": 1000,
+    },
+    "empty": {"homeworks": [], "current_date": 1000},
+    "not_dict": [],
+    "no_homeworks": {"current_date": 1000},
+    "not_list": {"homeworks": {}, "current_date": 1000},
+    "unknown_status": {
+        "homeworks": [{"homework_name": "hw1", "status": "unknown"}],
+        "current_date": 1000,
+    },
+}
+
+
+def legacy_check_response(response):
+    if not isinstance(response, dict):
+        raise TypeError(response, type(dict))
+    if not response.get("current_date"):
+        raise exceptions.KeyNotFound("current_date", response)
+    if not (homeworks := response.get("homeworks")):
+        raise exceptions.KeyNotFound("homeworks", response)
+    if not isinstance(homeworks, list):
+        raise TypeError(homeworks, type(list))
+    return homeworks
+
+
+def legacy_get_value(key, homework):
+    if not (value := homework.get(key)):
+        raise exceptions.KeyNotFound(key, homework)
+    return value
+
+
+def legacy_parse_status(homework):
+    homework_name = legacy_get_value("homework_name", homework)
+    status = legacy_get_value("status", homework)
+    if not (verdict := VERDICTS.get(status)):
+        raise exceptions.UnexpectedStatus(status)
+    return f"Изменился статус проверки работы \"{homework_name}\". {verdict}"
+
+
+def legacy(response):
+    try:
+        homeworks = legacy_check_response(response)
+        return legacy_parse_status(homeworks[0])
+    except (TypeError, exceptions.KeyNotFound, exceptions.UnexpectedStatus):
+        return None
+
+
+def wrapped_pipeline():
+    validate = validation.compile_response_validator()
+    parse = validation.compile_status_parser(VERDICTS, TEMPLATE)
+
+    def wrapped(response):
+        try:
+            records, _, issue = validate(response)
+            if issue is not None:
+                raise issue.exception()
+            if not records:
+                return None
+            message, issue = parse(records[0])
+            if issue is not None:
+                raise issue.exception()
+            return message
+        except (TypeError, exceptions.KeyNotFound,
+                exceptions.UnexpectedStatus):
+            return None
+
+    return wrapped
+
+
+def compiled_pipeline():
+    validate = validation.compile_response_validator()
+    parse = validation.compile_status_parser(VERDICTS, TEMPLATE)
+
+    def compiled(response):
+        records, _, issue = validate(response)
+        if issue is not None or not records:
+            return None
+        return parse(records[0])[0]
+
+    return compiled
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=200000)
+    args = parser.parse_args()
+    implementations = {
+        "legacy": legacy,
+        "wrapped": wrapped_pipeline(),
+        "compiled": compiled_pipeline(),
+    }
+    print(f"{'ответ':<16}" + "".join(
+        f"{name + ' нс':>14}" for name in implementations))
+    for name, payload in PAYLOADS.items():
+        row = f"{name:<16}"
+        for function in implementations.values():
+            seconds = min(timeit.repeat(
+                lambda: function(payload), number=args.number, repeat=3))
+            row += f"{seconds / args.number * 1e9:>14.0f}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
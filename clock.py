@@ -0,0 +1,68 @@
+import time
+from datetime import datetime, timezone
+
+
+class SystemClock:
+    """Реальное время процесса."""
+
+    def time(self):
+        """Текущее время в секундах с начала эпохи."""
+        return time.time()
+
+    def monotonic(self):
+        """Монотонное время для измерения интервалов."""
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        """Приостанавливает выполнение на указанное время."""
+        time.sleep(seconds)
+
+    def check(self):
+        """Точка, где часы могут прервать работу; обычные не прерывают."""
+
+
+class VirtualClock:
+    """Виртуальное время: sleep мгновенно переводит часы вперёд.
+
+    Позволяет прогнать дни опроса за миллисекунды в тестах и бенчмарках.
+    """
+
+    def __init__(self, start=0.0):
+        """Констуктор."""
+        self._now = start
+
+    def time(self):
+        """Текущее виртуальное время."""
+        return self._now
+
+    def monotonic(self):
+        """Виртуальное время монотонно, поэтому совпадает с time()."""
+        return self._now
+
+    def sleep(self, seconds):
+        """Переводит часы вперёд без реального ожидания."""
+        self._now += max(seconds, 0)
+
+    advance = sleep
+
+    def check(self):
+        """Виртуальные часы работу не прерывают."""
+
+
+def parse_date(value):
+    """Время из строки ISO 8601 в секундах эпохи или None.
+
+    Суффикс Z из ответов API понимается и до Python 3.11, время без
+    часового пояса считается временем UTC.
+    """
+    if not isinstance(value, str) or not value:
+        return None
+    if value[-1] in "Zz":
+        value = value[:-1] + "+00:00"
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
@@ -0,0 +1,47 @@
+import json
+from collections import namedtuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+Codec = namedtuple("Codec", ("name", "loads", "dumps"))
+
+
+def _json_loads(data):
+    return json.loads(data)
+
+
+def _json_dumps(value):
+    return json.dumps(value, ensure_ascii=False).encode()
+
+
+def _orjson_dumps(value):
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+
+
+CODECS = {"json": Codec("json", _json_loads, _json_dumps)}
+if orjson is not None:
+    CODECS["orjson"] = Codec("orjson", orjson.loads, _orjson_dumps)
+
+
+def build(name=None):
+    """Кодек JSON по имени; без имени — самый быстрый из установленных.
+
+    loads принимает bytes и разбирает их без промежуточной строки, если
+    это умеет библиотека; dumps возвращает UTF-8 bytes без экранирования
+    не-ASCII символов. Ключи-числа сохраняются строками, как в json.
+    """
+    if name is None:
+        name = "orjson" if "orjson" in CODECS else "json"
+    try:
+        return CODECS[name]
+    except KeyError:
+        raise ValueError(
+            f"Кодек JSON {name} недоступен, есть: {', '.join(CODECS)}")
+
+
+default = build()
+loads = default.loads
+dumps = default.dumps
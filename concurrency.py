@@ -0,0 +1,123 @@
+import threading
+from contextlib import contextmanager
+from http import HTTPStatus
+
+from clock import SystemClock
+from metrics import registry
+
+OVERLOAD_STATUSES = frozenset((
+    HTTPStatus.TOO_MANY_REQUESTS,
+    HTTPStatus.INTERNAL_SERVER_ERROR,
+    HTTPStatus.BAD_GATEWAY,
+    HTTPStatus.SERVICE_UNAVAILABLE,
+    HTTPStatus.GATEWAY_TIMEOUT,
+))
+
+
+class AdaptiveLimiter:
+    """Адаптивный предел одновременных запросов к API (AIMD).
+
+    Пока задержка ответа держится около базовой, предел растёт на
+    increase за каждое «окно» из limit успешных запросов. Рост задержки
+    больше чем в tolerance раз над базовой, ошибка запроса или ответ
+    с кодом перегрузки (429, 5xx) умножают предел на decrease. Предел
+    снижается не чаще раза на окно: запросы, начатые до предыдущего
+    снижения, его уже не уменьшают.
+
+    Базовая задержка — минимальная наблюдавшаяся, которая медленно
+    «забывается» (baseline_decay), чтобы пережить смену сети или сервера.
+    """
+
+    def __init__(self, initial=4, min_limit=1, max_limit=64, increase=1,
+                 decrease=0.5, tolerance=2.0, smoothing=0.2,
+                 baseline_decay=0.01, clock=None, metrics=registry):
+        """Констуктор."""
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.baseline_decay = baseline_decay
+        self.clock = clock or SystemClock()
+        self.metrics = metrics
+        self.limit = float(min(max(initial, min_limit), max_limit))
+        self.in_flight = 0
+        self.latency = None
+        self.baseline = None
+        self._decreased_at = float("-inf")
+        self._condition = threading.Condition()
+        self._export()
+
+    @contextmanager
+    def acquire(self):
+        """Занимает место под запрос; ждёт, пока предел не позволит.
+
+        Ошибка внутри блока считается признаком перегрузки, если это не
+        EndpointBadResponse с кодом вне OVERLOAD_STATUSES. Такие ответы
+        (400, 401, 404) только освобождают место: их задержка не входит
+        в базовую, и предел от них не меняется.
+        """
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+            self._export()
+        started = self.clock.monotonic()
+        try:
+            yield
+        except Exception as error:
+            status = getattr(error, "status_code", None)
+            if status is None or status in OVERLOAD_STATUSES:
+                self._release(started, overloaded=True)
+            else:
+                self._free()
+            raise
+        self._release(started, overloaded=False)
+
+    def _free(self):
+        with self._condition:
+            self.in_flight -= 1
+            self._export()
+            self._condition.notify_all()
+
+    def _release(self, started, overloaded):
+        latency = self.clock.monotonic() - started
+        with self._condition:
+            self.in_flight -= 1
+            if not overloaded:
+                overloaded = self._observe(latency)
+            if overloaded:
+                self._shrink(started)
+            else:
+                self.limit = min(
+                    self.max_limit, self.limit + self.increase / self.limit)
+            self._export()
+            self._condition.notify_all()
+        self.metrics.observe("api_latency_seconds", latency)
+
+    def _observe(self, latency):
+        if self.latency is None:
+            self.latency = self.baseline = latency
+            return False
+        self.latency += self.smoothing * (latency - self.latency)
+        self.baseline = min(
+            latency,
+            self.baseline + self.baseline_decay * (latency - self.baseline))
+        return self.latency > self.baseline * self.tolerance
+
+    def _shrink(self, started):
+        if started < self._decreased_at:
+            return
+        self.limit = max(self.min_limit, self.limit * self.decrease)
+        self._decreased_at = self.clock.monotonic()
+        self.metrics.increment("api_concurrency_decreases")
+
+    def _export(self):
+        self.metrics.set_gauge("api_concurrency_limit", int(self.limit))
+        self.metrics.set_gauge("api_in_flight", self.in_flight)
+        if self.latency is not None:
+            self.metrics.set_gauge(
+                "api_latency_smoothed_seconds", self.latency)
+            self.metrics.set_gauge(
+                "api_latency_baseline_seconds", self.baseline)
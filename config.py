@@ -0,0 +1,189 @@
+import json
+import os
+import signal
+import threading
+from collections import namedtuple
+
+import exceptions
+import http_transport
+import state as state_store
+from engine import Tenant
+from sources import DEFAULT_SOURCE
+
+TenantConfig = namedtuple(
+    "TenantConfig",
+    ("name", "token", "chat_ids", "period", "source", "transport"),
+    defaults=(DEFAULT_SOURCE, None),
+)
+BotConfig = namedtuple("BotConfig", ("period", "max_tenants", "tenants"))
+
+
+def load(path, default_period, sources=None):
+    """Загружает и проверяет конфигурацию получателей из JSON-файла.
+
+    Формат файла:
+    {"period": 600, "max_tenants": 100, "tenants": [{"name": "ivanov",
+    "practicum_token": "...", "chat_ids": ["123"], "period": 300,
+    "source": "practicum", "transport": "urllib3"}]}
+    Если задан sources, источник каждого получателя ищется в нём.
+    practicum_token обязателен только для источника practicum.
+    Без transport получатель использует транспорт HTTP_TRANSPORT.
+    """
+    try:
+        with open(path, encoding="utf-8") as file:
+            raw = json.load(file)
+    except (OSError, ValueError) as error:
+        raise exceptions.InvalidConfig(path, error)
+    return parse(raw, path, default_period, sources)
+
+
+def parse(raw, path, default_period, sources=None):
+    """Проверяет разобранный JSON конфигурации и приводит его к типам."""
+    if not isinstance(raw, dict):
+        raise exceptions.InvalidConfig(path, "ожидается JSON-объект")
+    period = _positive_number(
+        raw.get("period", default_period), "period", path)
+    max_tenants = raw.get("max_tenants")
+    if max_tenants is not None:
+        max_tenants = _positive_number(max_tenants, "max_tenants", path)
+    items = raw.get("tenants", [])
+    if not isinstance(items, list):
+        raise exceptions.InvalidConfig(path, "tenants должен быть списком")
+    tenants = {}
+    for item in items:
+        tenant = _parse_tenant(item, period, path)
+        if (sources is not None and tenant.source != DEFAULT_SOURCE
+                and tenant.source not in sources):
+            raise exceptions.InvalidConfig(
+                path, f"у получателя {tenant.name} неизвестный источник "
+                f"{tenant.source}")
+        if tenant.name in tenants:
+            raise exceptions.InvalidConfig(
+                path, f"получатель {tenant.name} указан дважды")
+        tenants[tenant.name] = tenant
+    if max_tenants is not None and len(tenants) > max_tenants:
+        raise exceptions.InvalidConfig(
+            path, f"получателей больше, чем max_tenants={max_tenants}")
+    return BotConfig(period, max_tenants, tenants)
+
+
+def apply(engine, config, states):
+    """Приводит набор получателей движка к конфигурации.
+
+    Затрагиваются только изменившиеся получатели: остальные продолжают
+    опрашиваться по прежнему расписанию. Курсоры берутся из states,
+    поэтому удалённый и вновь добавленный получатель не начинает опрос
+    с нуля. Возвращает имена добавленных, удалённых и изменённых.
+    """
+    added, removed, updated = [], [], []
+    for name in list(engine.tenants):
+        if name not in config.tenants:
+            engine.remove_tenant(name)
+            removed.append(name)
+    for name, tenant_config in config.tenants.items():
+        tenant = engine.tenants.get(name)
+        if tenant is None:
+            engine.add_tenant(Tenant(
+                name,
+                tenant_config.token,
+                tenant_config.chat_ids,
+                states.setdefault(name, state_store.initial()),
+                tenant_config.period,
+                tenant_config.source,
+                tenant_config.transport,
+            ))
+            added.append(name)
+            continue
+        current = (
+            tenant.token, tuple(tenant.chat_ids), tenant.period,
+            tenant.source, tenant.transport)
+        if current == tenant_config[1:]:
+            continue
+        tenant.token = tenant_config.token
+        tenant.chat_ids = list(tenant_config.chat_ids)
+        tenant.period = tenant_config.period
+        tenant.source = tenant_config.source
+        tenant.transport = tenant_config.transport
+        engine.scheduler.set_period(name, tenant_config.period)
+        updated.append(name)
+    return added, removed, updated
+
+
+class ConfigWatcher:
+    """Отслеживает изменение файла конфигурации и сигнал SIGHUP."""
+
+    def __init__(self, path):
+        """Констуктор."""
+        self.path = path
+        self._mtime = self._read_mtime()
+        self._reload_requested = threading.Event()
+
+    def install_signal_handler(self):
+        """Перечитывать конфигурацию по SIGHUP, если платформа его знает."""
+        if hasattr(signal, "SIGHUP"):
+            signal.signal(
+                signal.SIGHUP, lambda signum, frame: self.request_reload())
+
+    def request_reload(self):
+        """Запрашивает перечитывание конфигурации."""
+        self._reload_requested.set()
+
+    def changed(self):
+        """Изменился ли файл или запрошено перечитывание с прошлой проверки."""
+        mtime = self._read_mtime()
+        requested = self._reload_requested.is_set()
+        if mtime == self._mtime and not requested:
+            return False
+        self._mtime = mtime
+        self._reload_requested.clear()
+        return True
+
+    def _read_mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+
+def _parse_tenant(item, default_period, path):
+    if not isinstance(item, dict):
+        raise exceptions.InvalidConfig(path, "получатель должен быть объектом")
+    name = item.get("name")
+    token = item.get("practicum_token")
+    chat_ids = item.get("chat_ids")
+    source = item.get("source", DEFAULT_SOURCE)
+    if not isinstance(name, str) or not name:
+        raise exceptions.InvalidConfig(path, "у получателя нет имени")
+    if not isinstance(source, str) or not source:
+        raise exceptions.InvalidConfig(
+            path, f"у получателя {name} пустой source")
+    if source == DEFAULT_SOURCE or token is not None:
+        if not isinstance(token, str) or not token:
+            raise exceptions.InvalidConfig(
+                path, f"у получателя {name} нет practicum_token")
+    if not isinstance(chat_ids, list) or not chat_ids:
+        raise exceptions.InvalidConfig(
+            path, f"у получателя {name} нет chat_ids")
+    period = _positive_number(
+        item.get("period", default_period), f"{name}.period", path)
+    transport = item.get("transport")
+    if transport is not None and transport not in http_transport.TRANSPORTS:
+        raise exceptions.InvalidConfig(
+            path, f"у получателя {name} неизвестный transport {transport}, "
+            f"доступны: {', '.join(http_transport.TRANSPORTS)}")
+    return TenantConfig(
+        name,
+        token,
+        tuple(str(chat_id) for chat_id in chat_ids),
+        period,
+        source,
+        transport,
+    )
+
+
+def _positive_number(value, field, path):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise exceptions.InvalidConfig(path, f"{field} должен быть числом")
+    if value <= 0:
+        raise exceptions.InvalidConfig(path, f"{field} должен быть больше 0")
+    return value
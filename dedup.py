@@ -0,0 +1,140 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from array import array
+
+logger = logging.getLogger(__name__)
+
+INITIAL_CAPACITY = 1024
+MAX_LOAD = 0.75
+
+
+def fingerprint(*parts):
+    """64-битный отпечаток набора значений; 0 зарезервирован под пустоту."""
+    raw = "\x1f".join(str(part) for part in parts).encode()
+    digest = hashlib.blake2b(raw, digest_size=8).digest()
+    return int.from_bytes(digest, "little") or 1
+
+
+class FingerprintSet:
+    """Компактное множество 64-битных отпечатков уже отправленных событий.
+
+    Отпечатки хранятся в массиве с открытой адресацией и линейным
+    пробированием: около 11 байт на элемент вместо сотен байт на кортеж
+    в обычном set. Массив целиком сохраняется на диск и загружается
+    при старте. С открытым журналом каждый новый отпечаток дописывается
+    в него 8 байтами, а save() журнал очищает: так другой процесс видит
+    отправленное без перезаписи всего массива после каждого уведомления.
+    """
+
+    def __init__(self, capacity=INITIAL_CAPACITY):
+        """Констуктор; capacity округляется вверх до степени двойки."""
+        size = 1
+        while size < capacity:
+            size *= 2
+        self._slots = array("Q", bytes(8 * size))
+        self._count = 0
+        self._journal = None
+        self._journal_lock = threading.Lock()
+
+    def __len__(self):
+        """Количество отпечатков в множестве."""
+        return self._count
+
+    def __contains__(self, key):
+        """Есть ли отпечаток в множестве."""
+        return self._slots[self._find(key)] == key
+
+    def add(self, key):
+        """Добавляет отпечаток; возвращает False, если он уже был."""
+        index = self._find(key)
+        if self._slots[index] == key:
+            return False
+        self._slots[index] = key
+        self._count += 1
+        if self._count > len(self._slots) * MAX_LOAD:
+            self._grow()
+        if self._journal is not None:
+            with self._journal_lock:
+                with open(self._journal, "ab") as file:
+                    file.write(array("Q", (key,)).tobytes())
+        return True
+
+    def open_journal(self, path):
+        """Дочитывает журнал path в множество и дописывает в него новые."""
+        try:
+            with open(path, "rb") as file:
+                raw = file.read()
+        except FileNotFoundError:
+            raw = b""
+        if len(raw) % 8:
+            logger.warning(
+                f"Журнал отправленных уведомлений {path} обрезан, "
+                "неполная запись пропущена")
+        for key in array("Q", raw[:len(raw) - len(raw) % 8]):
+            if key:
+                self.add(key)
+        self._journal = path
+
+    def save(self, path):
+        """Атомарно сохраняет множество в файл и очищает журнал."""
+        directory = os.path.dirname(os.path.abspath(path))
+        with self._journal_lock:
+            descriptor, temporary = tempfile.mkstemp(
+                dir=directory, suffix=".tmp")
+            try:
+                with os.fdopen(descriptor, "wb") as file:
+                    self._slots.tofile(file)
+                os.replace(temporary, path)
+            except BaseException:
+                os.unlink(temporary)
+                raise
+            if self._journal is not None:
+                open(self._journal, "wb").close()
+
+    @classmethod
+    def load(cls, path):
+        """Загружает множество из файла или создаёт пустое.
+
+        Повреждённый файл (пустой, обрезанный, с числом слотов не степенью
+        двойки) не мешает запуску: он пропускается с записью в лог.
+        """
+        fingerprints = cls()
+        try:
+            with open(path, "rb") as file:
+                raw = file.read()
+        except FileNotFoundError:
+            return fingerprints
+        size = len(raw) // 8
+        if not raw or len(raw) % 8 or size & (size - 1):
+            logger.error(
+                f"Файл отправленных уведомлений {path} повреждён "
+                f"({len(raw)} байт), отсев повторов начат заново")
+            return fingerprints
+        slots = array("Q", raw)
+        count = sum(1 for slot in slots if slot)
+        if count > size * MAX_LOAD:
+            fingerprints = cls(int(count / MAX_LOAD) + 1)
+            for key in slots:
+                if key:
+                    fingerprints.add(key)
+            return fingerprints
+        fingerprints._slots = slots
+        fingerprints._count = count
+        return fingerprints
+
+    def _find(self, key):
+        mask = len(self._slots) - 1
+        index = key & mask
+        while (slot := self._slots[index]) and slot != key:
+            index = (index + 1) & mask
+        return index
+
+    def _grow(self):
+        old_slots = self._slots
+        self._slots = array("Q", bytes(16 * len(old_slots)))
+        for key in old_slots:
+            if key:
+                self._slots[self._find(key)] = key
@@ -0,0 +1,389 @@
+import logging
+import threading
+from collections import OrderedDict
+
+import state as state_store
+from alerts import DEFAULT_DIGEST_PERIOD, DEFAULT_WINDOW, AlertPolicy
+from clock import SystemClock
+from dedup import FingerprintSet, fingerprint
+from scheduler import (PRIORITY_ACTIVE, PRIORITY_IDLE, PRIORITY_NORMAL,
+                       Scheduler)
+from sources import DEFAULT_SOURCE, Source, SourceRegistry
+from tracing import (ACCEPTED, FETCH_DONE, FETCH_STARTED, PARSED, QUEUED,
+                     SENDING, Trace, Tracer)
+
+logger = logging.getLogger(__name__)
+
+IDLE_AFTER = 7 * 24 * 60 * 60
+MAX_LOADED = 10000
+
+
+class Tenant:
+    """Получатель уведомлений со своим токеном API и курсором опроса.
+
+    Уведомления получателя рассылаются всем чатам из chat_ids: студенту,
+    наставнику, чату когорты. Статусы берутся из источника source,
+    запросы к API идут через транспорт transport (None — по умолчанию).
+    """
+
+    def __init__(self, name, token, chat_ids, state=None, period=None,
+                 source=DEFAULT_SOURCE, transport=None):
+        """Констуктор."""
+        self.name = name
+        self.token = token
+        self.chat_ids = list(chat_ids)
+        self.period = period
+        self.source = source
+        self.transport = transport
+        self.state = state_store.initial() if state is None else state
+
+    @property
+    def headers(self):
+        """Заголовки запроса к API с токеном получателя."""
+        return {"Authorization": f"OAuth {self.token}"}
+
+
+class Engine:
+    """Цикл опроса API для множества получателей на общих часах.
+
+    Функции получения, проверки и разбора ответа и отправки уведомлений
+    передаются снаружи: fetch(tenant, timestamp), validate(response),
+    parse(homework) и notify(tenant, message). Если задан fence, опрос
+    выполняется только пока fence() возвращает True: так процесс,
+    потерявший аренду, не отправит уведомление одновременно с резервным.
+    Если задан publish(tenant, homework, message), уведомления о смене
+    статуса отправляются через него, а notify остаётся для ошибок.
+    С overload_lag при отставании от расписания в первую очередь
+    опрашиваются работы на ревью, а получатели без изменений дольше
+    idle_after секунд откладываются. fetch, validate и parse задают
+    источник по умолчанию; получатели других источников опрашиваются
+    хуками из реестра sources на тех же расписании и отправке. Если
+    задан inspect(response), он заменяет validate: ответ проверяется
+    одним проходом, а курсор берётся из его результата.
+    Получатели, поставленные в расписание через schedule(), создаются
+    функцией loader(name) только при первом опросе и выгружаются после
+    опроса, если простаивают или загруженных больше max_loaded. Общий
+    для процессов status_cache дополняет notified: переход, уже
+    записанный в кэш другим процессом, не отправляется повторно. Путь
+    каждого уведомления от date_updated до приёма Telegram записывается
+    в tracer; notify и publish могут вернуть список чатов, куда
+    отправить не удалось, и такое уведомление в tracer не попадает.
+    Обработчики on_transition и on_notified вызываются после отправки,
+    их ошибки только пишутся в лог и не влияют на доставку.
+    """
+
+    def __init__(self, fetch, validate, parse, notify, period,
+                 clock=None, backoff=None, alerts=None, notified=None,
+                 fence=None, publish=None, overload_lag=None,
+                 idle_after=IDLE_AFTER, sources=None, loader=None,
+                 status_cache=None, tracer=None, max_loaded=MAX_LOADED,
+                 inspect=None, log=None):
+        """Констуктор."""
+        self.fetch = fetch
+        self.validate = validate
+        self.parse = parse
+        self.inspect = inspect
+        self.sources = SourceRegistry() if sources is None else sources
+        self.notify = notify
+        self.publish = publish
+        self.clock = SystemClock() if clock is None else clock
+        self.idle_after = idle_after
+        self.scheduler = Scheduler(
+            self.clock,
+            period,
+            backoff,
+            priority=None if overload_lag is None else self.priority,
+            overload_lag=overload_lag)
+        self.alerts = alerts
+        if alerts is None:
+            self.alerts = AlertPolicy(DEFAULT_WINDOW, DEFAULT_DIGEST_PERIOD)
+        self.notified = FingerprintSet() if notified is None else notified
+        self.fence = fence
+        self.status_cache = status_cache
+        self.logger = logger if log is None else log
+        self.tracer = Tracer(log=self.logger) if tracer is None else tracer
+        self.tenants = {}
+        self.loader = loader
+        self.max_loaded = max_loaded
+        self._loaded = OrderedDict()
+        self._loaded_lock = threading.Lock()
+        self.on_transition = []
+        self.on_notified = []
+        self._notified_lock = threading.Lock()
+        self._sending = set()
+
+    def add_tenant(self, tenant, delay=0):
+        """Добавляет получателя в расписание опроса."""
+        self._first_seen(tenant)
+        self.tenants[tenant.name] = tenant
+        self.scheduler.add(tenant.name, delay, tenant.period)
+
+    def schedule(self, name, delay=0, period=None):
+        """Ставит в расписание получателя, который загрузится по имени."""
+        with self._loaded_lock:
+            self._loaded.pop(name, None)
+        self.scheduler.add(name, delay, period)
+
+    def remove_tenant(self, name):
+        """Исключает получателя из расписания опроса."""
+        self.scheduler.remove(name)
+        with self._loaded_lock:
+            self._loaded.pop(name, None)
+        return self.tenants.pop(name, None)
+
+    def tenant(self, name):
+        """Получатель по имени; загружается через loader при первом вызове.
+
+        Возвращает None, если получатель неизвестен.
+        """
+        if (tenant := self.tenants.get(name)) is not None:
+            return tenant
+        with self._loaded_lock:
+            if (tenant := self._loaded.get(name)) is not None:
+                self._loaded.move_to_end(name)
+                return tenant
+        if self.loader is None:
+            return None
+        if (tenant := self.loader(name)) is not None:
+            self._first_seen(tenant)
+            with self._loaded_lock:
+                self._loaded[name] = tenant
+        return tenant
+
+    def release(self, name):
+        """Выгружает опрошенного получателя из памяти, если он простаивает.
+
+        Получатели из add_tenant не выгружаются. Сверх max_loaded
+        выгружаются давно не использованные.
+        """
+        idle = (
+            name in self._loaded and self.priority(name) == PRIORITY_IDLE)
+        with self._loaded_lock:
+            if idle:
+                self._loaded.pop(name, None)
+            while len(self._loaded) > self.max_loaded:
+                self._loaded.popitem(last=False)
+
+    def poll(self, tenant):
+        """Выполняет один цикл опроса API для получателя.
+
+        Возвращает True, если запрос к API и его проверка прошли успешно.
+        """
+        if not self.may_poll(tenant):
+            return True
+        try:
+            trace = Trace(self.clock)
+            trace.mark(FETCH_STARTED)
+            response = self.source(tenant).fetch(
+                tenant, tenant.state["timestamp"])
+            trace.mark(FETCH_DONE)
+            if found := self.check(tenant, response, trace):
+                self.deliver(tenant, *found)
+            return True
+        except Exception as error:
+            self.report_error(tenant, error)
+            return False
+        finally:
+            self.send_alert_digest(tenant)
+
+    def may_poll(self, tenant):
+        """Разрешён ли опрос: процесс не потерял аренду."""
+        if self.fence is not None and not self.fence():
+            self.logger.warning(f"Опрос {tenant.name} пропущен: нет аренды")
+            return False
+        return True
+
+    def check(self, tenant, response, trace=None):
+        """Проверяет ответ API и ищет неотправленный переход статуса.
+
+        Возвращает (homework, message, transition, trace) или None.
+        """
+        state = tenant.state
+        source = self.source(tenant)
+        if source.inspect is None:
+            homeworks = source.validate(response)
+            state["timestamp"] = source.cursor(response, state["timestamp"])
+        else:
+            homeworks, cursor, issue = source.inspect(response)
+            if issue is not None:
+                raise issue.exception()
+            state["timestamp"] = cursor
+        if not homeworks:
+            self.logger.debug("Новые статусы отсутствуют")
+            return None
+        return self._find(tenant, source, homeworks[0], trace)
+
+    def ingest(self, tenant, homework):
+        """Обрабатывает событие смены статуса, пришедшее без опроса.
+
+        Запись разбирается и отсеивается так же, как первая запись ответа
+        API. Курсор не сдвигается: следующий опрос увидит тот же переход
+        и отбросит его как отправленный, а пропущенное событие догонит.
+        Возвращает True, если уведомление отправлено.
+        """
+        trace = Trace(self.clock)
+        trace.mark(FETCH_STARTED)
+        trace.mark(FETCH_DONE)
+        found = self._find(tenant, self.source(tenant), homework, trace)
+        return found is not None and self.deliver(tenant, *found)
+
+    def _find(self, tenant, source, homework, trace):
+        message = source.parse(homework)
+        trace = Trace(self.clock) if trace is None else trace
+        trace.mark(PARSED)
+        trace.mark_updated(homework)
+        tenant.state["last_status"] = homework.get("status")
+        transition = transition_fingerprint(tenant, homework)
+        with self._notified_lock:
+            is_notified = transition in self.notified
+        if not is_notified and self.status_cache is not None:
+            is_notified = self.status_cache.matches(tenant.name, homework)
+        if is_notified:
+            self.logger.debug("Новые статусы отсутствуют")
+            return None
+        return homework, message, transition, trace
+
+    def source(self, tenant):
+        """Источник статусов получателя."""
+        if tenant.source == DEFAULT_SOURCE:
+            return Source(
+                DEFAULT_SOURCE, self.fetch, self.validate, self.parse,
+                inspect=self.inspect)
+        return self.sources.get(tenant.source)
+
+    def deliver(self, tenant, homework, message, transition, trace=None):
+        """Отправляет уведомление о переходе и запоминает его.
+
+        Переход, который уже отправлен или отправляется в другом потоке
+        (опросом и пришедшим событием одновременно), пропускается. Аренда
+        проверяется повторно: за время запроса к API её мог перехватить
+        резервный процесс.
+        Возвращает True, если уведомление отправлено.
+        """
+        if self.fence is not None and not self.fence():
+            self.logger.warning(
+                f"Уведомление {tenant.name} не отправлено: аренда потеряна")
+            return False
+        with self._notified_lock:
+            if transition in self.notified or transition in self._sending:
+                return False
+            self._sending.add(transition)
+        trace = Trace(self.clock) if trace is None else trace
+        try:
+            accepted = self._send(tenant, homework, message, trace)
+            with self._notified_lock:
+                self.notified.add(transition)
+        finally:
+            with self._notified_lock:
+                self._sending.discard(transition)
+        if self.status_cache is not None:
+            self.status_cache.put_homework(tenant.name, homework)
+        tenant.state["last_change"] = self.clock.time()
+        self._run_callbacks(self.on_transition, tenant, homework)
+        self._run_callbacks(self.on_notified, tenant, homework)
+        if accepted:
+            self.tracer.record(tenant, trace)
+        self.logger.debug(message)
+        return True
+
+    def _send(self, tenant, homework, message, trace):
+        if QUEUED not in trace.times:
+            trace.mark(QUEUED)
+        trace.mark(SENDING)
+        if self.publish is not None:
+            failed = self.publish(tenant, homework, message)
+        else:
+            failed = self.notify(tenant, message)
+        if failed:
+            return False
+        trace.mark(ACCEPTED)
+        return True
+
+    def _run_callbacks(self, callbacks, tenant, homework):
+        for callback in callbacks:
+            try:
+                callback(tenant, homework)
+            except Exception as error:
+                self.logger.error(
+                    f"Ошибка обработчика перехода {tenant.name}: {error}")
+
+    def priority(self, name):
+        """Приоритет опроса получателя при перегрузке, меньше — важнее.
+
+        Без изменений дольше idle_after секунд получатель считается
+        простаивающим; возраст нового получателя отсчитывается от его
+        появления (first_seen в состоянии), а не от нуля.
+        """
+        tenant = self.tenant(name)
+        if tenant is None:
+            return PRIORITY_NORMAL
+        state = tenant.state
+        if state.get("last_status") == "reviewing":
+            return PRIORITY_ACTIVE
+        last_change = state.get("last_change", state.get("first_seen"))
+        if last_change is not None and (
+                self.clock.time() - last_change > self.idle_after):
+            return PRIORITY_IDLE
+        return PRIORITY_NORMAL
+
+    def _first_seen(self, tenant):
+        tenant.state.setdefault("first_seen", self.clock.time())
+
+    def report_error(self, tenant, error):
+        """Логирует ошибку опроса и сообщает о ней с учётом подавления."""
+        message = describe_error(error)
+        self.logger.error(message)
+        if self.alerts.report(
+                tenant.state["alerts"], error, message, self.clock.time()):
+            self.notify(tenant, message)
+
+    def send_alert_digest(self, tenant):
+        """Отправляет сводку подавленных ошибок, если пришло её время."""
+        digest = self.alerts.digest(tenant.state["alerts"], self.clock.time())
+        if digest:
+            self.notify(tenant, digest)
+
+    def run(self, duration=None):
+        """Опрашивает всех получателей по расписанию."""
+        self.scheduler.run(self._poll_by_name, duration)
+
+    def _poll_by_name(self, name):
+        tenant = self.tenant(name)
+        if tenant is None:
+            self.scheduler.remove(name)
+            return True
+        try:
+            return self.poll(tenant)
+        finally:
+            self.release(name)
+
+
+def spread_delay(name, period):
+    """Задержка первого опроса в пределах period, постоянная для имени.
+
+    Получатели, поставленные в расписание разом, опрашиваются не все
+    одновременно, а равномерно в течение периода.
+    """
+    return fingerprint(name) % max(int(period), 1)
+
+
+def transition_fingerprint(tenant, homework):
+    """Отпечаток перехода статуса домашней работы получателя.
+
+    Дата обновления входит в отпечаток, поэтому повторный переход в уже
+    встречавшийся статус (reviewing после rejected) не считается дублем.
+    """
+    return fingerprint(
+        tenant.name,
+        homework.get("id") or homework.get("homework_name"),
+        homework.get("status"),
+        homework.get("date_updated"),
+    )
+
+
+def describe_error(error):
+    """Формирует текст сообщения об ошибке цикла опроса."""
+    if isinstance(error, TypeError) and len(error.args) == 2:
+        (value, expected_type) = error.args
+        return f"Объект {value} не соответствует типу {expected_type}"
+    return str(error)
@@ -14,6 +14,10 @@ class EnvironmentVariableNotDefined(Exception):
             f"Отсутствует обязательная переменная окружения: \"{self.token}\""
             "Программа принудительно остановлена")
 
+    def fingerprint(self):
+        """Отпечаток ошибки для группировки уведомлений."""
+        return f"{type(self).__name__}:{self.token}"
+
 
 class EndpointBadResponse(Exception):
     """Статус код ответа отличен от 200."""
@@ -38,6 +42,10 @@ class EndpointBadResponse(Exception):
             return (f"Запрос к эндпоинту {self.endpoint} "
                     f"вызывал ошибку {self.status_code}")
 
+    def fingerprint(self):
+        """Отпечаток ошибки для группировки уведомлений."""
+        return f"{type(self).__name__}:{self.status_code}:{self.endpoint}"
+
 
 class EndpointRequestError(Exception):
     """Сбой при запросе к эндпоинту."""
@@ -52,6 +60,11 @@ class EndpointRequestError(Exception):
         return (f"Запрос к эндпоинту {self.endpoint} "
                 f"вызывал ошибку {self.error}")
 
+    def fingerprint(self):
+        """Отпечаток ошибки для группировки уведомлений."""
+        return (f"{type(self).__name__}:{type(self.error).__name__}:"
+                f"{self.endpoint}")
+
 
 class KeyNotFound(Exception):
     """Отсутствие ожидаемых ключей в ответе API."""
@@ -65,6 +78,10 @@ class KeyNotFound(Exception):
         """Сообщение ошибки."""
         return f"В объекте {self.source} отсутствует ключ {self.key}"
 
+    def fingerprint(self):
+        """Отпечаток ошибки для группировки уведомлений."""
+        return f"{type(self).__name__}:{self.key}"
+
 
 class UnexpectedStatus(Exception):
     """Неожиданный статус домашней работы, обнаруженный в ответе API."""
@@ -76,3 +93,69 @@ class UnexpectedStatus(Exception):
     def __str__(self):
         """Сообщение ошибки."""
         return f"Неожиданный статус домашней работы: {self.status}"
+
+    def fingerprint(self):
+        """Отпечаток ошибки для группировки уведомлений."""
+        return f"{type(self).__name__}:{self.status}"
+
+
+class InvalidConfig(Exception):
+    """Ошибка в файле конфигурации получателей."""
+
+    def __init__(self, path, reason):
+        """Констуктор."""
+        self.path = path
+        self.reason = reason
+
+    def __str__(self):
+        """Сообщение ошибки."""
+        return f"Некорректный файл конфигурации {self.path}: {self.reason}"
+
+    def fingerprint(self):
+        """Отпечаток ошибки для группировки уведомлений."""
+        return f"{type(self).__name__}:{self.path}"
+
+
+class InvalidSetting(Exception):
+    """Недопустимое значение переменной окружения."""
+
+    def __init__(self, name, reason):
+        """Констуктор."""
+        self.name = name
+        self.reason = reason
+
+    def __str__(self):
+        """Сообщение ошибки."""
+        return f"Недопустимое значение {self.name}: {self.reason}"
+
+    def fingerprint(self):
+        """Отпечаток ошибки для группировки уведомлений."""
+        return f"{type(self).__name__}:{self.name}"
+
+
+class TokenAlreadyRegistered(Exception):
+    """Токен API уже зарегистрирован другим чатом."""
+
+    def __init__(self, owner):
+        """Констуктор."""
+        self.owner = owner
+
+    def __str__(self):
+        """Сообщение ошибки."""
+        return f"Токен уже зарегистрирован получателем {self.owner}"
+
+    def fingerprint(self):
+        """Отпечаток ошибки для группировки уведомлений."""
+        return f"{type(self).__name__}:{self.owner}"
+
+
+class ShutdownRequested(Exception):
+    """Процесс получил запрос остановки (SIGTERM)."""
+
+    def __str__(self):
+        """Сообщение ошибки."""
+        return "Получен запрос остановки процесса"
+
+    def fingerprint(self):
+        """Отпечаток ошибки для группировки уведомлений."""
+        return type(self).__name__
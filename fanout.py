@@ -0,0 +1,112 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from telegram.error import BadRequest, NetworkError, RetryAfter
+
+from clock import SystemClock
+from scheduler import Backoff
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_ERRORS = (NetworkError, RetryAfter)
+FAILED = object()
+NOT_MODIFIED = "message is not modified"
+
+
+class FanOut:
+    """Параллельная отправка одного сообщения во множество чатов.
+
+    Сообщения отправляются на ограниченном пуле потоков, поэтому время
+    рассылки в N чатов близко ко времени одной отправки. Каждый чат
+    повторяется отдельно, и только при сетевых ошибках или RetryAfter.
+    """
+
+    def __init__(self, workers=8, retries=2, backoff=None, clock=None):
+        """Констуктор."""
+        self.retries = retries
+        self.backoff = Backoff(base=1) if backoff is None else backoff
+        self.clock = SystemClock() if clock is None else clock
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="fanout")
+
+    def send(self, bot, chat_ids, message):
+        """Отправляет сообщение во все чаты; возвращает неудавшиеся чаты."""
+        results = self._map(
+            lambda chat_id: self._deliver(
+                chat_id, lambda: bot.send_message(chat_id, message)),
+            chat_ids)
+        return [
+            chat_id for chat_id, result in zip(chat_ids, results)
+            if result is FAILED
+        ]
+
+    def publish(self, bot, chat_ids, message, message_ids):
+        """Редактирует известные сообщения, в остальные чаты шлёт новые.
+
+        message_ids сопоставляет строковому chat_id ранее отправленное
+        сообщение. Если отредактировать его не удалось, отправляется
+        новое; сообщение, уже содержащее этот текст, считается
+        отредактированным. Возвращает неудавшиеся чаты и id сообщений по чатам.
+        """
+        results = self._map(
+            lambda chat_id: self._publish_one(
+                bot, chat_id, message, message_ids.get(str(chat_id))),
+            chat_ids)
+        failed = [
+            chat_id for chat_id, result in zip(chat_ids, results)
+            if result is FAILED
+        ]
+        sent = {
+            str(chat_id): result for chat_id, result in zip(chat_ids, results)
+            if result is not FAILED and result is not None
+        }
+        return failed, sent
+
+    def shutdown(self):
+        """Дожидается отправки начатых сообщений и останавливает пул."""
+        self._executor.shutdown(wait=True)
+
+    def _map(self, deliver, chat_ids):
+        if len(chat_ids) == 1:
+            return [deliver(chat_ids[0])]
+        return list(self._executor.map(deliver, chat_ids))
+
+    def _publish_one(self, bot, chat_id, message, message_id):
+        if message_id is not None:
+            edited = self._deliver(chat_id, lambda: _edit(
+                bot, chat_id, message, message_id))
+            if edited is not FAILED:
+                return message_id
+        sent = self._deliver(
+            chat_id, lambda: bot.send_message(chat_id, message))
+        if sent is FAILED:
+            return FAILED
+        return getattr(sent, "message_id", None)
+
+    def _deliver(self, chat_id, call):
+        for attempt in range(1, self.retries + 2):
+            try:
+                return call()
+            except BadRequest as error:
+                logger.warning(f"Ошибка отправки в чат {chat_id}: {error}")
+                return FAILED
+            except RETRYABLE_ERRORS as error:
+                logger.warning(f"Повтор отправки в чат {chat_id}: {error}")
+                if attempt > self.retries:
+                    return FAILED
+                self.clock.sleep(
+                    getattr(error, "retry_after", None)
+                    or self.backoff.delay(attempt))
+            except Exception as error:
+                logger.warning(f"Ошибка отправки в чат {chat_id}: {error}")
+                return FAILED
+
+
+def _edit(bot, chat_id, message, message_id):
+    try:
+        return bot.edit_message_text(
+            message, chat_id=chat_id, message_id=message_id)
+    except BadRequest as error:
+        if NOT_MODIFIED not in str(error).lower():
+            raise
+        return message_id
@@ -1,12 +1,37 @@
+import argparse
 import logging
 import os
+import queue
 import sys
+import threading
 import time
 
-import requests
 import telegram
 
+import alerts
+import analytics
+import codec
+import config as config_loader
+import engine
 import exceptions
+import http_transport
+import telegram_transport
+import validation
+from concurrency import AdaptiveLimiter
+from dedup import FingerprintSet
+from fanout import FanOut
+from ingress import IngressServer, is_loopback
+from inplace import InPlacePublisher
+from lease import Lease
+from liveness import HealthServer, Watchdog
+from memdiag import MemoryDiagnostics
+from metrics import registry as metrics
+from pipeline import Pipeline
+from registry import RegisterCommand, TenantRegistry
+from shutdown import GracefulShutdown, ShutdownClock
+from sources import SourceRegistry
+from statuscache import StatusCache
+import state as state_store
 
 from http import HTTPStatus
 from dotenv import load_dotenv
@@ -26,18 +51,87 @@ logger.addHandler(handler)
 PRACTICUM_TOKEN = os.getenv("PRACTICUM_TOKEN")
 TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
+TELEGRAM_SUBSCRIBERS = [
+    chat_id.strip()
+    for chat_id in os.getenv("TELEGRAM_SUBSCRIBERS", "").split(",")
+    if chat_id.strip()
+]
+SEND_WORKERS = int(os.getenv("SEND_WORKERS", 8))
+TELEGRAM_POOL_SIZE = int(os.getenv("TELEGRAM_POOL_SIZE", SEND_WORKERS))
+TELEGRAM_CONNECT_TIMEOUT = float(os.getenv("TELEGRAM_CONNECT_TIMEOUT", 5))
+TELEGRAM_READ_TIMEOUT = float(os.getenv("TELEGRAM_READ_TIMEOUT", 10))
+TELEGRAM_PROXY_URL = os.getenv("TELEGRAM_PROXY_URL")
 
 RETRY_PERIOD = 600
+SOURCE_PLUGINS = [
+    module for module in os.getenv("SOURCE_PLUGINS", "").split(",") if module
+]
+HTTP_TRANSPORT = os.getenv("HTTP_TRANSPORT", "requests")
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 10))
+REQUEST_TIMEOUT = 10
+ACCEPT_ENCODING = "gzip, deflate"
+STATE_FILE = os.getenv("STATE_FILE")
+DEFAULT_STATE_FILE = "homework_state.json"
+NOTIFIED_FILE = os.getenv("NOTIFIED_FILE")
+DEFAULT_NOTIFIED_FILE = "homework_notified.bin"
+NOTIFIED_JOURNAL_SUFFIX = ".journal"
+TENANTS_FILE = os.getenv("TENANTS_FILE")
+TENANT_STATE_FILE = os.getenv("TENANT_STATE_FILE", "homework_tenants.json")
+CONFIG_CHECK_PERIOD = 5
+REGISTRY_FILE = os.getenv("REGISTRY_FILE")
+STATUS_CACHE_NAME = os.getenv("STATUS_CACHE_NAME")
+STATUS_CACHE_SIZE = int(os.getenv("STATUS_CACHE_SIZE", 4096))
+LEASE_FILE = os.getenv("LEASE_FILE")
+LEASE_TTL = int(os.getenv("LEASE_TTL", 30))
+DRAIN_TIMEOUT = int(os.getenv("DRAIN_TIMEOUT", 20))
+EDIT_IN_PLACE = os.getenv("EDIT_IN_PLACE") == "1"
+PIPELINE_ENABLED = os.getenv("PIPELINE") == "1"
+FETCH_WORKERS = int(os.getenv("FETCH_WORKERS", 4))
+API_CONCURRENCY = int(os.getenv("API_CONCURRENCY", 2))
+API_CONCURRENCY_MAX = int(os.getenv("API_CONCURRENCY_MAX", FETCH_WORKERS))
+VALIDATE_WORKERS = int(os.getenv("VALIDATE_WORKERS", 1))
+NOTIFY_WORKERS = int(os.getenv("NOTIFY_WORKERS", 4))
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", 100))
+METRICS_LOG_PERIOD = int(os.getenv("METRICS_LOG_PERIOD", 60))
+OVERLOAD_LAG = int(os.getenv("OVERLOAD_LAG", 60))
+WATCHDOG_THRESHOLD = int(os.getenv("WATCHDOG_THRESHOLD", 0))
+HEALTH_HOST = os.getenv("HEALTH_HOST", "127.0.0.1")
+HEALTH_PORT = int(os.getenv("HEALTH_PORT", 0))
+INGRESS_HOST = os.getenv("INGRESS_HOST", "127.0.0.1")
+INGRESS_PORT = int(os.getenv("INGRESS_PORT", 0))
+INGRESS_TOKEN = os.getenv("INGRESS_TOKEN")
+MEMORY_DIAGNOSTICS_PERIOD = int(os.getenv("MEMORY_DIAGNOSTICS_PERIOD", 0))
+MEMORY_DUMP_FILE = os.getenv("MEMORY_DUMP_FILE", "homework_memory.dump")
+REVIEW_DIGEST_PERIOD = int(os.getenv("REVIEW_DIGEST_PERIOD", 0))
+ALERT_WINDOW = int(os.getenv("ALERT_WINDOW", alerts.DEFAULT_WINDOW))
+ALERT_DIGEST_PERIOD = int(
+    os.getenv("ALERT_DIGEST_PERIOD", alerts.DEFAULT_DIGEST_PERIOD))
+STATUS_TEMPLATE = "Изменился статус проверки работы \"{name}\". {verdict}"
+
 ENDPOINT = "https://practicum.yandex.ru/api/user_api/homework_statuses/"
 HEADERS = {"Authorization": f"OAuth {PRACTICUM_TOKEN}"}
 
 
+api_transports = {}
+fan_out = FanOut(workers=SEND_WORKERS)
+api_limiter = AdaptiveLimiter(
+    initial=API_CONCURRENCY, max_limit=API_CONCURRENCY_MAX)
+source_registry = SourceRegistry()
+
 HOMEWORK_VERDICTS = {
     "approved": "Работа проверена: ревьюеру всё понравилось. Ура!",
     "reviewing": "Работа взята на проверку ревьюером.",
     "rejected": "Работа проверена: у ревьюера есть замечания."
 }
 
+_registered = queue.SimpleQueue()
+_states_lock = threading.Lock()
+_transports_lock = threading.Lock()
+
+validate_response = validation.compile_response_validator()
+parse_record = validation.compile_status_parser(
+    HOMEWORK_VERDICTS, STATUS_TEMPLATE)
+
 
 def check_tokens():
     """Проверяет доступность переменных окружения."""
@@ -50,102 +144,592 @@ def check_tokens():
             raise exceptions.EnvironmentVariableNotDefined(token_name)
 
 
+def check_settings():
+    """Проверяет согласованность настроек из переменных окружения."""
+    if LEASE_FILE and LEASE_TTL < 2 * REQUEST_TIMEOUT:
+        raise exceptions.InvalidSetting(
+            "LEASE_TTL",
+            f"аренда должна переживать запрос к API: нужно не меньше "
+            f"{2 * REQUEST_TIMEOUT} с")
+    if HTTP_TRANSPORT not in http_transport.TRANSPORTS:
+        raise exceptions.InvalidSetting(
+            "HTTP_TRANSPORT",
+            f"неизвестный транспорт {HTTP_TRANSPORT}, доступны: "
+            f"{', '.join(http_transport.TRANSPORTS)}")
+    if INGRESS_PORT and not INGRESS_TOKEN and not is_loopback(INGRESS_HOST):
+        raise exceptions.InvalidSetting(
+            "INGRESS_TOKEN",
+            f"приём событий на {INGRESS_HOST} требует токена")
+
+
 def send_message(bot, message):
-    """Отправляет сообщение в Telegram чат."""
-    try:
-        bot.send_message(TELEGRAM_CHAT_ID, message)
+    """Отправляет сообщение в Telegram чат и чаты подписчиков."""
+    return _deliver(bot, [TELEGRAM_CHAT_ID, *TELEGRAM_SUBSCRIBERS], message)
+
+
+def _deliver(bot, chat_ids, message):
+    if failed := fan_out.send(bot, chat_ids, message):
+        logger.error(f"Ошибка при отправке сообщения в чаты {failed}")
+    else:
         logger.debug("Бот успешно отправил сообщение")
-    except Exception:
-        logger.error("Ошибка при отправке сообщения боту")
+    return failed
 
 
 def get_api_answer(timestamp):
     """Делает запрос к единственному эндпоинту API-сервиса."""
+    return _request_api(timestamp, HEADERS)
+
+
+def _api_transport(name=None):
+    """Транспорт запросов к API по имени; создаётся при первом запросе."""
+    name = name or HTTP_TRANSPORT
+    with _transports_lock:
+        if name not in api_transports:
+            api_transports[name] = http_transport.build(name, HTTP_POOL_SIZE)
+        return api_transports[name]
+
+
+def _request_api(timestamp, headers, tenant="default", transport=None):
     payload = {"from_date": timestamp}
     response = None
-    try:
-        response = requests.get(url=ENDPOINT, headers=HEADERS, params=payload)
-    except Exception as error:
-        raise exceptions.EndpointRequestError(error)
-    if response.status_code != HTTPStatus.OK:
-        raise exceptions.EndpointBadResponse(response.status_code, ENDPOINT)
+    with api_limiter.acquire():
+        try:
+            response = _api_transport(transport).get(
+                ENDPOINT,
+                {**headers, "Accept-Encoding": ACCEPT_ENCODING},
+                payload,
+                REQUEST_TIMEOUT
+            )
+        except Exception as error:
+            raise exceptions.EndpointRequestError(error, ENDPOINT)
+        _account_transfer(response, tenant, timestamp)
+        if response.status_code != HTTPStatus.OK:
+            raise exceptions.EndpointBadResponse(
+                response.status_code, ENDPOINT)
+    return _decode(response)
+
+
+def _decode(response):
+    """Разбирает JSON прямо из байтов ответа, минуя response.text."""
+    if isinstance(content := getattr(response, "content", None), bytes):
+        return codec.loads(content)
     return response.json()
 
 
+def _account_transfer(response, tenant, timestamp):
+    """Учитывает байты запроса и ответа: на проводе и после распаковки.
+
+    Метки from_date=full/incremental показывают цену полной выгрузки
+    истории по сравнению с запросом изменений с курсора.
+    """
+    labels = {
+        "tenant": tenant,
+        "from_date": "incremental" if timestamp else "full",
+    }
+    metrics.increment("api_requests", **labels)
+    if (request := getattr(response, "request", None)) is not None:
+        metrics.increment(
+            "api_request_bytes", _request_size(request), **labels)
+    if (content := getattr(response, "content", None)) is None:
+        return
+    raw = getattr(response, "raw", None)
+    wire_size = raw.tell() if hasattr(raw, "tell") else len(content)
+    metrics.increment("api_response_bytes", len(content), **labels)
+    metrics.increment("api_response_wire_bytes", wire_size, **labels)
+    if response.headers.get("Content-Encoding"):
+        metrics.increment("api_compressed_responses", **labels)
+
+
+def _request_size(request):
+    headers = sum(
+        len(name) + len(value) + 4 for name, value in request.headers.items())
+    body = len(request.body or b"")
+    return len(request.method) + len(request.path_url) + 12 + headers + body
+
+
 def check_response(response):
     """Проверяет ответ API на соответствие документации."""
-    if not isinstance(response, dict):
-        raise TypeError(response, type(dict))
-    if not response.get("current_date"):
-        raise exceptions.KeyNotFound("current_date", response)
-    if not (homeworks := response.get("homeworks")):
-        raise exceptions.KeyNotFound("homeworks", response)
-    if not isinstance(homeworks, list):
-        raise TypeError(homeworks, type(list))
+    homeworks, _, issue = validate_response(response)
+    if issue is not None:
+        raise issue.exception()
     return homeworks
 
 
 def parse_status(homework):
     """Извлекает из информации о конкретной домашней работе статус работы."""
-    homework_name = _get_value("homework_name", homework)
-    status = _get_value("status", homework)
-    if not (verdict := HOMEWORK_VERDICTS.get(status)):
-        raise exceptions.UnexpectedStatus(status)
-    return f"Изменился статус проверки работы \"{homework_name}\". {verdict}"
+    message, issue = parse_record(homework)
+    if issue is not None:
+        raise issue.exception()
+    return message
+
+
+def _send_review_digest(bot, turnaround, next_digest, now):
+    if not REVIEW_DIGEST_PERIOD or now < next_digest:
+        return next_digest
+    if message := turnaround.digest_message():
+        send_message(bot, message)
+    return now + REVIEW_DIGEST_PERIOD
 
 
-def _parse_status(homeworks, status):
-    if len(homeworks) == 0:
-        return ""
-    new_status = parse_status(homeworks[0])
-    return new_status if new_status != status else ""
+def _build_engine(bot, turnaround, notify, notified=None, clock=None,
+                  fence=None, loader=None, status_cache=None, inspect=None):
+    publish = None
+    if EDIT_IN_PLACE:
+        publish = InPlacePublisher(
+            bot,
+            fan_out,
+            lambda tenant, failed: logger.error(
+                f"Ошибка при отправке сообщения в чаты {failed}"))
+    poller = engine.Engine(
+        fetch=lambda tenant, timestamp: _request_api(
+            timestamp, tenant.headers, tenant.name, tenant.transport),
+        validate=lambda response: check_response(response),
+        parse=lambda homework: parse_status(homework),
+        notify=notify,
+        period=RETRY_PERIOD,
+        clock=clock,
+        alerts=alerts.AlertPolicy(ALERT_WINDOW, ALERT_DIGEST_PERIOD),
+        notified=notified,
+        fence=fence,
+        publish=publish,
+        overload_lag=OVERLOAD_LAG,
+        sources=source_registry,
+        loader=loader,
+        status_cache=status_cache,
+        inspect=inspect,
+        log=logger
+    )
+    poller.on_transition.append(
+        lambda tenant, homework: turnaround.observe(
+            homework, poller.clock.time()))
+    return poller
 
 
-def _get_value(key, homework):
-    if not (value := homework.get(key)):
-        raise exceptions.KeyNotFound(key, homework)
-    return value
+def _default_tenant(state):
+    return engine.Tenant(
+        "default",
+        PRACTICUM_TOKEN,
+        [TELEGRAM_CHAT_ID, *TELEGRAM_SUBSCRIBERS],
+        state
+    )
+
+
+def _telegram_request():
+    return telegram_transport.shared_request(
+        TELEGRAM_POOL_SIZE,
+        TELEGRAM_CONNECT_TIMEOUT,
+        TELEGRAM_READ_TIMEOUT,
+        TELEGRAM_PROXY_URL
+    )
+
+
+def _create_bot():
+    return telegram.Bot(token=TELEGRAM_TOKEN, request=_telegram_request())
+
+
+def _notify_default(bot):
+    return lambda tenant, message: send_message(bot, message)
 
 
 def main():
     """Основная логика работы бота."""
     try:
         check_tokens()
-    except exceptions.EnvironmentVariableNotDefined as error:
+        check_settings()
+    except (exceptions.EnvironmentVariableNotDefined,
+            exceptions.InvalidSetting) as error:
         logger.critical(error)
         return
     bot = telegram.Bot(token=TELEGRAM_TOKEN)
-    timestamp = 0
-    status = ""
-    is_previous_request_ok = True
+    telegram_transport.attach(bot, _telegram_request())
+    state = state_store.initial()
+    if STATE_FILE:
+        state = state_store.load(STATE_FILE)
+    notified = None
+    if NOTIFIED_FILE:
+        notified = FingerprintSet.load(NOTIFIED_FILE)
+    turnaround = analytics.ReviewTurnaround()
+    poller = _build_engine(bot, turnaround, _notify_default(bot), notified)
+    tenant = _default_tenant(state)
+    ingress = _start_ingress(
+        poller, lambda name: tenant if name in (None, tenant.name) else None)
+    next_digest = poller.clock.time() + REVIEW_DIGEST_PERIOD
+    watchdog = _start_watchdog()
+    shutdown = GracefulShutdown()
+    shutdown.install()
+    try:
+        while True:
+            poller.poll(tenant)
+            _save_default(state, poller)
+            next_digest = _send_review_digest(
+                bot, turnaround, next_digest, poller.clock.time())
+            if watchdog is not None:
+                watchdog.beat(RETRY_PERIOD)
+            with shutdown.idle():
+                time.sleep(RETRY_PERIOD)
+    except exceptions.ShutdownRequested:
+        if ingress is not None:
+            ingress.stop()
+            _save_default(state, poller)
+        logger.warning("Получен SIGTERM: состояние сохранено, бот остановлен")
+    finally:
+        shutdown.restore()
+
+
+def _save_default(state, poller):
+    with _states_lock:
+        if STATE_FILE:
+            state_store.save(STATE_FILE, state)
+        if NOTIFIED_FILE:
+            poller.notified.save(NOTIFIED_FILE)
+
+
+def run_once():
+    """Выполняет один цикл опроса с сохранённым курсором и завершается.
+
+    Режим для запуска из cron или планировщика: между запусками курсор
+    хранится в файле STATE_FILE, отправленные уведомления — в NOTIFIED_FILE.
+    """
+    try:
+        check_tokens()
+        check_settings()
+    except (exceptions.EnvironmentVariableNotDefined,
+            exceptions.InvalidSetting) as error:
+        logger.critical(error)
+        return 1
+    bot = _create_bot()
+    path = STATE_FILE or DEFAULT_STATE_FILE
+    notified_path = NOTIFIED_FILE or DEFAULT_NOTIFIED_FILE
+    state = state_store.load(path)
+    notified = FingerprintSet.load(notified_path)
+    poller = _build_engine(
+        bot, analytics.ReviewTurnaround(), _notify_default(bot), notified)
+    poller.poll(_default_tenant(state))
+    state_store.save(path, state)
+    notified.save(notified_path)
+    return 0
+
+
+def run_tenants(path):
+    """Опрашивает API для получателей из файла конфигурации.
+
+    Конфигурация перечитывается по SIGHUP или при изменении файла,
+    применяется только разница: курсоры и расписание остальных
+    получателей сохраняются. Если задан LEASE_FILE, процессы с общими
+    файлами состояния работают в паре активный/резервный.
+    """
+    if TELEGRAM_TOKEN is None:
+        logger.critical(
+            exceptions.EnvironmentVariableNotDefined("TELEGRAM_TOKEN"))
+        return 1
+    try:
+        check_settings()
+    except exceptions.InvalidSetting as error:
+        logger.critical(error)
+        return 1
+    if (config := _load_initial_config(path)) is None:
+        return 1
+    bot = _create_bot()
+    states = state_store.load_all(TENANT_STATE_FILE)
+    notified_path = NOTIFIED_FILE or DEFAULT_NOTIFIED_FILE
+    lease = Lease(LEASE_FILE, LEASE_TTL) if LEASE_FILE else None
+    registry = TenantRegistry(REGISTRY_FILE) if REGISTRY_FILE else None
+    shutdown = GracefulShutdown()
+    shutdown.install()
+    poller = _build_engine(
+        bot,
+        analytics.ReviewTurnaround(),
+        lambda tenant, message: _deliver(bot, tenant.chat_ids, message),
+        _load_notified(notified_path),
+        clock=ShutdownClock(shutdown),
+        fence=lease.held if lease else None,
+        loader=_registry_loader(registry, states),
+        status_cache=_open_status_cache(),
+        inspect=validate_response
+    )
+    config_loader.apply(poller, config, states)
+    updater = None
+    if registry is not None:
+        updater = _start_registry(bot, poller, registry, lease)
+    watcher = config_loader.ConfigWatcher(path)
+    watcher.install_signal_handler()
+    ingress = _start_ingress(poller, poller.tenant)
+    runner = _build_runner(poller)
+    try:
+        _serve_tenants(
+            poller, runner, watcher, lease, path, states, notified_path)
+    except exceptions.ShutdownRequested:
+        _hand_over(
+            poller, runner, lease, states, notified_path, ingress, updater)
+    finally:
+        shutdown.restore()
+    return 0
+
+
+def _serve_tenants(poller, runner, watcher, lease, path, states,
+                   notified_path):
+    period = min(CONFIG_CHECK_PERIOD, LEASE_TTL / 3) if lease else (
+        CONFIG_CHECK_PERIOD)
+    active = lease is None
+    next_metrics_log = poller.clock.time() + METRICS_LOG_PERIOD
+    watchdog = _start_watchdog()
     while True:
-        error_message = ""
-        try:
-            response = get_api_answer(timestamp)
-            homeworks = check_response(response)
-            is_previous_request_ok = True
-            timestamp = response.get("current_date", timestamp)
-            new_status = _parse_status(homeworks, status)
-            if not new_status:
-                logger.debug("Новые статусы отсутствуют")
-                continue
-            status = new_status
-            send_message(bot, status)
-            logger.debug(status)
-        except TypeError as error:
-            (value, expected_type) = error.args
-            error_message = (f"Объект {value} не соответствует "
-                             f"типу {expected_type}")
-        except Exception as error:
-            error_message = error
-        finally:
-            if error_message:
-                logger.error(error_message)
-                if is_previous_request_ok:
-                    send_message(bot, error_message)
-                is_previous_request_ok = False
-            time.sleep(RETRY_PERIOD)
+        if watchdog is not None:
+            watchdog.beat(period)
+        if lease is not None:
+            active = _renew_lease(lease, poller, states, active)
+        if active:
+            _run_cycle(runner, poller, states, period, notified_path)
+        else:
+            poller.clock.sleep(period)
+        if watcher.changed():
+            _reload_config(poller, path, states)
+        if poller.clock.time() >= next_metrics_log:
+            logger.info(f"Метрики:\n{metrics.render()}")
+            next_metrics_log = poller.clock.time() + METRICS_LOG_PERIOD
+
+
+def _hand_over(poller, runner, lease, states, notified_path, ingress,
+               updater=None):
+    """Останавливает опрос по SIGTERM так, чтобы преемник продолжил с места.
+
+    Начатые уведомления дорабатываются не дольше DRAIN_TIMEOUT секунд;
+    курсоры неуспевших получателей откатываются, и преемник опросит их
+    заново, а отсев повторов не даст отправить уведомление дважды.
+    Резервный процесс состояние не сохраняет: его копия может отставать.
+    Приём /register и событий останавливается первым: преемник читает
+    getUpdates сам, а после сохранения не должно остаться отправленных,
+    но не записанных уведомлений.
+    """
+    if updater is not None:
+        updater.stop()
+    if ingress is not None:
+        ingress.stop()
+    if PIPELINE_ENABLED:
+        if not runner.drain(DRAIN_TIMEOUT):
+            logger.warning(
+                f"Конвейер не опустел за {DRAIN_TIMEOUT} с, "
+                "незавершённые опросы будут повторены")
+        if rolled_back := runner.close(timeout=1):
+            logger.warning(f"Курсоры откатаны: {', '.join(rolled_back)}")
+    if lease is None or lease.held():
+        _save_tenants(poller, states, notified_path)
+    fan_out.shutdown()
+    if lease is not None:
+        lease.release()
+    logger.warning("Получен SIGTERM: состояние сохранено, бот остановлен")
+
+
+def _load_initial_config(path):
+    source_registry.transport = _api_transport()
+    try:
+        source_registry.load_plugins(SOURCE_PLUGINS)
+    except ImportError as error:
+        logger.critical(f"Не удалось загрузить плагин источника: {error}")
+        return None
+    try:
+        return config_loader.load(path, RETRY_PERIOD, source_registry)
+    except exceptions.InvalidConfig as error:
+        logger.critical(error)
+        return None
+
+
+def _open_status_cache():
+    if not STATUS_CACHE_NAME:
+        return None
+    return StatusCache.open(STATUS_CACHE_NAME, STATUS_CACHE_SIZE)
+
+
+def _registry_loader(registry, states):
+    if registry is None:
+        return None
+    return lambda name: _registered_tenant(registry, states, name)
+
+
+def _registered_tenant(registry, states, name):
+    if (registration := registry.get(name)) is None:
+        return None
+    return engine.Tenant(
+        name,
+        registration.token,
+        [registration.chat_id],
+        states.setdefault(name, state_store.initial()),
+        registration.period,
+        registration.source,
+    )
+
+
+def _start_registry(bot, poller, registry, lease):
+    """Ставит в расписание зарегистрированных получателей и слушает /register.
+
+    Первые опросы распределяются по периоду RETRY_PERIOD, получатели
+    загружаются из базы при своём опросе. С LEASE_FILE
+    команда не слушается: getUpdates допускает только одного читателя.
+    """
+    for name in registry.names():
+        poller.schedule(name, engine.spread_delay(name, RETRY_PERIOD))
+    if lease is not None:
+        logger.warning("С LEASE_FILE команда /register недоступна")
+        return None
+    # telegram.ext импортируется долго, а нужен только с REGISTRY_FILE.
+    from telegram.ext import CommandHandler, Updater
+
+    command = RegisterCommand(registry, _check_token, _registered.put, logger)
+    updater = Updater(bot=bot, workers=1)
+    updater.dispatcher.add_handler(CommandHandler(
+        "register",
+        lambda update, context: _reply_register(command, update, context)))
+    updater.start_polling()
+    return updater
+
+
+def _check_token(token):
+    _request_api(
+        int(time.time()), {"Authorization": f"OAuth {token}"}, "register")
+
+
+def _reply_register(command, update, context):
+    update.message.reply_text(
+        command.handle(update.effective_chat.id, context.args))
+    try:
+        update.message.delete()
+    except telegram.error.TelegramError:
+        logger.warning("Не удалось удалить сообщение с токеном")
+
+
+def _run_cycle(runner, poller, states, period, notified_path):
+    while not _registered.empty():
+        poller.schedule(_registered.get())
+    runner.run(duration=period)
+    if PIPELINE_ENABLED and not _drain_cycle(runner, poller.clock):
+        logger.warning(
+            f"Конвейер не опустел за {DRAIN_TIMEOUT} с, состояние будет "
+            "сохранено в следующем цикле")
+        return
+    _save_tenants(poller, states, notified_path)
+
+
+def _drain_cycle(runner, clock):
+    """Ждёт конвейер не дольше DRAIN_TIMEOUT, замечая запрос остановки."""
+    deadline = time.monotonic() + DRAIN_TIMEOUT
+    while not runner.drain(min(1, max(deadline - time.monotonic(), 0))):
+        clock.check()
+        if time.monotonic() >= deadline:
+            return False
+    return True
+
+
+def _save_tenants(poller, states, notified_path):
+    with _states_lock:
+        state_store.save(TENANT_STATE_FILE, states)
+        poller.notified.save(notified_path)
+
+
+def _build_runner(poller):
+    if not PIPELINE_ENABLED:
+        return poller
+    runner = Pipeline(
+        poller,
+        fetch_workers=FETCH_WORKERS,
+        validate_workers=VALIDATE_WORKERS,
+        notify_workers=NOTIFY_WORKERS,
+        capacity=PIPELINE_QUEUE_SIZE
+    )
+    runner.start()
+    return runner
+
+
+def _renew_lease(lease, poller, states, was_active):
+    active = lease.acquire()
+    if active and not was_active:
+        logger.warning("Аренда получена, процесс стал активным")
+    if not active and was_active:
+        logger.warning("Аренда потеряна, процесс перешёл в резерв")
+    if not active or not was_active:
+        _load_shared_state(poller, states)
+    return active
+
+
+def _load_shared_state(poller, states):
+    saved_states = state_store.load_all(TENANT_STATE_FILE)
+    with _states_lock:
+        for name, saved in saved_states.items():
+            state = states.setdefault(name, state_store.initial())
+            state.clear()
+            state.update(saved)
+    poller.notified = _load_notified(NOTIFIED_FILE or DEFAULT_NOTIFIED_FILE)
+
+
+def _load_notified(path):
+    """Отправленные уведомления из файла и журнала дописанных после него."""
+    notified = FingerprintSet.load(path)
+    notified.open_journal(path + NOTIFIED_JOURNAL_SUFFIX)
+    return notified
+
+
+def _reload_config(poller, path, states):
+    try:
+        config = config_loader.load(path, RETRY_PERIOD, source_registry)
+    except exceptions.InvalidConfig as error:
+        logger.error(f"{error}. Продолжаю с прежней конфигурацией")
+        return
+    added, removed, updated = config_loader.apply(poller, config, states)
+    logger.info(
+        f"Конфигурация перечитана: добавлено {len(added)}, "
+        f"удалено {len(removed)}, изменено {len(updated)}")
+
+
+def _start_watchdog():
+    if not WATCHDOG_THRESHOLD:
+        return None
+    watchdog = Watchdog(WATCHDOG_THRESHOLD, log=logger)
+    watchdog.start()
+    if HEALTH_PORT:
+        HealthServer(watchdog, HEALTH_HOST, HEALTH_PORT).start()
+    return watchdog
+
+
+def _start_ingress(poller, resolve):
+    if not INGRESS_PORT:
+        return None
+    server = IngressServer(
+        poller, resolve, INGRESS_HOST, INGRESS_PORT, INGRESS_TOKEN,
+        _states_lock)
+    server.start()
+    logger.info(f"Приём событий статусов на {INGRESS_HOST}:{server.port}")
+    return server
+
+
+def _start_memory_diagnostics():
+    if not MEMORY_DIAGNOSTICS_PERIOD:
+        return None
+    diagnostics = MemoryDiagnostics(
+        MEMORY_DIAGNOSTICS_PERIOD, MEMORY_DUMP_FILE, log=logger)
+    diagnostics.install_signal_handler()
+    diagnostics.start()
+    return diagnostics
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description="Бот проверки домашних работ")
+    parser.add_argument(
+        "--once",
+        action="store_true",
+        help="выполнить один цикл опроса, сохранить состояние и завершиться"
+    )
+    parser.add_argument(
+        "--config",
+        default=TENANTS_FILE,
+        help="файл конфигурации получателей (по умолчанию TENANTS_FILE)"
+    )
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
+    args = _parse_args()
+    _start_memory_diagnostics()
+    if args.once:
+        sys.exit(run_once())
+    if args.config:
+        sys.exit(run_tenants(args.config))
     main()
@@ -0,0 +1,265 @@
+import asyncio
+import http.client
+import ssl
+import threading
+import zlib
+from collections import namedtuple
+from http import HTTPStatus
+from urllib.parse import urlencode, urlsplit
+
+import requests
+import urllib3
+
+import codec
+
+BODILESS_STATUSES = frozenset((
+    HTTPStatus.NO_CONTENT, HTTPStatus.NOT_MODIFIED))
+
+Request = namedtuple("Request", ("method", "path_url", "headers", "body"))
+
+
+class Raw:
+    """Счётчик байтов ответа на проводе, как у response.raw в requests."""
+
+    def __init__(self, size):
+        """Констуктор."""
+        self.size = size
+
+    def tell(self):
+        """Число байтов тела ответа до распаковки."""
+        return self.size
+
+
+class Response:
+    """Ответ HTTP в объёме, который нужен боту от requests.Response."""
+
+    def __init__(self, status_code, headers, content, wire_size, request):
+        """Констуктор."""
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.raw = Raw(wire_size)
+        self.request = request
+
+    def json(self):
+        """Разбирает тело ответа как JSON."""
+        return codec.loads(self.content)
+
+
+class RequestsTransport:
+    """GET через requests.get — поведение бота по умолчанию."""
+
+    name = "requests"
+
+    def get(self, url, headers, params, timeout):
+        """Выполняет запрос и возвращает ответ requests."""
+        return requests.get(
+            url=url, headers=headers, params=params, timeout=timeout)
+
+    def close(self):
+        """Закрывать нечего: requests.get не хранит соединений."""
+
+
+class Urllib3Transport:
+    """GET через пул соединений urllib3 без слоя requests."""
+
+    name = "urllib3"
+
+    def __init__(self, pool_size=10):
+        """Констуктор."""
+        self.pool = urllib3.PoolManager(maxsize=pool_size, retries=False)
+
+    def get(self, url, headers, params, timeout):
+        """Выполняет запрос через пул соединений."""
+        url = _with_query(url, params)
+        response = self.pool.request(
+            "GET", url, headers=headers, timeout=timeout,
+            preload_content=False)
+        try:
+            content = response.read(decode_content=True)
+            wire_size = response.tell()
+        finally:
+            response.release_conn()
+        return Response(
+            response.status,
+            response.headers,
+            content,
+            wire_size,
+            Request("GET", _path_url(url), headers, None),
+        )
+
+    def close(self):
+        """Закрывает соединения пула."""
+        self.pool.clear()
+
+
+class AsyncioTransport:
+    """GET по HTTP/1.1 на asyncio из стандартной библиотеки.
+
+    Цикл событий работает в отдельном потоке, поэтому get() можно
+    вызывать из любого потока, и запросы разных потоков выполняются
+    одновременно. Соединения keep-alive переиспользуются. Тело без
+    Content-Length и chunked читается до закрытия соединения, а ответ
+    с явным Connection: keep-alive без них завершается ошибкой: конец
+    тела не определить, и запрос иначе ждал бы таймаута.
+    """
+
+    name = "asyncio"
+
+    def __init__(self, pool_size=10):
+        """Констуктор."""
+        self.pool_size = pool_size
+        self._idle = {}
+        self._loop = None
+        self._lock = threading.Lock()
+
+    def get(self, url, headers, params, timeout):
+        """Выполняет запрос в цикле событий транспорта."""
+        future = asyncio.run_coroutine_threadsafe(
+            asyncio.wait_for(
+                self.fetch(_with_query(url, params), headers), timeout),
+            self._running_loop())
+        return future.result()
+
+    async def fetch(self, url, headers):
+        """Корутина запроса; вызывается внутри цикла событий."""
+        parts = urlsplit(url)
+        secure = parts.scheme == "https"
+        key = (parts.hostname, parts.port or (443 if secure else 80), secure)
+        reader, writer = await self._connect(key)
+        path = _path_url(url)
+        head = "".join(
+            f"{name}: {value}\r\n" for name, value in {
+                "Host": parts.netloc, **headers}.items())
+        writer.write(f"GET {path} HTTP/1.1\r\n{head}\r\n".encode("latin-1"))
+        try:
+            status, response_headers, body, keep_alive = await _read_response(
+                reader)
+        except BaseException:
+            writer.close()
+            raise
+        if keep_alive and len(self._idle.get(key, ())) < self.pool_size:
+            self._idle.setdefault(key, []).append((reader, writer))
+        else:
+            writer.close()
+        return Response(
+            status,
+            response_headers,
+            _decode(body, response_headers.get("Content-Encoding")),
+            len(body),
+            Request("GET", path, headers, None),
+        )
+
+    def close(self):
+        """Закрывает соединения и останавливает цикл событий."""
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._close_idle(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+
+    async def _connect(self, key):
+        while self._idle.get(key):
+            reader, writer = self._idle[key].pop()
+            if not reader.at_eof() and not writer.is_closing():
+                return reader, writer
+            writer.close()
+        host, port, secure = key
+        return await asyncio.open_connection(
+            host, port, ssl=ssl.create_default_context() if secure else None)
+
+    async def _close_idle(self):
+        for connections in self._idle.values():
+            for _, writer in connections:
+                writer.close()
+        self._idle.clear()
+
+    def _running_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._loop.run_forever,
+                    name="http-asyncio",
+                    daemon=True,
+                ).start()
+            return self._loop
+
+
+TRANSPORTS = {
+    transport.name: transport
+    for transport in (RequestsTransport, Urllib3Transport, AsyncioTransport)
+}
+
+
+def build(name, pool_size=10):
+    """Создаёт транспорт по имени из TRANSPORTS."""
+    if name not in TRANSPORTS:
+        raise ValueError(
+            f"Неизвестный транспорт {name}, доступны: {', '.join(TRANSPORTS)}")
+    if name == RequestsTransport.name:
+        return RequestsTransport()
+    return TRANSPORTS[name](pool_size)
+
+
+async def _read_response(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("Соединение закрыто сервером")
+    version, status = status_line.decode("latin-1").split(" ", 2)[:2]
+    headers = http.client.HTTPMessage()
+    while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip()] = value.strip()
+    connection = headers.get("Connection", "").lower()
+    keep_alive = (
+        connection == "keep-alive"
+        or version == "HTTP/1.1" and connection != "close")
+    status = int(status)
+    if status in BODILESS_STATUSES:
+        body = b""
+    elif headers.get("Transfer-Encoding", "").lower() == "chunked":
+        body = await _read_chunked(reader)
+    elif "Content-Length" in headers:
+        body = await reader.readexactly(int(headers["Content-Length"]))
+    elif connection == "keep-alive":
+        raise ConnectionError(
+            "Ответ keep-alive без Content-Length и chunked: конец тела "
+            "не определить")
+    else:
+        body = await reader.read()
+        keep_alive = False
+    return status, headers, body, keep_alive
+
+
+async def _read_chunked(reader):
+    chunks = []
+    while size := int((await reader.readline()).split(b";")[0], 16):
+        chunks.append(await reader.readexactly(size))
+        await reader.readline()
+    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+        pass
+    return b"".join(chunks)
+
+
+def _decode(body, encoding):
+    if encoding == "gzip":
+        return zlib.decompress(body, 16 + zlib.MAX_WBITS)
+    if encoding == "deflate":
+        try:
+            return zlib.decompress(body)
+        except zlib.error:
+            return zlib.decompress(body, -zlib.MAX_WBITS)
+    return body
+
+
+def _with_query(url, params):
+    if not params:
+        return url
+    return f"{url}{'&' if urlsplit(url).query else '?'}{urlencode(params)}"
+
+
+def _path_url(url):
+    parts = urlsplit(url)
+    return f"{parts.path or '/'}{'?' + parts.query if parts.query else ''}"
@@ -0,0 +1,159 @@
+import hmac
+import ipaddress
+import logging
+import threading
+from contextlib import nullcontext
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import codec
+from engine import describe_error
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY = 1024 * 1024
+
+
+class IngressServer:
+    """Приём событий смены статуса по HTTP в дополнение к опросу API.
+
+    POST /events принимает JSON {"tenant": имя, "homeworks": [...]} с
+    записями в том же виде, что и в ответе API; без tenant событие
+    относится к получателю по умолчанию. Записи, как в ответе API, идут
+    от новых к старым и обрабатываются от старых к новым: разбор, отсев
+    повторов и отправка выполняются сразу через engine.ingest(), а
+    следующий опрос сверяет их с API. resolve(name) находит получателя
+    по имени или возвращает None. С token запрос должен нести заголовок
+    Authorization: Bearer <token>; без token сервер слушает только
+    loopback-адрес. Разбор и отправка событий выполняются под lock,
+    чтобы не менять состояние получателей во время его сохранения.
+    """
+
+    def __init__(self, engine, resolve, host="127.0.0.1", port=8081,
+                 token=None, lock=None, metrics=registry):
+        """Констуктор."""
+        if not token and not is_loopback(host):
+            raise ValueError(
+                f"Приём событий на {host} без токена открыт для всех")
+        handler = type("IngressHandler", (_IngressHandler,), {
+            "engine": engine,
+            "resolve": staticmethod(resolve),
+            "token": token,
+            "lock": nullcontext() if lock is None else lock,
+            "metrics": metrics,
+        })
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def port(self):
+        """Порт, на котором слушает сервер."""
+        return self.server.server_address[1]
+
+    def start(self):
+        """Запускает сервер в фоновом потоке."""
+        self._thread = threading.Thread(
+            target=self.server.serve_forever, name="ingress", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Останавливает сервер."""
+        self.server.shutdown()
+        self.server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+class _IngressHandler(BaseHTTPRequestHandler):
+    engine = None
+    resolve = None
+    token = None
+    lock = nullcontext()
+    metrics = registry
+
+    def do_POST(self):
+        if self.path != "/events":
+            self._reply(HTTPStatus.NOT_FOUND, {"error": "not found"})
+            return
+        if not self._authorized():
+            self._reply(HTTPStatus.UNAUTHORIZED, {"error": "unauthorized"})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY:
+            self._reply(
+                HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "too large"})
+            return
+        try:
+            event = codec.loads(self.rfile.read(length))
+        except ValueError:
+            self._reply(HTTPStatus.BAD_REQUEST, {"error": "invalid json"})
+            return
+        if not _is_event(event):
+            self._reply(
+                HTTPStatus.BAD_REQUEST, {"error": "homeworks list expected"})
+            return
+        with self.lock:
+            status, body = self._ingest(event)
+        self._reply(status, body)
+
+    def _ingest(self, event):
+        tenant = self.resolve(event.get("tenant"))
+        if tenant is None:
+            return HTTPStatus.NOT_FOUND, {"error": "unknown tenant"}
+        if not self.engine.may_poll(tenant):
+            return HTTPStatus.SERVICE_UNAVAILABLE, {"error": "standby"}
+        return HTTPStatus.OK, self._deliver(tenant, event["homeworks"])
+
+    def _deliver(self, tenant, homeworks):
+        result = {"delivered": 0, "duplicate": 0, "rejected": []}
+        for homework in reversed(homeworks):
+            try:
+                delivered = self.engine.ingest(tenant, homework)
+            except Exception as error:
+                self.engine.report_error(tenant, error)
+                result["rejected"].append(describe_error(error))
+                self.metrics.increment("ingress_events", result="rejected")
+                continue
+            outcome = "delivered" if delivered else "duplicate"
+            result[outcome] += 1
+            self.metrics.increment("ingress_events", result=outcome)
+        return result
+
+    def _authorized(self):
+        if not self.token:
+            return True
+        return hmac.compare_digest(
+            self.headers.get("Authorization", "").encode(),
+            f"Bearer {self.token}".encode())
+
+    def _reply(self, status, body):
+        body = codec.dumps(body)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+def is_loopback(host):
+    """Слушает ли адрес host только локальные подключения."""
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def _is_event(event):
+    return (
+        isinstance(event, dict)
+        and isinstance(event.get("homeworks"), list)
+        and all(isinstance(homework, dict) for homework in event["homeworks"])
+    )
@@ -0,0 +1,40 @@
+FINAL_STATUSES = ("approved",)
+MAX_TRACKED = 1000
+
+
+class InPlacePublisher:
+    """Обновляет одно сообщение о домашней работе вместо отправки новых.
+
+    id сообщений хранятся в состоянии получателя по работе и чату.
+    Промежуточные статусы редактируют ранее отправленное сообщение,
+    новое сообщение отправляется для первого статуса работы и для
+    окончательного вердикта, после которого запись о работе удаляется.
+    Хранится не больше max_tracked работ: записи работ, дольше всех не
+    менявших статус, вытесняются, и их следующий статус придёт новым
+    сообщением.
+    """
+
+    def __init__(self, bot, fan_out, on_failure=None,
+                 max_tracked=MAX_TRACKED):
+        """Констуктор."""
+        self.bot = bot
+        self.fan_out = fan_out
+        self.on_failure = on_failure
+        self.max_tracked = max_tracked
+
+    def __call__(self, tenant, homework, message):
+        """Публикует уведомление; возвращает неудавшиеся чаты."""
+        key = str(homework.get("id") or homework.get("homework_name"))
+        messages = tenant.state.setdefault("messages", {})
+        final = homework.get("status") in FINAL_STATUSES
+        known = {} if final else messages.get(key, {})
+        failed, sent = self.fan_out.publish(
+            self.bot, tenant.chat_ids, message, known)
+        messages.pop(key, None)
+        if not final:
+            messages[key] = {**known, **sent}
+            while len(messages) > self.max_tracked:
+                del messages[next(iter(messages))]
+        if failed and self.on_failure is not None:
+            self.on_failure(tenant, failed)
+        return failed
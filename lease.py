@@ -0,0 +1,71 @@
+import os
+import socket
+import sqlite3
+import uuid
+
+from clock import SystemClock
+
+
+def default_holder():
+    """Уникальное имя процесса-претендента на аренду."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class Lease:
+    """Продлеваемая аренда роли активного процесса в общей SQLite-базе.
+
+    Активным считается процесс, который последним захватил или продлил
+    аренду и у которого она не истекла. Резервный процесс захватывает
+    аренду, только когда активный пропустил продление дольше ttl секунд.
+    """
+
+    def __init__(self, path, ttl, holder=None, clock=None, name="poller"):
+        """Констуктор."""
+        self.ttl = ttl
+        self.holder = default_holder() if holder is None else holder
+        self.clock = SystemClock() if clock is None else clock
+        self.name = name
+        self.expires_at = 0
+        self._connection = sqlite3.connect(
+            path, timeout=ttl, isolation_level=None)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS lease ("
+            "name TEXT PRIMARY KEY, holder TEXT NOT NULL, "
+            "expires_at REAL NOT NULL)")
+
+    def acquire(self):
+        """Захватывает или продлевает аренду; True — процесс активен."""
+        now = self.clock.time()
+        connection = self._connection
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "SELECT holder, expires_at FROM lease WHERE name = ?",
+                (self.name,)).fetchone()
+            if row is None or row[0] == self.holder or row[1] <= now:
+                connection.execute(
+                    "INSERT OR REPLACE INTO lease VALUES (?, ?, ?)",
+                    (self.name, self.holder, now + self.ttl))
+                self.expires_at = now + self.ttl
+            else:
+                self.expires_at = 0
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return self.expires_at > 0
+
+    def held(self):
+        """Действует ли аренда по данным последнего продления."""
+        return self.clock.time() < self.expires_at
+
+    def release(self):
+        """Освобождает аренду, чтобы резервный процесс принял её сразу."""
+        self._connection.execute(
+            "DELETE FROM lease WHERE name = ? AND holder = ?",
+            (self.name, self.holder))
+        self.expires_at = 0
+
+    def close(self):
+        """Закрывает соединение с базой."""
+        self._connection.close()
@@ -0,0 +1,164 @@
+import json
+import logging
+import sys
+import threading
+import traceback
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from clock import SystemClock
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+
+class Watchdog:
+    """Следит, чтобы основной цикл регулярно отмечался через beat().
+
+    beat(interval) сообщает, что следующая отметка ожидается не позже
+    чем через interval секунд. Если цикл опоздал больше чем на threshold
+    секунд, он считается зависшим: в лог один раз пишутся стеки всех
+    потоков, а stalled() возвращает True до следующей отметки.
+    """
+
+    def __init__(self, threshold, clock=None, metrics=registry, log=logger):
+        """Констуктор."""
+        self.threshold = threshold
+        self.clock = SystemClock() if clock is None else clock
+        self.metrics = metrics
+        self.log = log
+        self.ready = False
+        self._lock = threading.Lock()
+        self._last_beat = self.clock.monotonic()
+        self._deadline = self._last_beat + threshold
+        self._reported = False
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def beat(self, interval=0):
+        """Отмечает живой цикл; следующая отметка — через interval секунд."""
+        with self._lock:
+            self._last_beat = self.clock.monotonic()
+            self._deadline = self._last_beat + interval + self.threshold
+            self._reported = False
+            self.ready = True
+
+    def stalled(self):
+        """Опоздал ли цикл с отметкой больше чем на threshold секунд."""
+        with self._lock:
+            return self.clock.monotonic() > self._deadline
+
+    def status(self):
+        """Состояние цикла для проверки живости."""
+        with self._lock:
+            age = self.clock.monotonic() - self._last_beat
+            return {
+                "alive": self.clock.monotonic() <= self._deadline,
+                "ready": self.ready,
+                "heartbeat_age": round(age, 3),
+            }
+
+    def check(self):
+        """Проверяет отметку; при зависании пишет стеки потоков в лог."""
+        with self._lock:
+            age = self.clock.monotonic() - self._last_beat
+            stalled = self.clock.monotonic() > self._deadline
+            report = stalled and not self._reported
+            if report:
+                self._reported = True
+        self.metrics.set_gauge("loop_heartbeat_age_seconds", age)
+        if report:
+            self.metrics.increment("loop_stalls")
+            self.log.error(
+                f"Основной цикл не отмечался {age:.0f} с. "
+                f"Стеки потоков:\n{format_stacks()}")
+        return stalled
+
+    def start(self, interval=None):
+        """Запускает фоновую проверку раз в interval секунд."""
+        interval = self.threshold / 4 if interval is None else interval
+        self._thread = threading.Thread(
+            target=self._work, args=(interval,), name="watchdog",
+            daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Останавливает фоновую проверку."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _work(self, interval):
+        while not self._stopped.wait(interval):
+            self.check()
+
+
+def format_stacks():
+    """Текущие стеки всех потоков процесса."""
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    blocks = []
+    for ident, frame in sys._current_frames().items():
+        stack = "".join(traceback.format_stack(frame))
+        blocks.append(f"Поток {names.get(ident, ident)}:\n{stack}")
+    return "\n".join(blocks)
+
+
+class HealthServer:
+    """HTTP-проверки живости (/live) и готовности (/ready) процесса.
+
+    Ответ 200 — проверка пройдена, 503 — нет; в теле JSON с состоянием
+    сторожа. Сервер работает в отдельном потоке и не зависит от
+    основного цикла, поэтому отвечает и при его зависании.
+    """
+
+    def __init__(self, watchdog, host="127.0.0.1", port=8080):
+        """Констуктор."""
+        handler = type(
+            "HealthHandler", (_HealthHandler,), {"watchdog": watchdog})
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def port(self):
+        """Порт, на котором слушает сервер."""
+        return self.server.server_address[1]
+
+    def start(self):
+        """Запускает сервер в фоновом потоке."""
+        self._thread = threading.Thread(
+            target=self.server.serve_forever, name="health", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Останавливает сервер."""
+        self.server.shutdown()
+        self.server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+class _HealthHandler(BaseHTTPRequestHandler):
+    watchdog = None
+
+    def do_GET(self):
+        status = self.watchdog.status()
+        if self.path == "/live":
+            ok = status["alive"]
+        elif self.path == "/ready":
+            ok = status["alive"] and status["ready"]
+        else:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        body = json.dumps(status).encode()
+        self.send_response(
+            HTTPStatus.OK if ok else HTTPStatus.SERVICE_UNAVAILABLE)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
@@ -0,0 +1,111 @@
+import logging
+import os
+import signal
+import threading
+import tracemalloc
+
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryDiagnostics:
+    """Периодические снимки tracemalloc и отчёт о росте памяти.
+
+    Раз в period секунд фоновый поток снимает распределение памяти,
+    сравнивает его с предыдущим снимком и пишет в лог top мест
+    с наибольшим приростом. По request_dump() (или SIGUSR1) текущий
+    снимок сохраняется в dump_path; прочитать его можно через
+    tracemalloc.Snapshot.load.
+    """
+
+    def __init__(self, period, dump_path, top=10, frames=5,
+                 metrics=registry, log=logger):
+        """Констуктор."""
+        self.period = period
+        self.dump_path = dump_path
+        self.top = top
+        self.frames = frames
+        self.metrics = metrics
+        self.log = log
+        self._previous = None
+        self._wake = threading.Event()
+        self._dump_requested = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Включает трассировку и запускает фоновый поток снимков."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        self._previous = self._snapshot()
+        self._thread = threading.Thread(
+            target=self._work, name="memdiag", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Останавливает поток и трассировку."""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        tracemalloc.stop()
+
+    def install_signal_handler(self):
+        """Сохранять снимок по SIGUSR1, если платформа его знает."""
+        if hasattr(signal, "SIGUSR1"):
+            signal.signal(
+                signal.SIGUSR1, lambda signum, frame: self.request_dump())
+
+    def request_dump(self):
+        """Запрашивает сохранение снимка фоновым потоком."""
+        self._dump_requested.set()
+        self._wake.set()
+
+    def collect(self):
+        """Снимает распределение памяти и возвращает выросшие места."""
+        snapshot = self._snapshot()
+        growth = [
+            stat for stat in snapshot.compare_to(self._previous, "lineno")
+            if stat.size_diff > 0
+        ][:self.top]
+        self._previous = snapshot
+        current, peak = tracemalloc.get_traced_memory()
+        self.metrics.set_gauge("memory_traced_bytes", current)
+        self.metrics.set_gauge("memory_traced_peak_bytes", peak)
+        if growth:
+            self.log.info(
+                "Рост памяти с прошлого снимка:\n"
+                + "\n".join(str(stat) for stat in growth))
+        return growth
+
+    def dump(self, path=None):
+        """Сохраняет текущий снимок в файл и возвращает путь к нему."""
+        path = self.dump_path if path is None else path
+        temporary = f"{path}.tmp"
+        self._snapshot().dump(temporary)
+        os.replace(temporary, path)
+        self.log.warning(f"Снимок памяти сохранён в {path}")
+        return path
+
+    def _snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ))
+
+    def _work(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.period)
+            self._wake.clear()
+            if self._stopped.is_set():
+                break
+            try:
+                if self._dump_requested.is_set():
+                    self._dump_requested.clear()
+                    self.dump()
+                else:
+                    self.collect()
+            except Exception:
+                self.log.exception("Сбой диагностики памяти")
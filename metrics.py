@@ -0,0 +1,82 @@
+import threading
+
+from analytics import QUANTILES, TDigest
+
+
+class Metrics:
+    """Потокобезопасный реестр счётчиков, показателей и распределений."""
+
+    def __init__(self):
+        """Констуктор."""
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._distributions = {}
+
+    def increment(self, name, value=1, **labels):
+        """Увеличивает счётчик."""
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        """Устанавливает текущее значение показателя."""
+        with self._lock:
+            self._gauges[_key(name, labels)] = value
+
+    def observe(self, name, value, **labels):
+        """Добавляет наблюдение в распределение."""
+        key = _key(name, labels)
+        with self._lock:
+            if key not in self._distributions:
+                self._distributions[key] = TDigest()
+            self._distributions[key].add(value)
+
+    def counter(self, name, **labels):
+        """Текущее значение счётчика."""
+        with self._lock:
+            return self._counters.get(_key(name, labels), 0)
+
+    def gauge(self, name, **labels):
+        """Текущее значение показателя или None."""
+        with self._lock:
+            return self._gauges.get(_key(name, labels))
+
+    def quantiles(self, name, **labels):
+        """p50/p90/p99 распределения или пустой словарь."""
+        with self._lock:
+            digest = self._distributions.get(_key(name, labels))
+            if digest is None:
+                return {}
+            return {q: digest.quantile(q) for q in QUANTILES}
+
+    def render(self):
+        """Текстовый снимок всех метрик, по строке на метрику."""
+        with self._lock:
+            lines = [
+                f"{_format(key)} {value}"
+                for key, value in sorted({
+                    **self._counters, **self._gauges}.items())
+            ]
+            for key, digest in sorted(self._distributions.items()):
+                for q in QUANTILES:
+                    lines.append(
+                        f"{_format(key, quantile=q)} {digest.quantile(q)}")
+        return "\n".join(lines)
+
+
+def _key(name, labels):
+    return (name, tuple(sorted(
+        (label, str(value)) for label, value in labels.items())))
+
+
+def _format(key, **extra):
+    name, labels = key
+    labels = (*labels, *extra.items())
+    if not labels:
+        return name
+    joined = ",".join(f"{label}={value}" for label, value in labels)
+    return f"{name}{{{joined}}}"
+
+
+registry = Metrics()
@@ -0,0 +1,268 @@
+import logging
+import queue
+import threading
+import time
+
+from metrics import registry
+from tracing import FETCH_DONE, FETCH_STARTED, QUEUED, Trace
+
+logger = logging.getLogger(__name__)
+
+STOP = object()
+
+
+class Stage:
+    """Этап конвейера: пул потоков, разбирающих ограниченную очередь.
+
+    put() блокируется, пока очередь полна, — так медленный этап
+    притормаживает предыдущий вместо неограниченного роста очереди.
+    """
+
+    def __init__(self, name, handler, workers, capacity, metrics=registry):
+        """Констуктор."""
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.metrics = metrics
+        self.queue = queue.Queue(maxsize=capacity)
+        self._threads = []
+
+    def start(self):
+        """Запускает потоки этапа."""
+        self.metrics.set_gauge(
+            "pipeline_workers", self.workers, stage=self.name)
+        for number in range(self.workers):
+            thread = threading.Thread(
+                target=self._work, name=f"{self.name}-{number}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def put(self, item):
+        """Ставит элемент в очередь этапа, ожидая свободного места."""
+        started = time.monotonic()
+        self.queue.put(item)
+        self.metrics.increment(
+            "pipeline_blocked_seconds",
+            time.monotonic() - started,
+            stage=self.name)
+        self._update_depth()
+
+    def join(self, timeout=None):
+        """Дожидается обработки всех элементов очереди.
+
+        Возвращает False, если за timeout секунд очередь не опустела.
+        """
+        if timeout is None:
+            self.queue.join()
+            return True
+        deadline = time.monotonic() + timeout
+        with self.queue.all_tasks_done:
+            while self.queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self.queue.all_tasks_done.wait(remaining)
+        return True
+
+    def stop(self, timeout=None):
+        """Останавливает потоки после обработки уже поставленных элементов.
+
+        timeout — общий срок на остановку всех потоков этапа. Если за это
+        время в полной очереди не нашлось места для сигнала остановки,
+        оставшиеся потоки не ждутся.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for _ in self._threads:
+            try:
+                self.queue.put(STOP, timeout=_remaining(deadline))
+            except queue.Full:
+                logger.warning(
+                    f"Этап {self.name} не остановлен: очередь полна")
+                break
+        for thread in self._threads:
+            thread.join(_remaining(deadline))
+        self._threads = []
+
+    def _work(self):
+        while (item := self.queue.get()) is not STOP:
+            try:
+                self.handler(item)
+                self.metrics.increment("pipeline_processed", stage=self.name)
+            except Exception:
+                logger.exception(f"Сбой этапа {self.name}")
+            finally:
+                self.queue.task_done()
+                self._update_depth()
+        self.queue.task_done()
+
+    def _update_depth(self):
+        self.metrics.set_gauge(
+            "pipeline_queue_depth", self.queue.qsize(), stage=self.name)
+
+
+class Pipeline:
+    """Опрос получателей этапами fetch → validate → notify.
+
+    Этапы связаны ограниченными очередями и имеют собственное число
+    потоков. Когда Telegram отвечает медленно, заполняется очередь
+    notify, затем validate и fetch, и планировщик перестаёт выдавать
+    новые опросы, пока очереди не освободятся. Один получатель
+    обрабатывается не более чем одним потоком одновременно. После
+    close() необработанные элементы пропускаются, а курсоры получателей,
+    чьи опросы не завершились, возвращаются к значению до опроса.
+    """
+
+    def __init__(self, engine, fetch_workers=4, validate_workers=1,
+                 notify_workers=4, capacity=100, metrics=registry):
+        """Констуктор."""
+        self.engine = engine
+        self.metrics = metrics
+        self._in_flight = set()
+        self._cursors = {}
+        self._notifying = set()
+        self._closed = False
+        self._lock = threading.Lock()
+        self.stages = (
+            Stage("fetch", self._fetch, fetch_workers, capacity, metrics),
+            Stage("validate", self._validate, validate_workers, capacity,
+                  metrics),
+            Stage("notify", self._notify, notify_workers, capacity, metrics),
+        )
+        self.fetch_stage, self.validate_stage, self.notify_stage = self.stages
+
+    def start(self):
+        """Запускает потоки всех этапов."""
+        for stage in self.stages:
+            stage.start()
+
+    def stop(self):
+        """Дорабатывает очереди и останавливает потоки этапов."""
+        for stage in self.stages:
+            stage.stop()
+
+    def drain(self, timeout=None):
+        """Дожидается, пока все поставленные опросы пройдут конвейер.
+
+        Возвращает False, если за timeout секунд конвейер не опустел.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for stage in self.stages:
+            remaining = None
+            if deadline is not None:
+                remaining = max(deadline - time.monotonic(), 0)
+            if not stage.join(remaining):
+                return False
+        return True
+
+    def close(self, timeout=None):
+        """Прекращает обработку и откатывает курсоры незавершённых опросов.
+
+        timeout — общий срок на остановку всех этапов. Курсоры получателей,
+        чьё уведомление ещё отправляется, не откатываются: отправка может
+        завершиться и после close(), и повторный опрос преемником привёл
+        бы к дублю. Возвращает имена получателей, чьи курсоры откатаны.
+        """
+        self._closed = True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for stage in self.stages:
+            stage.stop(_remaining(deadline))
+        with self._lock:
+            cursors, self._cursors = self._cursors, {}
+            for name in self._notifying:
+                if cursors.pop(name, None) is not None:
+                    logger.warning(
+                        f"Уведомление {name} ещё отправляется, "
+                        "курсор не откатан")
+        for name, timestamp in cursors.items():
+            if (tenant := self.engine.tenant(name)) is not None:
+                tenant.state["timestamp"] = timestamp
+        return list(cursors)
+
+    def run(self, duration=None):
+        """Ставит опросы в конвейер по расписанию движка."""
+        self.engine.scheduler.run(self.submit, duration)
+
+    def submit(self, name):
+        """Ставит опрос получателя в очередь fetch.
+
+        Возвращает None: итог опроса конвейер сообщает планировщику через
+        scheduler.report(), и после ошибки действует backoff.
+        """
+        tenant = self.engine.tenant(name)
+        if tenant is None:
+            self.engine.scheduler.remove(name)
+            return True
+        with self._lock:
+            if name in self._in_flight:
+                self.metrics.increment("pipeline_skipped_in_flight")
+                return None
+            self._in_flight.add(name)
+            self._cursors[name] = tenant.state["timestamp"]
+        if not self.engine.may_poll(tenant):
+            self._finish(tenant)
+            return True
+        self.fetch_stage.put(tenant)
+        return None
+
+    def _fetch(self, tenant):
+        if self._closed:
+            return
+        trace = Trace(self.engine.clock)
+        trace.mark(FETCH_STARTED)
+        try:
+            response = self.engine.source(tenant).fetch(
+                tenant, tenant.state["timestamp"])
+        except Exception as error:
+            self._fail(tenant, error)
+            return
+        trace.mark(FETCH_DONE)
+        self.validate_stage.put((tenant, response, trace))
+
+    def _validate(self, item):
+        tenant, response, trace = item
+        if self._closed:
+            return
+        try:
+            found = self.engine.check(tenant, response, trace)
+        except Exception as error:
+            self._fail(tenant, error)
+            return
+        if not found:
+            self._finish(tenant)
+            return
+        trace.mark(QUEUED)
+        self.notify_stage.put((tenant, found))
+
+    def _notify(self, item):
+        tenant, found = item
+        with self._lock:
+            if self._closed:
+                return
+            self._notifying.add(tenant.name)
+        try:
+            self.engine.deliver(tenant, *found)
+        except Exception as error:
+            self._fail(tenant, error)
+        else:
+            self._finish(tenant)
+        finally:
+            with self._lock:
+                self._notifying.discard(tenant.name)
+
+    def _fail(self, tenant, error):
+        self.engine.report_error(tenant, error)
+        self._finish(tenant, ok=False)
+
+    def _finish(self, tenant, ok=True):
+        self.engine.scheduler.report(tenant.name, ok)
+        try:
+            self.engine.send_alert_digest(tenant)
+        finally:
+            with self._lock:
+                self._in_flight.discard(tenant.name)
+                self._cursors.pop(tenant.name, None)
+            self.engine.release(tenant.name)
+
+
+def _remaining(deadline):
+    return None if deadline is None else max(deadline - time.monotonic(), 0)
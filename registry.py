@@ -0,0 +1,142 @@
+import hashlib
+import sqlite3
+import threading
+from collections import namedtuple
+
+import exceptions
+from sources import DEFAULT_SOURCE
+
+Registration = namedtuple(
+    "Registration", ("name", "token", "chat_id", "period", "source"))
+
+
+def token_hash(token):
+    """Хэш токена API для поиска без перебора и хранения в индексе."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def tenant_name(chat_id):
+    """Имя получателя, зарегистрированного из чата."""
+    return f"tg{chat_id}"
+
+
+class TenantRegistry:
+    """Получатели, зарегистрированные через бота, в SQLite-базе.
+
+    Поиск по имени, чату и хэшу токена идёт по индексам, поэтому его
+    стоимость не зависит от числа зарегистрированных получателей.
+    """
+
+    def __init__(self, path):
+        """Констуктор."""
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            path, isolation_level=None, check_same_thread=False)
+        self._connection.executescript(
+            "CREATE TABLE IF NOT EXISTS tenants ("
+            "name TEXT PRIMARY KEY, token TEXT NOT NULL, "
+            "token_hash TEXT NOT NULL, chat_id TEXT NOT NULL, "
+            "period REAL, source TEXT NOT NULL);"
+            "CREATE UNIQUE INDEX IF NOT EXISTS tenants_token_hash "
+            "ON tenants (token_hash);"
+            "CREATE INDEX IF NOT EXISTS tenants_chat_id "
+            "ON tenants (chat_id);")
+
+    def register(self, chat_id, token, period=None, source=DEFAULT_SOURCE):
+        """Регистрирует чат с токеном или меняет токен чата.
+
+        Токен, уже зарегистрированный другим чатом, не принимается.
+        """
+        chat_id = str(chat_id)
+        registration = Registration(
+            tenant_name(chat_id), token, chat_id, period, source)
+        owner = self.by_token(token)
+        if owner is not None and owner.chat_id != chat_id:
+            raise exceptions.TokenAlreadyRegistered(owner.name)
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO tenants VALUES (?, ?, ?, ?, ?, ?)",
+                (registration.name, token, token_hash(token), chat_id,
+                 period, source))
+        return registration
+
+    def unregister(self, chat_id):
+        """Удаляет регистрацию чата; True, если она была."""
+        with self._lock:
+            cursor = self._connection.execute(
+                "DELETE FROM tenants WHERE chat_id = ?", (str(chat_id),))
+        return cursor.rowcount > 0
+
+    def get(self, name):
+        """Регистрация по имени получателя или None."""
+        return self._one("name = ?", name)
+
+    def by_chat(self, chat_id):
+        """Регистрация чата или None."""
+        return self._one("chat_id = ?", str(chat_id))
+
+    def by_token(self, token):
+        """Регистрация с этим токеном или None."""
+        return self._one("token_hash = ?", token_hash(token))
+
+    def names(self):
+        """Имена всех зарегистрированных получателей."""
+        with self._lock:
+            return [
+                name for (name,) in self._connection.execute(
+                    "SELECT name FROM tenants")
+            ]
+
+    def __len__(self):
+        """Число зарегистрированных получателей."""
+        with self._lock:
+            return self._connection.execute(
+                "SELECT COUNT(*) FROM tenants").fetchone()[0]
+
+    def close(self):
+        """Закрывает соединение с базой."""
+        self._connection.close()
+
+    def _one(self, condition, value):
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT name, token, chat_id, period, source FROM tenants "
+                f"WHERE {condition}", (value,)).fetchone()
+        return None if row is None else Registration(*row)
+
+
+class RegisterCommand:
+    """Команда /register <токен>: самостоятельная регистрация студента.
+
+    Токен проверяется одним запросом к API через check(token), который
+    выбрасывает исключение для недействительного токена. После
+    регистрации имя получателя передаётся в on_registered(name).
+    """
+
+    def __init__(self, registry, check, on_registered=None, log=None):
+        """Констуктор."""
+        self.registry = registry
+        self.check = check
+        self.on_registered = on_registered
+        self.log = log
+
+    def handle(self, chat_id, args):
+        """Обрабатывает команду и возвращает текст ответа в чат."""
+        if len(args) != 1:
+            return "Использование: /register <токен API Практикума>"
+        token = args[0]
+        try:
+            self.check(token)
+        except Exception as error:
+            if self.log is not None:
+                self.log.warning(
+                    f"Чат {chat_id} не прошёл проверку токена: {error}")
+            return "Токен не принят API Практикума, регистрация отменена"
+        try:
+            registration = self.registry.register(chat_id, token)
+        except exceptions.TokenAlreadyRegistered:
+            return "Этот токен уже зарегистрирован другим чатом"
+        if self.on_registered is not None:
+            self.on_registered(registration.name)
+        return ("Готово: уведомления о проверке работ будут приходить "
+                "в этот чат. Удалите сообщение с токеном из истории")
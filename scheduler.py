@@ -0,0 +1,212 @@
+import heapq
+import itertools
+import queue
+
+from metrics import registry
+
+PRIORITY_ACTIVE = 0
+PRIORITY_NORMAL = 1
+PRIORITY_IDLE = 2
+
+
+class Backoff:
+    """Экспоненциально растущая задержка повтора после ошибок подряд."""
+
+    def __init__(self, base, factor=2, maximum=None):
+        """Констуктор."""
+        self.base = base
+        self.factor = factor
+        self.maximum = maximum
+
+    def delay(self, failures):
+        """Задержка перед повтором после failures ошибок подряд."""
+        delay = self.base * self.factor ** max(failures - 1, 0)
+        if self.maximum is not None:
+            delay = min(delay, self.maximum)
+        return delay
+
+
+class Scheduler:
+    """Расписание опросов по ключам получателей на общих часах.
+
+    Ближайший опрос берётся из кучи, поэтому стоимость планирования
+    не зависит от количества получателей. Если задан priority(key),
+    то при отставании от расписания больше чем на overload_lag секунд
+    наступившие опросы выполняются по возрастанию приоритета, а опросы
+    с приоритетом PRIORITY_IDLE откладываются на shed_delay секунд,
+    но не более max_deferrals раз подряд.
+    """
+
+    def __init__(self, clock, period, backoff=None, priority=None,
+                 overload_lag=60, shed_delay=None, max_deferrals=3,
+                 metrics=registry):
+        """Констуктор."""
+        self.clock = clock
+        self.period = period
+        self.backoff = backoff
+        self.priority = priority
+        self.overload_lag = overload_lag
+        self.shed_delay = period if shed_delay is None else shed_delay
+        self.max_deferrals = max_deferrals
+        self.metrics = metrics
+        self.shed_total = 0
+        self._deferrals = {}
+        self._queue = []
+        self._due = {}
+        self._periods = {}
+        self._failures = {}
+        self._reports = queue.SimpleQueue()
+        self._counter = itertools.count()
+
+    def __len__(self):
+        """Количество запланированных ключей."""
+        return len(self._due)
+
+    def __contains__(self, key):
+        """Запланирован ли опрос для ключа."""
+        return key in self._due
+
+    def add(self, key, delay=0, period=None):
+        """Планирует опрос ключа через delay секунд.
+
+        period задаёт собственный период опроса ключа вместо общего.
+        """
+        if period is not None:
+            self._periods[key] = period
+        due = self.clock.monotonic() + delay
+        self._due[key] = due
+        heapq.heappush(self._queue, (due, next(self._counter), key))
+
+    def remove(self, key):
+        """Исключает ключ из расписания."""
+        self._due.pop(key, None)
+        self._periods.pop(key, None)
+        self._failures.pop(key, None)
+        self._deferrals.pop(key, None)
+
+    def next_due(self):
+        """Время ближайшего опроса или None, если расписание пусто."""
+        while self._queue:
+            due, _, key = self._queue[0]
+            if self._due.get(key) == due:
+                return due
+            heapq.heappop(self._queue)
+        return None
+
+    def run_pending(self, poll):
+        """Выполняет все наступившие опросы, возвращает их количество.
+
+        poll(key) возвращает True при успехе; после ошибки следующий
+        опрос откладывается согласно backoff. None означает, что опрос
+        выполняется асинхронно и его итог придёт через report().
+        """
+        self._apply_reports()
+        now = self.clock.monotonic()
+        due_keys = []
+        while (due := self.next_due()) is not None and due <= now:
+            _, _, key = heapq.heappop(self._queue)
+            due_keys.append((due, key))
+        if not due_keys:
+            return 0
+        lag = now - due_keys[0][0]
+        self.metrics.set_gauge("scheduler_lag_seconds", lag)
+        if self.priority is not None and lag > self.overload_lag:
+            due_keys = self._shed(due_keys)
+        count = 0
+        for position, (due, key) in enumerate(due_keys):
+            if self._due.get(key) != due:
+                continue
+            try:
+                self.clock.check()
+            except BaseException:
+                self._requeue(due_keys[position:])
+                raise
+            ok = poll(key)
+            count += 1
+            if self._due.get(key) == due:
+                self.add(key, self._delay(key, ok))
+        return count
+
+    def report(self, key, ok):
+        """Сообщает итог асинхронного опроса; можно вызывать из любого потока.
+
+        После ошибки следующий опрос переносится согласно backoff, после
+        успеха счётчик ошибок подряд сбрасывается. Итоги применяются в
+        потоке планировщика перед выбором очередных опросов.
+        """
+        self._reports.put((key, ok))
+
+    def _requeue(self, due_keys):
+        for due, key in due_keys:
+            heapq.heappush(self._queue, (due, next(self._counter), key))
+
+    def _apply_reports(self):
+        while not self._reports.empty():
+            key, ok = self._reports.get()
+            if key not in self._due:
+                continue
+            delay = self._delay(key, ok)
+            if not ok:
+                self.add(key, delay)
+
+    def _shed(self, due_keys):
+        due_keys.sort(key=lambda item: self.priority(item[1]))
+        kept = []
+        shed = 0
+        for due, key in due_keys:
+            deferrals = self._deferrals.get(key, 0)
+            if (self.priority(key) >= PRIORITY_IDLE
+                    and deferrals < self.max_deferrals):
+                self._deferrals[key] = deferrals + 1
+                self.add(key, self.shed_delay)
+                shed += 1
+                continue
+            self._deferrals.pop(key, None)
+            kept.append((due, key))
+        self.shed_total += shed
+        self.metrics.increment("polls_shed", shed)
+        return kept
+
+    def set_period(self, key, period):
+        """Меняет период опроса ключа начиная со следующего опроса."""
+        if period is None:
+            self._periods.pop(key, None)
+        else:
+            self._periods[key] = period
+
+    def run(self, poll, duration=None):
+        """Выполняет опросы по расписанию, ожидая между ними по часам.
+
+        Без duration работает, пока в расписании есть ключи. Перед каждым
+        опросом вызывается clock.check(): часы с запросом остановки
+        прерывают и цикл, отстающий от расписания.
+        """
+        until = None
+        if duration is not None:
+            until = self.clock.monotonic() + duration
+        while True:
+            self.clock.check()
+            self._apply_reports()
+            due = self.next_due()
+            now = self.clock.monotonic()
+            if due is None and until is None:
+                return
+            if until is not None and (due is None or due > until):
+                self.clock.sleep(max(until - now, 0))
+                return
+            if due > now:
+                self.clock.sleep(due - now)
+            self.run_pending(poll)
+
+    def _delay(self, key, ok):
+        period = self._periods.get(key, self.period)
+        if ok is None:
+            return period
+        if ok:
+            self._failures.pop(key, None)
+            return period
+        failures = self._failures.get(key, 0) + 1
+        self._failures[key] = failures
+        if self.backoff is None:
+            return period
+        return self.backoff.delay(failures)
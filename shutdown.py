@@ -0,0 +1,72 @@
+import signal
+import threading
+from contextlib import contextmanager
+
+from clock import SystemClock
+from exceptions import ShutdownRequested
+
+
+class GracefulShutdown:
+    """Корректная остановка по SIGTERM.
+
+    Сигнал не прерывает начатый опрос или отправку: он только отмечает
+    запрос остановки. ShutdownRequested выбрасывается там, где процесс
+    простаивает или переходит к следующему опросу, — внутри idle(),
+    в ShutdownClock.sleep() и ShutdownClock.check(), — и вызывающий код
+    успевает сохранить состояние.
+    """
+
+    def __init__(self):
+        """Констуктор."""
+        self.requested = threading.Event()
+        self._idle = False
+        self._previous = None
+
+    def install(self):
+        """Перехватывает SIGTERM; предыдущий обработчик вернёт restore()."""
+        self._previous = signal.signal(signal.SIGTERM, self._handle)
+
+    def restore(self):
+        """Возвращает обработчик SIGTERM, действовавший до install()."""
+        if self._previous is not None:
+            signal.signal(signal.SIGTERM, self._previous)
+            self._previous = None
+
+    def request(self):
+        """Запрашивает остановку, как при получении SIGTERM."""
+        self.requested.set()
+
+    @contextmanager
+    def idle(self):
+        """Участок простоя, который SIGTERM прерывает сразу."""
+        if self.requested.is_set():
+            raise ShutdownRequested()
+        self._idle = True
+        try:
+            yield
+        finally:
+            self._idle = False
+
+    def _handle(self, signum, frame):
+        self.request()
+        if self._idle:
+            self._idle = False
+            raise ShutdownRequested()
+
+
+class ShutdownClock(SystemClock):
+    """Системные часы, ожидание которых прерывается запросом остановки."""
+
+    def __init__(self, shutdown):
+        """Констуктор."""
+        self.shutdown = shutdown
+
+    def sleep(self, seconds):
+        """Ждёт seconds секунд; при запросе остановки — ShutdownRequested."""
+        if self.shutdown.requested.wait(max(seconds, 0)):
+            raise ShutdownRequested()
+
+    def check(self):
+        """ShutdownRequested, если остановка уже запрошена."""
+        if self.shutdown.requested.is_set():
+            raise ShutdownRequested()
@@ -0,0 +1,68 @@
+import importlib
+from collections import namedtuple
+
+DEFAULT_SOURCE = "practicum"
+
+
+def current_date_cursor(response, timestamp):
+    """Курсор следующего опроса из ответа API Практикума."""
+    return response.get("current_date", timestamp)
+
+
+Source = namedtuple(
+    "Source",
+    ("name", "fetch", "validate", "parse", "cursor", "inspect"),
+    defaults=(current_date_cursor, None),
+)
+Source.__doc__ = """Источник статусов проверки работ.
+
+fetch(tenant, timestamp) запрашивает изменения с курсора timestamp,
+validate(response) возвращает список записей (новые — первыми),
+parse(record) формирует текст уведомления, cursor(response, timestamp)
+возвращает курсор следующего опроса. Необязательный inspect(response)
+заменяет validate и cursor одним проходом без исключений и возвращает
+(records, cursor, issue). Записи — словари с ключом status
+и, по возможности, id и date_updated: по ним отсеиваются повторы.
+"""
+
+
+class SourceRegistry:
+    """Реестр источников статусов, подключаемых плагинами.
+
+    Плагин — модуль с функцией register(registry), которая добавляет
+    источники через registry.register(). Запросы к API источники делают
+    через registry.transport, чтобы пул соединений был общим.
+    """
+
+    def __init__(self, transport=None):
+        """Констуктор."""
+        self.transport = transport
+        self._sources = {}
+
+    def register(self, name, fetch, validate, parse, cursor=None,
+                 inspect=None):
+        """Добавляет источник; повторная регистрация имени запрещена."""
+        if name in self._sources:
+            raise ValueError(f"Источник {name} уже зарегистрирован")
+        source = Source(name, fetch, validate, parse, inspect=inspect)
+        if cursor is not None:
+            source = source._replace(cursor=cursor)
+        self._sources[name] = source
+        return source
+
+    def get(self, name):
+        """Источник по имени; KeyError, если такого нет."""
+        return self._sources[name]
+
+    def names(self):
+        """Имена зарегистрированных источников."""
+        return set(self._sources)
+
+    def __contains__(self, name):
+        """Зарегистрирован ли источник."""
+        return name in self._sources
+
+    def load_plugins(self, modules):
+        """Импортирует модули плагинов и регистрирует их источники."""
+        for module in modules:
+            importlib.import_module(module).register(self)
@@ -0,0 +1,47 @@
+import os
+import tempfile
+
+import alerts
+import codec
+
+
+def initial():
+    """Возвращает состояние бота до первого запроса к API."""
+    return {
+        "timestamp": 0,
+        "alerts": alerts.initial_state(),
+    }
+
+
+def load(path):
+    """Загружает сохранённое состояние бота, курсор по умолчанию — 0."""
+    return {**initial(), **_read(path, {})}
+
+
+def load_all(path):
+    """Загружает сохранённые состояния получателей по их именам."""
+    return {
+        name: {**initial(), **saved}
+        for name, saved in _read(path, {}).items()
+    }
+
+
+def save(path, state):
+    """Атомарно сохраняет состояние бота или получателей в файл."""
+    directory = os.path.dirname(os.path.abspath(path))
+    descriptor, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(codec.dumps(state))
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def _read(path, default):
+    try:
+        with open(path, "rb") as file:
+            return codec.loads(file.read())
+    except FileNotFoundError:
+        return default
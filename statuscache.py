@@ -0,0 +1,195 @@
+import os
+import struct
+import tempfile
+import threading
+from collections import namedtuple
+from multiprocessing import resource_tracker, shared_memory
+
+from clock import parse_date
+from dedup import fingerprint
+from metrics import registry
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+STATUSES = ("reviewing", "approved", "rejected")
+OTHER_STATUS = 0xFFFFFFFF
+MAGIC = b"HWSC"
+HEADER = struct.Struct("<4sI")
+SLOT = struct.Struct("<IIQqq")
+SEQUENCE = struct.Struct("<I")
+READ_RETRIES = 100
+
+Entry = namedtuple("Entry", ("homework", "status", "timestamp"))
+
+
+class StatusCache:
+    """Последние статусы получателей в общей памяти нескольких процессов.
+
+    Сегмент multiprocessing.shared_memory разбит на слоты фиксированной
+    ширины (32 байта): последовательность, код статуса, отпечаток имени
+    получателя, идентификатор работы и время обновления. Слоты адресуются
+    открытой адресацией с линейным пробированием. Чтение не требует
+    блокировок и обмена сообщениями: запись окружается нечётным номером
+    последовательности, и читатель повторяет чтение, пока не увидит
+    согласованный слот. Записи разных процессов упорядочиваются
+    блокировкой файла рядом с сегментом.
+    """
+
+    def __init__(self, name, capacity=4096, create=False, statuses=STATUSES,
+                 metrics=registry):
+        """Констуктор; capacity округляется вверх до степени двойки."""
+        self.name = name
+        self.metrics = metrics
+        self._codes = {status: code for code, status in enumerate(statuses, 1)}
+        self._statuses = {code: status for status, code in self._codes.items()}
+        if create:
+            size = 1
+            while size < capacity:
+                size *= 2
+            self._memory = shared_memory.SharedMemory(
+                name, create=True, size=HEADER.size + SLOT.size * size)
+            HEADER.pack_into(self._memory.buf, 0, MAGIC, size)
+        else:
+            self._memory = shared_memory.SharedMemory(name)
+            magic, size = HEADER.unpack_from(self._memory.buf, 0)
+            if magic != MAGIC:
+                self._memory.close()
+                raise ValueError(f"Сегмент {name} не является кэшем статусов")
+        # Сегмент переживает перезапуск процессов и удаляется только
+        # явным unlink(), поэтому не отдаётся на учёт resource_tracker.
+        resource_tracker.unregister(self._memory._name, "shared_memory")
+        self.capacity = size
+        self._lock = _WriteLock(name)
+
+    @classmethod
+    def open(cls, name, capacity=4096, **options):
+        """Присоединяется к сегменту или создаёт его, если его ещё нет."""
+        try:
+            return cls(name, **options)
+        except FileNotFoundError:
+            pass
+        try:
+            return cls(name, capacity, create=True, **options)
+        except FileExistsError:
+            return cls(name, **options)
+
+    def get(self, tenant):
+        """Последний статус получателя или None."""
+        key = fingerprint(tenant)
+        buffer = self._memory.buf
+        index = key & (self.capacity - 1)
+        for _ in range(self.capacity):
+            slot = self._read(buffer, index)
+            if slot is None or slot[2] == 0:
+                return None
+            _, code, slot_key, homework, timestamp = slot
+            if slot_key == key:
+                return Entry(homework, self._statuses.get(code), timestamp)
+            index = (index + 1) & (self.capacity - 1)
+        return None
+
+    def put(self, tenant, homework, status, timestamp):
+        """Записывает последний статус получателя.
+
+        Возвращает False, если свободных слотов не осталось.
+        """
+        key = fingerprint(tenant)
+        code = self._codes.get(status, OTHER_STATUS)
+        buffer = self._memory.buf
+        with self._lock:
+            index = key & (self.capacity - 1)
+            for _ in range(self.capacity):
+                offset = HEADER.size + SLOT.size * index
+                sequence, _, slot_key, _, _ = SLOT.unpack_from(buffer, offset)
+                if slot_key in (0, key):
+                    SEQUENCE.pack_into(buffer, offset, sequence + 1)
+                    SLOT.pack_into(
+                        buffer, offset, sequence + 1, code, key, homework,
+                        timestamp)
+                    SEQUENCE.pack_into(buffer, offset, sequence + 2)
+                    return True
+                index = (index + 1) & (self.capacity - 1)
+        self.metrics.increment("status_cache_full")
+        return False
+
+    def put_homework(self, tenant, homework):
+        """Записывает статус из записи API о домашней работе."""
+        return self.put(
+            tenant,
+            homework_key(homework),
+            homework.get("status"),
+            updated_at(homework),
+        )
+
+    def matches(self, tenant, homework):
+        """Совпадает ли запись о работе с последним статусом в кэше."""
+        entry = self.get(tenant)
+        return entry is not None and entry == (
+            homework_key(homework),
+            homework.get("status"),
+            updated_at(homework),
+        )
+
+    def close(self):
+        """Отсоединяется от сегмента."""
+        self._memory.close()
+        self._lock.close()
+
+    def unlink(self):
+        """Удаляет сегмент из системы."""
+        resource_tracker.register(self._memory._name, "shared_memory")
+        self._memory.unlink()
+
+    def _read(self, buffer, index):
+        offset = HEADER.size + SLOT.size * index
+        for _ in range(READ_RETRIES):
+            slot = SLOT.unpack_from(buffer, offset)
+            if slot[0] % 2:
+                continue
+            if SEQUENCE.unpack_from(buffer, offset)[0] == slot[0]:
+                return slot
+        return None
+
+
+def homework_key(homework):
+    """Целочисленный идентификатор работы для слота кэша."""
+    identifier = homework.get("id")
+    if isinstance(identifier, int) and not isinstance(identifier, bool):
+        return identifier
+    return fingerprint(identifier or homework.get("homework_name")) >> 1
+
+
+def updated_at(homework):
+    """Время обновления статуса работы в секундах или 0."""
+    value = homework.get("date_updated")
+    if not value:
+        return 0
+    if (timestamp := parse_date(value)) is None:
+        return fingerprint(value) >> 1
+    return int(timestamp)
+
+
+class _WriteLock:
+    def __init__(self, name):
+        self._thread_lock = threading.Lock()
+        self._file = None
+        if fcntl is not None:
+            path = os.path.join(tempfile.gettempdir(), f"{name}.lock")
+            self._file = open(path, "a")
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+
+    def __exit__(self, *exc_info):
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._thread_lock.release()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
@@ -0,0 +1,55 @@
+import threading
+
+from telegram.utils.request import Request
+
+_shared_request = None
+_lock = threading.Lock()
+
+
+def build_request(pool_size, connect_timeout, read_timeout, proxy_url=None):
+    """Создаёт пул соединений к Bot API.
+
+    Request из python-telegram-bot по умолчанию держит одно соединение,
+    и параллельные отправки выстраиваются к нему в очередь. Размер пула
+    задаётся по числу потоков рассылки; keep-alive включён в Request.
+    """
+    return Request(
+        con_pool_size=pool_size,
+        proxy_url=proxy_url,
+        connect_timeout=connect_timeout,
+        read_timeout=read_timeout,
+    )
+
+
+def shared_request(pool_size, connect_timeout, read_timeout, proxy_url=None):
+    """Общий для всех получателей пул соединений, создаётся один раз."""
+    global _shared_request
+    with _lock:
+        if _shared_request is None:
+            _shared_request = build_request(
+                pool_size, connect_timeout, read_timeout, proxy_url)
+        return _shared_request
+
+
+def attach(bot, request):
+    """Переключает уже созданного бота на общий пул соединений.
+
+    В python-telegram-bot 13 транспорт передаётся только в конструктор
+    Bot, поэтому для бота, созданного без него, пул по умолчанию
+    закрывается и заменяется. Объекты без транспорта не изменяются.
+    """
+    if not isinstance(getattr(bot, "_request", None), Request):
+        return bot
+    if bot._request is not request:
+        bot._request.stop()
+        bot._request = request
+    return bot
+
+
+def close():
+    """Закрывает общий пул соединений."""
+    global _shared_request
+    with _lock:
+        if _shared_request is not None:
+            _shared_request.stop()
+            _shared_request = None
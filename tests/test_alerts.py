@@ -0,0 +1,57 @@
+import alerts
+import exceptions
+
+ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
+
+
+class TestFingerprint:
+    def test_parameters_distinguish_errors(self):
+        server_error = exceptions.EndpointBadResponse(500, ENDPOINT)
+        not_found = exceptions.EndpointBadResponse(404, ENDPOINT)
+        assert (alerts.fingerprint(server_error)
+                != alerts.fingerprint(not_found))
+
+    def test_payload_is_not_part_of_fingerprint(self):
+        assert (alerts.fingerprint(exceptions.KeyNotFound('homeworks', {}))
+                == alerts.fingerprint(
+                    exceptions.KeyNotFound('homeworks', {'a': 1})))
+
+
+class TestAlertPolicy:
+    def test_flapping_error_is_batched_into_digest(self):
+        policy = alerts.AlertPolicy(window=3600, digest_period=600)
+        state = alerts.initial_state()
+        error = exceptions.EndpointBadResponse(500, ENDPOINT)
+        sent = [policy.report(state, error, str(error), now)
+                for now in range(0, 600, 60)]
+        assert sent == [True] + [False] * 9
+        assert policy.digest(state, 599) == ''
+        digest = policy.digest(state, 660)
+        assert 'повторений: 9' in digest
+        assert policy.digest(state, 1200) == ''
+
+    def test_alternating_errors_alert_once_each(self):
+        policy = alerts.AlertPolicy(window=3600, digest_period=600)
+        state = alerts.initial_state()
+        errors = [exceptions.EndpointBadResponse(500, ENDPOINT),
+                  exceptions.UnexpectedStatus('unknown')]
+        sent = [policy.report(state, errors[n % 2], 'error', n)
+                for n in range(10)]
+        assert sent.count(True) == 2
+
+    def test_error_is_sent_again_after_window(self):
+        policy = alerts.AlertPolicy(window=3600, digest_period=600)
+        state = alerts.initial_state()
+        error = exceptions.UnexpectedStatus('unknown')
+        assert policy.report(state, error, 'error', 0)
+        assert not policy.report(state, error, 'error', 3599)
+        assert policy.report(state, error, 'error', 3600)
+
+    def test_distinct_fingerprints_are_bounded(self):
+        policy = alerts.AlertPolicy(
+            window=3600, digest_period=600, max_fingerprints=3)
+        state = alerts.initial_state()
+        sent = [policy.report(state, exceptions.UnexpectedStatus(n), 'e', 0)
+                for n in range(100)]
+        assert sent.count(True) == 3
+        assert len(state['suppressed']) <= 4
@@ -0,0 +1,131 @@
+import random
+import sys
+import threading
+
+import analytics
+import clock
+import engine
+
+
+class TestTDigest:
+    def test_quantiles_close_to_exact(self):
+        rng = random.Random(0)
+        values = [rng.expovariate(1 / 3600) for _ in range(20000)]
+        digest = analytics.TDigest()
+        for value in values:
+            digest.add(value)
+        values.sort()
+        for q in analytics.QUANTILES:
+            exact = values[int(q * len(values))]
+            assert abs(digest.quantile(q) - exact) / exact < 0.05
+
+    def test_memory_is_bounded(self):
+        digest = analytics.TDigest(compression=50)
+        for value in range(100000):
+            digest.add(value)
+        digest.quantile(0.5)
+        assert len(digest) < 500
+
+    def test_empty(self):
+        assert analytics.TDigest().quantile(0.5) is None
+
+
+class TestReviewTurnaround:
+    def homework(self, status, date):
+        return {
+            'id': 1,
+            'homework_name': 'hw1',
+            'lesson_name': 'Итоговый проект',
+            'status': status,
+            'date_updated': date,
+        }
+
+    def test_reviewing_to_verdict(self):
+        turnaround = analytics.ReviewTurnaround()
+        assert turnaround.observe(
+            self.homework('reviewing', '2020-02-13T10:00:00Z')) is None
+        duration = turnaround.observe(
+            self.homework('approved', '2020-02-13T12:30:00Z'))
+        assert duration == 2.5 * 3600
+        percentiles = turnaround.percentiles('Итоговый проект')
+        assert percentiles[0.5] == duration
+        assert 'Итоговый проект' in turnaround.digest_message()
+
+    def test_verdict_without_review_start_is_ignored(self):
+        turnaround = analytics.ReviewTurnaround()
+        assert turnaround.observe(
+            self.homework('rejected', '2020-02-13T12:30:00Z')) is None
+        assert turnaround.projects() == []
+        assert turnaround.digest_message() == ''
+
+    def test_pending_reviews_are_bounded(self):
+        turnaround = analytics.ReviewTurnaround(max_pending=2)
+        for homework_id in (1, 2, 3):
+            turnaround.observe({'id': homework_id, 'status': 'reviewing'},
+                               now=homework_id)
+        assert turnaround.observe(
+            {'id': 1, 'status': 'approved'}, now=10) is None
+        assert turnaround.observe(
+            {'id': 3, 'status': 'approved'}, now=10) == 7
+
+    def test_stale_reviews_expire(self):
+        turnaround = analytics.ReviewTurnaround(max_age=100)
+        turnaround.observe({'id': 1, 'status': 'reviewing'}, now=0)
+        turnaround.observe({'id': 2, 'status': 'reviewing'}, now=150)
+        assert turnaround.observe(
+            {'id': 1, 'status': 'approved'}, now=160) is None
+        assert turnaround.observe(
+            {'id': 2, 'status': 'approved'}, now=160) == 10
+
+    def test_concurrent_observers(self):
+        turnaround = analytics.ReviewTurnaround(max_pending=3, max_age=50)
+        errors = []
+
+        def observe(offset):
+            try:
+                for n in range(3000):
+                    turnaround.observe(
+                        {'id': offset + n, 'status': 'reviewing',
+                         'homework_name': 'hw'}, now=n)
+                    turnaround.observe(
+                        {'id': offset + n - 2, 'status': 'approved',
+                         'homework_name': 'hw'}, now=n)
+            except Exception as error:
+                errors.append(error)
+
+        threads = [
+            threading.Thread(target=observe, args=(offset * 10000,))
+            for offset in range(4)
+        ]
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+        assert errors == []
+        assert len(turnaround._started) <= 3
+
+
+class TestEngineCallbacks:
+    def test_callbacks_run_after_send_and_failures_are_isolated(self):
+        events = []
+
+        def broken(tenant, homework):
+            events.append('callback')
+            raise KeyError('id')
+
+        poller = engine.Engine(
+            fetch=lambda tenant, timestamp: {
+                'homeworks': [{'id': 1, 'status': 'approved'}],
+                'current_date': 1},
+            validate=lambda response: response['homeworks'],
+            parse=lambda homework: homework['status'],
+            notify=lambda tenant, message: events.append(message),
+            period=600, clock=clock.VirtualClock())
+        poller.on_transition.append(broken)
+        assert poller.poll(engine.Tenant('ivanov', 'token', [1]))
+        assert events == ['approved', 'callback']
@@ -0,0 +1,45 @@
+import pytest
+
+import codec
+import state
+
+
+@pytest.fixture(params=list(codec.CODECS))
+def json_codec(request):
+    return codec.CODECS[request.param]
+
+
+class TestCodec:
+    def test_round_trip_keeps_text_readable(self, json_codec):
+        value = {'homeworks': [{'homework_name': 'проект', 'id': 1}],
+                 'current_date': 1.5, 'alerts': None}
+        encoded = json_codec.dumps(value)
+        assert isinstance(encoded, bytes)
+        assert 'проект'.encode() in encoded
+        assert json_codec.loads(encoded) == value
+
+    def test_integer_keys_become_strings(self, json_codec):
+        assert json_codec.loads(json_codec.dumps({1: 2})) == {'1': 2}
+
+    def test_codecs_are_interchangeable(self):
+        value = {'sent': {'7': 1.0}, 'suppressed': {'8': [1, 'ошибка']}}
+        for writer in codec.CODECS.values():
+            for reader in codec.CODECS.values():
+                assert reader.loads(writer.dumps(value)) == value
+
+    def test_default_prefers_installed_library(self):
+        expected = 'orjson' if codec.orjson is not None else 'json'
+        assert codec.build().name == expected
+
+    def test_unknown_codec(self):
+        with pytest.raises(ValueError):
+            codec.build('yaml')
+
+    def test_state_is_saved_with_codec(self, monkeypatch, tmp_path,
+                                       json_codec):
+        monkeypatch.setattr(codec, 'dumps', json_codec.dumps)
+        monkeypatch.setattr(codec, 'loads', json_codec.loads)
+        path = tmp_path / 'state.json'
+        saved = {**state.initial(), 'timestamp': 5, 'note': 'проверено'}
+        state.save(str(path), saved)
+        assert state.load(str(path)) == saved
@@ -0,0 +1,107 @@
+import threading
+
+import pytest
+
+import clock
+import exceptions
+import metrics
+from concurrency import AdaptiveLimiter
+
+
+def request(limiter, timer, latency, error=None):
+    with limiter.acquire():
+        timer.sleep(latency)
+        if error is not None:
+            raise error
+
+
+class TestAdaptiveLimiter:
+    def make(self, **options):
+        timer = clock.VirtualClock()
+        registry = metrics.Metrics()
+        limiter = AdaptiveLimiter(clock=timer, metrics=registry, **options)
+        return limiter, timer, registry
+
+    def test_limit_grows_additively_at_baseline_latency(self):
+        limiter, timer, registry = self.make(initial=2, max_limit=10)
+        for _ in range(2 + 3):
+            request(limiter, timer, 0.1)
+        assert int(limiter.limit) == 3
+        assert registry.gauge('api_concurrency_limit') == 3
+        assert registry.gauge(
+            'api_latency_baseline_seconds') == pytest.approx(0.1)
+
+    def test_limit_is_capped(self):
+        limiter, timer, _ = self.make(initial=2, max_limit=3)
+        for _ in range(100):
+            request(limiter, timer, 0.1)
+        assert limiter.limit == 3
+
+    def test_rising_latency_halves_limit(self):
+        limiter, timer, registry = self.make(initial=8, smoothing=1)
+        request(limiter, timer, 0.1)
+        request(limiter, timer, 0.5)
+        assert int(limiter.limit) == 4
+        assert registry.counter('api_concurrency_decreases') == 1
+        assert registry.gauge(
+            'api_latency_smoothed_seconds') == pytest.approx(0.5)
+
+    @pytest.mark.parametrize('error', [
+        exceptions.EndpointBadResponse(429, 'url'),
+        exceptions.EndpointBadResponse(503, 'url'),
+        exceptions.EndpointRequestError(TimeoutError(), 'url'),
+    ])
+    def test_overload_errors_halve_limit(self, error):
+        limiter, timer, _ = self.make(initial=8)
+        with pytest.raises(type(error)):
+            request(limiter, timer, 0.1, error)
+        assert limiter.limit == 4
+
+    def test_client_errors_do_not_shrink_limit(self):
+        limiter, timer, _ = self.make(initial=8)
+        with pytest.raises(exceptions.EndpointBadResponse):
+            request(limiter, timer, 0.1,
+                    exceptions.EndpointBadResponse(404, 'url'))
+        assert limiter.limit == 8
+        assert limiter.in_flight == 0
+        assert limiter.baseline is None
+
+    def test_fast_client_errors_do_not_lower_baseline(self):
+        limiter, timer, _ = self.make(initial=8, smoothing=1)
+        request(limiter, timer, 1)
+        for _ in range(20):
+            with pytest.raises(exceptions.EndpointBadResponse):
+                request(limiter, timer, 0.01,
+                        exceptions.EndpointBadResponse(401, 'url'))
+        request(limiter, timer, 1)
+        assert limiter.baseline == 1
+        assert limiter.limit > 8
+
+    def test_limit_shrinks_once_per_window(self):
+        limiter, timer, _ = self.make(initial=8)
+        contexts = [limiter.acquire() for _ in range(4)]
+        for context in contexts:
+            context.__enter__()
+        timer.sleep(1)
+        for context in contexts:
+            assert not context.__exit__(
+                exceptions.EndpointBadResponse,
+                exceptions.EndpointBadResponse(503, 'url'), None)
+        assert limiter.limit == 4
+        assert limiter.in_flight == 0
+
+    def test_acquire_waits_for_free_slot(self):
+        limiter, _, registry = self.make(initial=1, max_limit=1)
+        entered = threading.Event()
+
+        def wait():
+            with limiter.acquire():
+                entered.set()
+
+        with limiter.acquire():
+            assert registry.gauge('api_in_flight') == 1
+            waiter = threading.Thread(target=wait)
+            waiter.start()
+            assert not entered.wait(0.1)
+        assert entered.wait(1)
+        waiter.join(1)
@@ -0,0 +1,103 @@
+import json
+import os
+
+import pytest
+
+import clock
+import config
+import engine
+import exceptions
+
+
+def write_config(path, tenants, **options):
+    path.write_text(json.dumps({'tenants': tenants, **options}))
+
+
+def tenant(name, token='token', chat_ids=('1',), **options):
+    return {'name': name, 'practicum_token': token,
+            'chat_ids': list(chat_ids), **options}
+
+
+def make_engine():
+    return engine.Engine(
+        fetch=None, validate=None, parse=None, notify=None,
+        period=600, clock=clock.VirtualClock())
+
+
+class TestLoad:
+    def test_typed_config(self, tmp_path):
+        path = tmp_path / 'tenants.json'
+        write_config(path, [tenant('a', period=60), tenant('b')], period=300)
+        loaded = config.load(path, 600)
+        assert loaded.period == 300
+        assert loaded.tenants['a'] == config.TenantConfig(
+            'a', 'token', ('1',), 60)
+        assert loaded.tenants['b'].period == 300
+
+    @pytest.mark.parametrize('raw', [
+        [],
+        {'tenants': [{'name': 'a'}]},
+        {'tenants': [tenant('a'), tenant('a')]},
+        {'tenants': [tenant('a', period=0)]},
+        {'tenants': [tenant('a'), tenant('b')], 'max_tenants': 1},
+        {'tenants': [tenant('a', transport='curl')]},
+    ])
+    def test_invalid_config(self, raw):
+        with pytest.raises(exceptions.InvalidConfig):
+            config.parse(raw, 'tenants.json', 600)
+
+
+class TestApply:
+    def test_only_difference_is_applied(self, tmp_path):
+        path = tmp_path / 'tenants.json'
+        write_config(path, [tenant('a'), tenant('b')])
+        poller = make_engine()
+        states = {'b': {'timestamp': 42, 'alerts': {}}}
+        config.apply(poller, config.load(path, 600), states)
+        assert poller.tenants['b'].state['timestamp'] == 42
+        kept = poller.tenants['a']
+        kept.state['timestamp'] = 100
+
+        write_config(path, [tenant('a'), tenant('b', chat_ids=('1', '2')),
+                            tenant('c')])
+        changes = config.apply(poller, config.load(path, 600), states)
+        assert changes == (['c'], [], ['b'])
+        assert poller.tenants['a'] is kept
+        assert poller.tenants['b'].chat_ids == ['1', '2']
+
+        write_config(path, [tenant('b'), tenant('c')])
+        assert config.apply(poller, config.load(path, 600), states)[1] == [
+            'a']
+        assert 'a' not in poller.scheduler
+
+        write_config(path, [tenant('a'), tenant('b'), tenant('c')])
+        config.apply(poller, config.load(path, 600), states)
+        assert poller.tenants['a'].state['timestamp'] == 100
+
+    def test_transport_per_tenant(self, tmp_path):
+        path = tmp_path / 'tenants.json'
+        write_config(path, [tenant('a'), tenant('b', transport='urllib3')])
+        poller = make_engine()
+        config.apply(poller, config.load(path, 600), {})
+        assert poller.tenants['a'].transport is None
+        assert poller.tenants['b'].transport == 'urllib3'
+
+        write_config(path, [tenant('a', transport='asyncio'), tenant('b')])
+        changes = config.apply(poller, config.load(path, 600), {})
+        assert changes == ([], [], ['a', 'b'])
+        assert poller.tenants['a'].transport == 'asyncio'
+        assert poller.tenants['b'].transport is None
+
+
+class TestConfigWatcher:
+    def test_reload_on_file_change_or_request(self, tmp_path):
+        path = tmp_path / 'tenants.json'
+        write_config(path, [])
+        watcher = config.ConfigWatcher(path)
+        assert not watcher.changed()
+        watcher.request_reload()
+        assert watcher.changed()
+        assert not watcher.changed()
+        write_config(path, [tenant('a')], period=1)
+        os.utime(path, ns=(0, 1))
+        assert watcher.changed()
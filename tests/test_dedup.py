@@ -0,0 +1,71 @@
+import os
+
+import pytest
+
+import dedup
+
+
+class TestFingerprintSet:
+    def test_add_and_contains(self):
+        fingerprints = dedup.FingerprintSet(capacity=4)
+        keys = [dedup.fingerprint(1, 'hw', n) for n in range(1000)]
+        assert all(fingerprints.add(key) for key in keys)
+        assert not fingerprints.add(keys[0])
+        assert len(fingerprints) == 1000
+        assert all(key in fingerprints for key in keys)
+        assert dedup.fingerprint(2, 'hw', 0) not in fingerprints
+
+    def test_save_and_load(self, tmp_path):
+        path = tmp_path / 'notified.bin'
+        fingerprints = dedup.FingerprintSet()
+        keys = [dedup.fingerprint('tenant', n, 'approved') for n in range(5000)]
+        for key in keys:
+            fingerprints.add(key)
+        fingerprints.save(path)
+        assert path.stat().st_size < 16 * len(keys)
+        loaded = dedup.FingerprintSet.load(path)
+        assert len(loaded) == len(keys)
+        assert all(key in loaded for key in keys)
+
+    def test_load_missing_file(self, tmp_path):
+        assert len(dedup.FingerprintSet.load(tmp_path / 'missing.bin')) == 0
+
+    @pytest.mark.parametrize('raw', [b'', b'\x01' * 12, b'\x01' * 24])
+    def test_load_corrupted_file_starts_empty(self, tmp_path, raw):
+        path = tmp_path / 'notified.bin'
+        path.write_bytes(raw)
+        fingerprints = dedup.FingerprintSet.load(str(path))
+        assert len(fingerprints) == 0
+        assert fingerprints.add(5)
+        assert 5 in fingerprints
+
+    def test_load_overfull_file_is_rebuilt(self, tmp_path):
+        path = tmp_path / 'notified.bin'
+        path.write_bytes(b''.join(
+            key.to_bytes(8, 'little') for key in (1, 2, 3, 4)))
+        fingerprints = dedup.FingerprintSet.load(str(path))
+        assert len(fingerprints) == 4
+        assert 7 not in fingerprints
+        assert all(key in fingerprints for key in (1, 2, 3, 4))
+
+    def test_journal_is_replayed_and_cleared_on_save(self, tmp_path):
+        path = str(tmp_path / 'notified.bin')
+        journal = path + '.journal'
+        active = dedup.FingerprintSet.load(path)
+        active.open_journal(journal)
+        active.save(path)
+        for key in (11, 12, 13):
+            active.add(key)
+        active.add(12)
+        assert os.path.getsize(journal) == 24
+
+        with open(journal, 'ab') as file:
+            file.write(b'\x01\x02')
+        standby = dedup.FingerprintSet.load(path)
+        standby.open_journal(journal)
+        assert all(key in standby for key in (11, 12, 13))
+        assert len(standby) == 3
+
+        active.save(path)
+        assert os.path.getsize(journal) == 0
+        assert len(dedup.FingerprintSet.load(path)) == 3
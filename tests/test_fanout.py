@@ -0,0 +1,53 @@
+import threading
+import time
+
+import telegram
+
+import clock
+import fanout
+
+
+class SlowBot:
+    def __init__(self, delay=0.1, failures=None):
+        self.delay = delay
+        self.failures = dict(failures or {})
+        self.sent = []
+        self.lock = threading.Lock()
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        time.sleep(self.delay)
+        with self.lock:
+            if self.failures.get(chat_id):
+                self.failures[chat_id] -= 1
+                raise self.error
+            self.sent.append(chat_id)
+
+
+class TestFanOut:
+    def test_chats_are_sent_in_parallel(self):
+        bot = SlowBot(delay=0.1)
+        sender = fanout.FanOut(workers=10)
+        started = time.monotonic()
+        failed = sender.send(bot, list(range(10)), 'message')
+        elapsed = time.monotonic() - started
+        sender.shutdown()
+        assert failed == []
+        assert sorted(bot.sent) == list(range(10))
+        assert elapsed < 0.5
+
+    def test_each_chat_is_retried_separately(self):
+        bot = SlowBot(delay=0, failures={1: 2, 2: 5})
+        bot.error = telegram.error.NetworkError('timeout')
+        sender = fanout.FanOut(workers=4, retries=2,
+                               clock=clock.VirtualClock())
+        failed = sender.send(bot, [0, 1, 2], 'message')
+        sender.shutdown()
+        assert failed == [2]
+        assert sorted(bot.sent) == [0, 1]
+
+    def test_permanent_error_is_not_retried(self):
+        bot = SlowBot(delay=0, failures={0: 1})
+        bot.error = telegram.error.BadRequest('chat not found')
+        sender = fanout.FanOut(retries=2, clock=clock.VirtualClock())
+        assert sender.send(bot, [0], 'message') == [0]
+        assert bot.failures[0] == 0
@@ -0,0 +1,130 @@
+import gzip
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import exceptions
+import http_transport
+import metrics
+
+PAYLOAD = json.dumps({'homeworks': [], 'current_date': 1000}).encode()
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        if self.path.startswith('/empty'):
+            self.send_response(204)
+            self.end_headers()
+            return
+        if self.path.startswith('/unframed'):
+            self.send_response(200)
+            self.send_header('Connection', 'keep-alive')
+            self.end_headers()
+            self.wfile.write(b'{}')
+            return
+        body = json.dumps({
+            'path': self.path,
+            'token': self.headers.get('Authorization'),
+            **json.loads(PAYLOAD),
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body)
+            self.send_header('Content-Encoding', 'gzip')
+        if self.path.startswith('/chunked'):
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for start in range(0, len(body), 7):
+                chunk = body[start:start + 7]
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+            self.wfile.write(b'0\r\n\r\n')
+            return
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(params=sorted(http_transport.TRANSPORTS))
+def transport(request):
+    transport = http_transport.build(request.param, pool_size=2)
+    yield transport
+    transport.close()
+
+
+class TestTransports:
+    @pytest.mark.parametrize('path', ['/api/', '/chunked/'])
+    def test_get_decodes_response(self, server, transport, path):
+        headers = {'Authorization': 'OAuth token',
+                   'Accept-Encoding': 'gzip'}
+        for _ in range(3):
+            response = transport.get(
+                server + path, headers, {'from_date': 5}, timeout=1)
+            assert response.status_code == 200
+            data = response.json()
+            assert data['path'] == f'{path}?from_date=5'
+            assert data['token'] == 'OAuth token'
+            assert response.headers['Content-Encoding'] == 'gzip'
+            if path == '/api/':
+                assert 0 < response.raw.tell() < len(response.content) + 40
+
+    def test_bodiless_response_keeps_connection(self, server, transport):
+        for _ in range(2):
+            response = transport.get(server + '/empty', {}, {}, timeout=1)
+            assert response.status_code == 204
+            assert response.content == b''
+
+    def test_asyncio_rejects_unframed_keep_alive(self, server):
+        transport = http_transport.build('asyncio')
+        try:
+            with pytest.raises(ConnectionError):
+                transport.get(server + '/unframed', {}, {}, timeout=1)
+        finally:
+            transport.close()
+
+    def test_unknown_transport(self):
+        with pytest.raises(ValueError):
+            http_transport.build('curl')
+
+
+class TestBotTransport:
+    def test_request_api_with_urllib3(self, server, monkeypatch,
+                                      homework_module):
+        monkeypatch.setattr(homework_module, 'api_transports', {})
+        monkeypatch.setattr(homework_module, 'ENDPOINT', server + '/')
+        monkeypatch.setattr(homework_module, 'metrics', metrics.Metrics())
+        response = homework_module._request_api(0, {}, 'ivanov', 'urllib3')
+        assert list(homework_module.api_transports) == ['urllib3']
+        assert response['current_date'] == 1000
+        labels = {'tenant': 'ivanov', 'from_date': 'full'}
+        assert homework_module.metrics.counter(
+            'api_compressed_responses', **labels) == 1
+        assert homework_module.metrics.counter(
+            'api_request_bytes', **labels) > 0
+
+    def test_settings_reject_unknown_transport(self, monkeypatch,
+                                               homework_module):
+        monkeypatch.setattr(homework_module, 'HTTP_TRANSPORT', 'curl')
+        with pytest.raises(exceptions.InvalidSetting):
+            homework_module.check_settings()
+        monkeypatch.setattr(homework_module, 'HTTP_TRANSPORT', 'urllib3')
+        homework_module.check_settings()
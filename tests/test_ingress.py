@@ -0,0 +1,163 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+import engine
+import exceptions
+import metrics
+from ingress import IngressServer, is_loopback
+
+HOMEWORK = {'id': 7, 'homework_name': 'hw1', 'status': 'approved',
+            'date_updated': '2024-05-01T10:00:00Z'}
+
+
+@pytest.fixture
+def setup(homework_module):
+    sent = []
+    fence = {'held': True}
+    poller = engine.Engine(
+        fetch=lambda tenant, timestamp: {
+            'homeworks': [HOMEWORK], 'current_date': 1},
+        validate=homework_module.check_response,
+        parse=homework_module.parse_status,
+        notify=lambda tenant, message: sent.append(message),
+        period=600,
+        fence=lambda: fence['held'],
+    )
+    tenant = engine.Tenant('student', 'token', [1])
+    registry = metrics.Metrics()
+    server = IngressServer(
+        poller, {'student': tenant}.get, port=0, token='secret',
+        metrics=registry)
+    server.start()
+    yield poller, tenant, server, sent, fence, registry
+    server.stop()
+
+
+def post(server, body, token='secret', path='/events'):
+    data = body if isinstance(body, bytes) else json.dumps(body).encode()
+    request = urllib.request.Request(
+        f'http://127.0.0.1:{server.port}{path}', data=data,
+        headers={'Authorization': f'Bearer {token}'})
+    try:
+        with urllib.request.urlopen(request, timeout=1) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as error:
+        return error.code, json.loads(error.read())
+
+
+class TestIngress:
+    def test_event_is_delivered_once_and_reconciled_by_poll(self, setup):
+        poller, tenant, server, sent, _, registry = setup
+        event = {'tenant': 'student', 'homeworks': [HOMEWORK]}
+
+        assert post(server, event) == (
+            200, {'delivered': 1, 'duplicate': 0, 'rejected': []})
+        assert post(server, event)[1]['duplicate'] == 1
+        assert poller.poll(tenant)
+
+        assert len(sent) == 1
+        assert 'hw1' in sent[0]
+        assert tenant.state['timestamp'] == 1
+        assert registry.counter('ingress_events', result='delivered') == 1
+        assert registry.counter('ingress_events', result='duplicate') == 1
+
+    def test_items_are_sent_oldest_first(self, setup):
+        _, _, server, sent, _, _ = setup
+        older = {**HOMEWORK, 'status': 'reviewing',
+                 'date_updated': '2024-04-30T10:00:00Z'}
+        post(server, {'tenant': 'student', 'homeworks': [HOMEWORK, older]})
+        assert ['взята на проверку' in message for message in sent] == [
+            True, False]
+
+    def test_invalid_record_is_rejected(self, setup):
+        _, _, server, sent, _, _ = setup
+        status, result = post(server, {
+            'tenant': 'student', 'homeworks': [{'status': 'approved'}]})
+        assert status == 200
+        assert result['delivered'] == 0
+        assert len(result['rejected']) == 1
+
+    @pytest.mark.parametrize('body, token, path, expected', [
+        ({'tenant': 'student', 'homeworks': []}, 'wrong', '/events', 401),
+        ({'tenant': 'student', 'homeworks': []}, 'secret', '/other', 404),
+        ({'tenant': 'nobody', 'homeworks': []}, 'secret', '/events', 404),
+        (b'{not json', 'secret', '/events', 400),
+        ({'tenant': 'student', 'homeworks': {}}, 'secret', '/events', 400),
+    ])
+    def test_bad_requests(self, setup, body, token, path, expected):
+        _, _, server, sent, _, _ = setup
+        assert post(server, body, token, path)[0] == expected
+        assert sent == []
+
+    def test_standby_does_not_deliver(self, setup):
+        _, _, server, sent, fence, _ = setup
+        fence['held'] = False
+        event = {'tenant': 'student', 'homeworks': [HOMEWORK]}
+        assert post(server, event)[0] == 503
+        assert sent == []
+
+
+class TestDeliverClaim:
+    def test_transition_in_flight_is_not_sent_twice(self, homework_module):
+        sent = []
+        tenant = engine.Tenant('student', 'token', [1])
+
+        def notify(tenant, message):
+            sent.append(message)
+            assert not poller.ingest(tenant, HOMEWORK)
+
+        poller = engine.Engine(
+            fetch=None, validate=None, parse=homework_module.parse_status,
+            notify=notify, period=600)
+        assert poller.ingest(tenant, HOMEWORK)
+        assert len(sent) == 1
+
+
+class TestIngressSafety:
+    @pytest.mark.parametrize('host, expected', [
+        ('127.0.0.1', True), ('::1', True), ('localhost', True),
+        ('0.0.0.0', False), ('10.0.0.5', False), ('bot.example', False),
+    ])
+    def test_is_loopback(self, host, expected):
+        assert is_loopback(host) is expected
+
+    def test_public_ingress_requires_token(self):
+        with pytest.raises(ValueError):
+            IngressServer(None, None, host='0.0.0.0', port=0)
+
+    def test_settings_reject_public_ingress_without_token(
+            self, monkeypatch, homework_module):
+        monkeypatch.setattr(homework_module, 'INGRESS_PORT', 8081)
+        monkeypatch.setattr(homework_module, 'INGRESS_HOST', '0.0.0.0')
+        monkeypatch.setattr(homework_module, 'INGRESS_TOKEN', None)
+        with pytest.raises(exceptions.InvalidSetting):
+            homework_module.check_settings()
+        monkeypatch.setattr(homework_module, 'INGRESS_TOKEN', 'secret')
+        homework_module.check_settings()
+
+    def test_events_wait_for_state_lock(self, homework_module):
+        sent = []
+        lock = threading.Lock()
+        poller = engine.Engine(
+            fetch=None, validate=None, parse=homework_module.parse_status,
+            notify=lambda tenant, message: sent.append(message), period=600)
+        tenant = engine.Tenant('student', 'token', [1])
+        server = IngressServer(
+            poller, {'student': tenant}.get, port=0, token='secret',
+            lock=lock)
+        server.start()
+        try:
+            event = {'tenant': 'student', 'homeworks': [HOMEWORK]}
+            with lock:
+                sender = threading.Thread(target=post, args=(server, event))
+                sender.start()
+                sender.join(0.2)
+                assert sent == []
+            sender.join(1)
+            assert len(sent) == 1
+        finally:
+            server.stop()
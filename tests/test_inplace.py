@@ -0,0 +1,81 @@
+from types import SimpleNamespace
+
+import telegram
+
+import clock
+import engine
+import fanout
+import inplace
+
+
+class RecordingBot:
+    def __init__(self):
+        self.calls = []
+        self.next_id = 100
+        self.broken = set()
+        self.texts = {}
+
+    def send_message(self, chat_id, text):
+        self.next_id += 1
+        self.calls.append(('send', chat_id, self.next_id))
+        return SimpleNamespace(message_id=self.next_id)
+
+    def edit_message_text(self, text, chat_id=None, message_id=None):
+        if message_id in self.broken:
+            raise telegram.error.BadRequest('Message to edit not found')
+        if self.texts.get(message_id) == text:
+            raise telegram.error.BadRequest(
+                'Message is not modified: specified new message content '
+                'and reply markup are exactly the same')
+        self.texts[message_id] = text
+        self.calls.append(('edit', chat_id, message_id))
+
+
+def publish_statuses(publisher, tenant, statuses):
+    for status in statuses:
+        publisher(tenant, {'id': 7, 'status': status}, status)
+
+
+class TestInPlacePublisher:
+    def setup_method(self):
+        self.bot = RecordingBot()
+        self.sender = fanout.FanOut(clock=clock.VirtualClock())
+        self.publisher = inplace.InPlacePublisher(self.bot, self.sender)
+        self.tenant = engine.Tenant('ivanov', 'token', ['1', '2'])
+
+    def teardown_method(self):
+        self.sender.shutdown()
+
+    def test_intermediate_statuses_edit_the_message(self):
+        publish_statuses(self.publisher, self.tenant,
+                         ['reviewing', 'rejected', 'reviewing', 'approved'])
+        kinds = [call[0] for call in self.bot.calls]
+        assert kinds.count('send') == 4
+        assert kinds.count('edit') == 4
+        assert kinds[-2:] == ['send', 'send']
+        assert self.tenant.state['messages'] == {}
+
+    def test_failed_edit_falls_back_to_new_message(self):
+        publish_statuses(self.publisher, self.tenant, ['reviewing'])
+        first_ids = dict(self.tenant.state['messages']['7'])
+        self.bot.broken.add(first_ids['1'])
+        publish_statuses(self.publisher, self.tenant, ['rejected'])
+        ids = self.tenant.state['messages']['7']
+        assert ids['1'] != first_ids['1']
+        assert ids['2'] == first_ids['2']
+
+    def test_unchanged_text_is_not_resent(self):
+        publish_statuses(self.publisher, self.tenant, ['reviewing'])
+        publish_statuses(self.publisher, self.tenant, ['rejected'])
+        ids = dict(self.tenant.state['messages']['7'])
+        calls = len(self.bot.calls)
+        publish_statuses(self.publisher, self.tenant, ['rejected'])
+        assert len(self.bot.calls) == calls
+        assert self.tenant.state['messages']['7'] == ids
+
+    def test_oldest_homeworks_are_evicted(self):
+        self.publisher.max_tracked = 2
+        for homework_id in (1, 2, 1, 3):
+            self.publisher(
+                self.tenant, {'id': homework_id, 'status': 'reviewing'}, 'x')
+        assert list(self.tenant.state['messages']) == ['1', '3']
@@ -0,0 +1,71 @@
+import pytest
+
+import clock
+import engine
+import exceptions
+import lease
+
+
+class TestLease:
+    def make_pair(self, tmp_path):
+        virtual = clock.VirtualClock(start=1000)
+        path = tmp_path / 'lease.sqlite'
+        active = lease.Lease(path, ttl=10, holder='a', clock=virtual)
+        standby = lease.Lease(path, ttl=10, holder='b', clock=virtual)
+        return virtual, active, standby
+
+    def test_only_one_holder(self, tmp_path):
+        virtual, active, standby = self.make_pair(tmp_path)
+        assert active.acquire()
+        assert not standby.acquire()
+        virtual.advance(5)
+        assert active.acquire()
+        virtual.advance(9)
+        assert not standby.acquire()
+        assert active.held()
+
+    def test_standby_takes_over_after_missed_renewal(self, tmp_path):
+        virtual, active, standby = self.make_pair(tmp_path)
+        assert active.acquire()
+        virtual.advance(10)
+        assert not active.held()
+        assert standby.acquire()
+        assert not active.acquire()
+
+    def test_release_hands_over_immediately(self, tmp_path):
+        virtual, active, standby = self.make_pair(tmp_path)
+        assert active.acquire()
+        active.release()
+        assert not active.held()
+        assert standby.acquire()
+
+    def test_lease_lost_during_fetch_blocks_delivery(self, tmp_path,
+                                                     homework_module):
+        virtual, active, standby = self.make_pair(tmp_path)
+        assert active.acquire()
+        sent = []
+
+        def fetch(tenant, timestamp):
+            virtual.advance(11)
+            assert standby.acquire()
+            return {'homeworks': [{'homework_name': 'hw',
+                                   'status': 'approved'}],
+                    'current_date': 1}
+
+        poller = engine.Engine(
+            fetch=fetch,
+            validate=homework_module.check_response,
+            parse=homework_module.parse_status,
+            notify=lambda tenant, message: sent.append(message),
+            period=600, clock=virtual, fence=active.held)
+        assert poller.poll(engine.Tenant('student', 'token', [1]))
+        assert sent == []
+
+    def test_lease_ttl_must_outlive_request(self, monkeypatch,
+                                            homework_module):
+        monkeypatch.setattr(homework_module, 'LEASE_FILE', 'lease.sqlite')
+        monkeypatch.setattr(homework_module, 'LEASE_TTL', 10)
+        with pytest.raises(exceptions.InvalidSetting):
+            homework_module.check_settings()
+        monkeypatch.setattr(homework_module, 'LEASE_TTL', 30)
+        homework_module.check_settings()
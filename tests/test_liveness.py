@@ -0,0 +1,71 @@
+import json
+import urllib.error
+import urllib.request
+
+import clock
+import liveness
+from metrics import Metrics
+
+
+class RecordingLog:
+    def __init__(self):
+        self.errors = []
+
+    def error(self, message):
+        self.errors.append(message)
+
+
+class TestWatchdog:
+    def make_watchdog(self):
+        virtual = clock.VirtualClock()
+        log = RecordingLog()
+        watchdog = liveness.Watchdog(
+            threshold=30, clock=virtual, metrics=Metrics(), log=log)
+        return virtual, watchdog, log
+
+    def test_beat_extends_deadline(self):
+        virtual, watchdog, log = self.make_watchdog()
+        watchdog.beat(600)
+        virtual.advance(620)
+        assert not watchdog.check()
+        assert log.errors == []
+
+    def test_stall_dumps_stacks_once(self):
+        virtual, watchdog, log = self.make_watchdog()
+        watchdog.beat(600)
+        virtual.advance(631)
+        assert watchdog.check()
+        assert watchdog.check()
+        assert len(log.errors) == 1
+        assert 'MainThread' in log.errors[0]
+        assert watchdog.metrics.counter('loop_stalls') == 1
+        watchdog.beat(600)
+        assert not watchdog.stalled()
+
+
+class TestHealthServer:
+    def request(self, server, path):
+        url = f'http://127.0.0.1:{server.port}{path}'
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                return response.status, json.load(response)
+        except urllib.error.HTTPError as error:
+            return error.code, json.load(error)
+
+    def test_live_and_ready(self):
+        virtual = clock.VirtualClock()
+        watchdog = liveness.Watchdog(
+            threshold=30, clock=virtual, metrics=Metrics())
+        server = liveness.HealthServer(watchdog, port=0)
+        server.start()
+        try:
+            assert self.request(server, '/live')[0] == 200
+            assert self.request(server, '/ready')[0] == 503
+            watchdog.beat(10)
+            assert self.request(server, '/ready')[0] == 200
+            virtual.advance(41)
+            status, body = self.request(server, '/live')
+            assert status == 503
+            assert body['alive'] is False
+        finally:
+            server.stop()
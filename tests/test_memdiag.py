@@ -0,0 +1,46 @@
+import tracemalloc
+
+import memdiag
+from metrics import Metrics
+
+leak = []
+
+
+def grow():
+    leak.extend(bytearray(1024) for _ in range(500))
+
+
+class TestMemoryDiagnostics:
+    def make_diagnostics(self, tmp_path):
+        diagnostics = memdiag.MemoryDiagnostics(
+            period=3600, dump_path=str(tmp_path / 'memory.dump'),
+            metrics=Metrics())
+        diagnostics.start()
+        return diagnostics
+
+    def test_reports_growth_site(self, tmp_path):
+        diagnostics = self.make_diagnostics(tmp_path)
+        try:
+            grow()
+            growth = diagnostics.collect()
+        finally:
+            diagnostics.stop()
+            leak.clear()
+        assert growth
+        top = growth[0].traceback[0]
+        assert top.filename == __file__
+        assert growth[0].size_diff >= 500 * 1024
+        assert diagnostics.metrics.gauge('memory_traced_bytes') > 0
+
+    def test_requested_dump_is_loadable(self, tmp_path):
+        diagnostics = self.make_diagnostics(tmp_path)
+        try:
+            diagnostics.request_dump()
+            for _ in range(100):
+                if (tmp_path / 'memory.dump').exists():
+                    break
+                diagnostics._stopped.wait(0.01)
+        finally:
+            diagnostics.stop()
+        snapshot = tracemalloc.Snapshot.load(diagnostics.dump_path)
+        assert snapshot.traces
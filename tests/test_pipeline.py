@@ -0,0 +1,108 @@
+import threading
+import time
+
+import clock
+import engine
+import metrics
+import pipeline
+import scheduler
+
+
+def make_engine(homework_module, fetched, notified, release):
+    def fetch(tenant, timestamp):
+        fetched.append(tenant.name)
+        return {
+            'homeworks': [{'homework_name': tenant.name,
+                           'status': 'approved'}],
+            'current_date': 1,
+        }
+
+    def notify(tenant, message):
+        release.wait(1)
+        notified.append(tenant.name)
+
+    poller = engine.Engine(
+        fetch=fetch,
+        validate=homework_module.check_response,
+        parse=homework_module.parse_status,
+        notify=notify,
+        period=600,
+        clock=clock.VirtualClock(),
+    )
+    for number in range(30):
+        poller.add_tenant(engine.Tenant(f'hw{number}', 'token', [number]))
+    return poller
+
+
+class TestPipeline:
+    def test_slow_notify_throttles_fetch(self, homework_module):
+        fetched, notified = [], []
+        release = threading.Event()
+        poller = make_engine(homework_module, fetched, notified, release)
+        registry = metrics.Metrics()
+        stages = pipeline.Pipeline(
+            poller, fetch_workers=2, validate_workers=1, notify_workers=1,
+            capacity=2, metrics=registry)
+        stages.start()
+        submitter = threading.Thread(
+            target=stages.run, kwargs={'duration': 0}, daemon=True)
+        submitter.start()
+        time.sleep(0.2)
+        assert len(fetched) < 10
+        assert submitter.is_alive()
+        assert registry.gauge('pipeline_queue_depth', stage='notify') == 2
+
+        release.set()
+        submitter.join(1)
+        stages.drain()
+        stages.stop()
+        assert sorted(notified) == sorted(poller.tenants)
+        assert registry.counter('pipeline_processed', stage='notify') == 30
+
+    def test_errors_are_reported(self, homework_module):
+        fetched, notified = [], []
+        release = threading.Event()
+        release.set()
+        poller = make_engine(homework_module, fetched, notified, release)
+        poller.fetch = lambda tenant, timestamp: {'current_date': 1}
+        stages = pipeline.Pipeline(poller, metrics=metrics.Metrics())
+        stages.start()
+        stages.run(duration=0)
+        stages.drain()
+        stages.stop()
+        assert len(notified) == 30
+        assert all(name.startswith('hw') for name in notified)
+
+    def test_fetch_failures_back_off_polls(self, homework_module):
+        fetched, notified = [], []
+        release = threading.Event()
+        release.set()
+        poller = make_engine(homework_module, fetched, notified, release)
+
+        def fail(tenant, timestamp):
+            fetched.append(tenant.name)
+            raise ConnectionError('down')
+
+        poller.fetch = fail
+        poller.scheduler.backoff = scheduler.Backoff(base=60)
+        stages = pipeline.Pipeline(poller, metrics=metrics.Metrics())
+        stages.start()
+        stages.run(duration=0)
+        stages.drain()
+        stages.run(duration=0)
+        stages.stop()
+        assert poller.scheduler.next_due() == 60
+        assert len(fetched) == 30
+
+    def test_stop_gives_up_on_full_queue(self):
+        release = threading.Event()
+        stage = pipeline.Stage(
+            'slow', lambda item: release.wait(1), workers=1, capacity=1)
+        stage.start()
+        stage.put('busy')
+        time.sleep(0.05)
+        stage.put('queued')
+        started = time.monotonic()
+        stage.stop(timeout=0.1)
+        assert time.monotonic() - started < 0.5
+        release.set()
@@ -0,0 +1,127 @@
+import pytest
+
+import clock
+import engine
+import exceptions
+import registry
+import state
+
+
+@pytest.fixture
+def tenants(tmp_path):
+    tenants = registry.TenantRegistry(str(tmp_path / 'tenants.sqlite'))
+    yield tenants
+    tenants.close()
+
+
+class TestTenantRegistry:
+    def test_lookup_by_chat_token_and_name(self, tenants):
+        registration = tenants.register(42, 'token-a')
+        assert registration.name == 'tg42'
+        assert tenants.by_chat(42) == registration
+        assert tenants.by_token('token-a') == registration
+        assert tenants.get('tg42') == registration
+        assert tenants.by_token('token-b') is None
+        assert len(tenants) == 1
+
+    def test_chat_changes_its_token(self, tenants):
+        tenants.register(42, 'token-a')
+        tenants.register(42, 'token-b')
+        assert tenants.by_chat(42).token == 'token-b'
+        assert tenants.by_token('token-a') is None
+        assert tenants.names() == ['tg42']
+
+    def test_token_of_another_chat_is_rejected(self, tenants):
+        tenants.register(42, 'token-a')
+        with pytest.raises(exceptions.TokenAlreadyRegistered):
+            tenants.register(43, 'token-a')
+
+    def test_lookups_use_indexes(self, tenants):
+        for column in ('chat_id', 'token_hash'):
+            plan = tenants._connection.execute(
+                'EXPLAIN QUERY PLAN SELECT name FROM tenants '
+                f'WHERE {column} = ?', ('x',)).fetchall()
+            assert 'USING INDEX' in plan[0][-1]
+
+
+class TestRegisterCommand:
+    def test_valid_token_is_registered(self, tenants):
+        registered = []
+        command = registry.RegisterCommand(
+            tenants, check=lambda token: None,
+            on_registered=registered.append)
+        assert command.handle(42, ['token-a']).startswith('Готово')
+        assert registered == ['tg42']
+        assert tenants.by_chat(42).token == 'token-a'
+
+    def test_rejected_token_is_not_stored(self, tenants):
+        def check(token):
+            raise exceptions.EndpointBadResponse(401, 'endpoint')
+
+        command = registry.RegisterCommand(tenants, check)
+        assert 'не принят' in command.handle(42, ['bad'])
+        assert command.handle(42, []).startswith('Использование')
+        assert len(tenants) == 0
+
+
+class TestLazyTenants:
+    def test_tenants_are_loaded_on_first_poll(self, tenants):
+        for chat_id in range(3):
+            tenants.register(chat_id, f'token-{chat_id}')
+        loaded, fetched = [], []
+
+        def loader(name):
+            loaded.append(name)
+            if (registration := tenants.get(name)) is None:
+                return None
+            return engine.Tenant(name, registration.token,
+                                 [registration.chat_id])
+
+        poller = engine.Engine(
+            fetch=lambda tenant, timestamp: fetched.append(tenant.token) or {
+                'homeworks': [], 'current_date': 1},
+            validate=lambda response: response['homeworks'],
+            parse=None, notify=None, period=600,
+            clock=clock.VirtualClock(), loader=loader)
+        for number, name in enumerate([*tenants.names(), 'tg99']):
+            poller.schedule(name, delay=number)
+        assert loaded == []
+        poller.run(duration=2)
+        assert loaded == ['tg0', 'tg1', 'tg2']
+        assert fetched == ['token-0', 'token-1', 'token-2']
+        poller.run(duration=601)
+        assert loaded == ['tg0', 'tg1', 'tg2', 'tg99']
+        assert 'tg99' not in poller.scheduler
+        assert len(fetched) == 6
+
+    def test_first_polls_are_spread_over_period(self):
+        delays = [engine.spread_delay(f'tg{number}', 600)
+                  for number in range(100)]
+        assert all(0 <= delay < 600 for delay in delays)
+        assert len(set(delays)) > 50
+        assert engine.spread_delay('tg1', 600) == delays[1]
+
+    def test_idle_and_excess_tenants_are_evicted(self):
+        loaded, states = [], {}
+        virtual = clock.VirtualClock()
+
+        def loader(name):
+            loaded.append(name)
+            return engine.Tenant(
+                name, 'token', [1], states.setdefault(name, state.initial()))
+
+        poller = engine.Engine(
+            fetch=lambda tenant, timestamp: {
+                'homeworks': [], 'current_date': 1},
+            validate=lambda response: response['homeworks'],
+            parse=None, notify=None, period=600, clock=virtual,
+            loader=loader, max_loaded=2)
+        for number in range(3):
+            poller.schedule(f'tg{number}', delay=number)
+        poller.run(duration=3)
+        assert list(poller._loaded) == ['tg1', 'tg2']
+
+        virtual.advance(engine.IDLE_AFTER)
+        poller.run(duration=1)
+        assert list(poller._loaded) == []
+        assert loaded == ['tg0', 'tg1', 'tg2', 'tg0']
@@ -0,0 +1,166 @@
+import clock
+import engine
+import scheduler
+from metrics import Metrics
+
+DAY = 24 * 60 * 60
+
+
+class TestVirtualClock:
+    def test_sleep_advances_time(self):
+        virtual = clock.VirtualClock(start=100)
+        virtual.sleep(50)
+        assert virtual.time() == virtual.monotonic() == 150
+
+
+class TestBackoff:
+    def test_delay_grows_and_is_capped(self):
+        backoff = scheduler.Backoff(base=10, factor=2, maximum=60)
+        assert [backoff.delay(n) for n in range(1, 6)] == [10, 20, 40, 60, 60]
+
+
+class TestScheduler:
+    def test_polls_follow_period(self):
+        virtual = clock.VirtualClock()
+        plan = scheduler.Scheduler(virtual, period=600)
+        polled = []
+        plan.add('a')
+        plan.add('b', delay=300)
+        plan.run(lambda key: polled.append((key, virtual.time())) or True,
+                 duration=1200)
+        assert polled == [('a', 0), ('b', 300), ('a', 600), ('b', 900),
+                          ('a', 1200)]
+        assert virtual.time() == 1200
+
+    def test_backoff_after_failures(self):
+        virtual = clock.VirtualClock()
+        plan = scheduler.Scheduler(
+            virtual, period=600, backoff=scheduler.Backoff(base=60))
+        times = []
+        plan.add('a')
+        plan.run(lambda key: times.append(virtual.time()) or len(times) > 3,
+                 duration=2000)
+        assert times == [0, 60, 180, 420, 1020, 1620]
+
+    def test_removed_key_is_not_rescheduled(self):
+        virtual = clock.VirtualClock()
+        plan = scheduler.Scheduler(virtual, period=600)
+        plan.add('a')
+        plan.run(lambda key: plan.remove(key) or True)
+        assert len(plan) == 0
+
+    def test_async_failure_report_applies_backoff(self):
+        virtual = clock.VirtualClock()
+        plan = scheduler.Scheduler(
+            virtual, period=600, backoff=scheduler.Backoff(base=60))
+        times = []
+
+        def poll(key):
+            times.append(virtual.time())
+            plan.report(key, len(times) > 2)
+
+        plan.add('a')
+        plan.run(poll, duration=1000)
+        assert times == [0, 60, 180, 780]
+
+
+class TestLoadShedding:
+    def make_plan(self, virtual, priorities):
+        return scheduler.Scheduler(
+            virtual, period=600, priority=priorities.get, overload_lag=60,
+            max_deferrals=2, metrics=Metrics())
+
+    def test_no_shedding_without_lag(self):
+        virtual = clock.VirtualClock()
+        plan = self.make_plan(virtual, {'a': scheduler.PRIORITY_IDLE})
+        polled = []
+        plan.add('a')
+        plan.run_pending(lambda key: polled.append(key) or True)
+        assert polled == ['a']
+        assert plan.shed_total == 0
+
+    def test_active_first_and_idle_deferred(self):
+        virtual = clock.VirtualClock()
+        priorities = {
+            'idle': scheduler.PRIORITY_IDLE,
+            'normal': scheduler.PRIORITY_NORMAL,
+            'active': scheduler.PRIORITY_ACTIVE,
+        }
+        plan = self.make_plan(virtual, priorities)
+        for key in priorities:
+            plan.add(key)
+        virtual.sleep(120)
+        polled = []
+        plan.run_pending(lambda key: polled.append(key) or True)
+        assert polled == ['active', 'normal']
+        assert plan.shed_total == 1
+        assert plan.metrics.counter('polls_shed') == 1
+        assert plan.next_due() == 720
+
+    def test_idle_is_not_starved(self):
+        virtual = clock.VirtualClock()
+        plan = self.make_plan(virtual, {'idle': scheduler.PRIORITY_IDLE})
+        polled = []
+        plan.add('idle')
+        for _ in range(3):
+            virtual.sleep(700)
+            plan.run_pending(lambda key: polled.append(key) or True)
+        assert polled == ['idle']
+        assert plan.shed_total == 2
+
+    def test_engine_priority_from_last_status(self):
+        virtual = clock.VirtualClock(start=engine.IDLE_AFTER * 2)
+        poller = engine.Engine(
+            fetch=None, validate=lambda response: response['homeworks'],
+            parse=lambda homework: 'msg',
+            notify=lambda tenant, message: None, period=600, clock=virtual,
+            overload_lag=60)
+        tenant = engine.Tenant('a', 'token', [1])
+        poller.add_tenant(tenant)
+        assert poller.priority('a') == scheduler.PRIORITY_NORMAL
+        virtual.advance(engine.IDLE_AFTER + 1)
+        assert poller.priority('a') == scheduler.PRIORITY_IDLE
+        poller.check(tenant, {'homeworks': [{'status': 'reviewing'}],
+                              'current_date': 1})
+        assert poller.priority('a') == scheduler.PRIORITY_ACTIVE
+        tenant.state['last_status'] = 'approved'
+        tenant.state['last_change'] = virtual.time()
+        assert poller.priority('a') == scheduler.PRIORITY_NORMAL
+
+    def test_new_loaded_tenant_is_not_idle(self):
+        virtual = clock.VirtualClock(start=engine.IDLE_AFTER * 2)
+        poller = engine.Engine(
+            fetch=None, validate=None, parse=None, notify=None, period=600,
+            clock=virtual, overload_lag=60,
+            loader=lambda name: engine.Tenant(name, 'token', [1]))
+        poller.schedule('tg1')
+        assert poller.priority('tg1') == scheduler.PRIORITY_NORMAL
+        assert poller.tenant('tg1').state['first_seen'] == virtual.time()
+
+
+class TestSimulation:
+    def test_week_of_polling_many_tenants(self, homework_module):
+        virtual = clock.VirtualClock()
+        notified = []
+
+        def fetch(tenant, timestamp):
+            status = 'reviewing' if timestamp < 3 * DAY else 'approved'
+            return {
+                'homeworks': [{'homework_name': tenant.name,
+                               'status': status}],
+                'current_date': int(virtual.time()) or 1,
+            }
+
+        poller = engine.Engine(
+            fetch=fetch,
+            validate=homework_module.check_response,
+            parse=homework_module.parse_status,
+            notify=lambda tenant, message: notified.append(tenant.name),
+            period=homework_module.RETRY_PERIOD,
+            clock=virtual,
+        )
+        for number in range(20):
+            poller.add_tenant(engine.Tenant(f'hw{number}', 'token', [number]))
+        poller.run(duration=7 * DAY)
+        assert virtual.time() == 7 * DAY
+        assert len(notified) == 20 * 2
@@ -0,0 +1,162 @@
+import os
+import signal
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import exceptions
+import metrics
+import pipeline
+import scheduler
+from shutdown import GracefulShutdown, ShutdownClock
+from tests.test_pipeline import make_engine
+
+
+class TestGracefulShutdown:
+    def test_sigterm_interrupts_idle(self):
+        shutdown = GracefulShutdown()
+        shutdown.install()
+        try:
+            with pytest.raises(exceptions.ShutdownRequested):
+                with shutdown.idle():
+                    os.kill(os.getpid(), signal.SIGTERM)
+                    time.sleep(1)
+        finally:
+            shutdown.restore()
+        assert shutdown.requested.is_set()
+        assert signal.getsignal(signal.SIGTERM) is not shutdown._handle
+
+    def test_sigterm_outside_idle_only_marks_request(self):
+        shutdown = GracefulShutdown()
+        shutdown.install()
+        try:
+            os.kill(os.getpid(), signal.SIGTERM)
+            assert shutdown.requested.is_set()
+            with pytest.raises(exceptions.ShutdownRequested):
+                with shutdown.idle():
+                    pass
+        finally:
+            shutdown.restore()
+
+    def test_clock_sleep_raises_on_request(self):
+        shutdown = GracefulShutdown()
+        threading.Timer(0.05, shutdown.request).start()
+        started = time.monotonic()
+        with pytest.raises(exceptions.ShutdownRequested):
+            ShutdownClock(shutdown).sleep(5)
+        assert time.monotonic() - started < 1
+
+    def test_backlog_stops_between_due_polls(self):
+        shutdown = GracefulShutdown()
+        plan = scheduler.Scheduler(ShutdownClock(shutdown), period=600)
+        for key in ('a', 'b', 'c'):
+            plan.add(key)
+        polled = []
+
+        def poll(key):
+            polled.append(key)
+            shutdown.request()
+            return True
+
+        with pytest.raises(exceptions.ShutdownRequested):
+            plan.run(poll)
+        assert polled == ['a']
+        assert plan.next_due() is not None
+        assert len(plan) == 3
+
+
+class TestPipelineHandOver:
+    def test_close_rolls_back_unfinished_cursors(self, homework_module):
+        fetched, notified = [], []
+        release = threading.Event()
+        poller = make_engine(homework_module, fetched, notified, release)
+        stages = pipeline.Pipeline(
+            poller, fetch_workers=1, validate_workers=1, notify_workers=1,
+            capacity=1, metrics=metrics.Metrics())
+        stages.start()
+        for name in ('hw0', 'hw1'):
+            stages.submit(name)
+
+        assert not stages.drain(0.2)
+        result = []
+        closer = threading.Thread(
+            target=lambda: result.append(stages.close(timeout=1)))
+        closer.start()
+        time.sleep(0.05)
+        release.set()
+        closer.join(1)
+
+        rolled_back = result[0]
+        assert 'hw1' in rolled_back
+        for name in rolled_back:
+            assert poller.tenants[name].state['timestamp'] == 0
+            assert name not in notified
+
+    def test_drain_completes_started_notifications(self, homework_module):
+        fetched, notified = [], []
+        release = threading.Event()
+        release.set()
+        poller = make_engine(homework_module, fetched, notified, release)
+        stages = pipeline.Pipeline(
+            poller, fetch_workers=1, validate_workers=1, notify_workers=1,
+            capacity=2, metrics=metrics.Metrics())
+        stages.start()
+        stages.submit('hw0')
+
+        assert stages.drain(1)
+        assert stages.close(timeout=1) == []
+        assert notified == ['hw0']
+
+    def test_close_shares_deadline_and_keeps_sending_cursors(
+            self, homework_module):
+        fetched, notified = [], []
+        release = threading.Event()
+        poller = make_engine(homework_module, fetched, notified, release)
+        stages = pipeline.Pipeline(
+            poller, fetch_workers=4, validate_workers=4, notify_workers=4,
+            capacity=1, metrics=metrics.Metrics())
+        stages.start()
+        for number in range(4):
+            stages.submit(f'hw{number}')
+        time.sleep(0.2)
+
+        started = time.monotonic()
+        rolled_back = stages.close(timeout=0.3)
+        elapsed = time.monotonic() - started
+        release.set()
+
+        assert elapsed < 0.6
+        assert rolled_back == []
+        assert all(
+            poller.tenants[f'hw{number}'].state['timestamp'] == 1
+            for number in range(4))
+
+
+class TestTenantsHandOver:
+    def test_updates_stop_before_ingress(self, homework_module, monkeypatch,
+                                         tmp_path):
+        stopped = []
+        monkeypatch.setattr(homework_module, 'PIPELINE_ENABLED', False)
+        monkeypatch.setattr(
+            homework_module, 'TENANT_STATE_FILE', str(tmp_path / 's.json'))
+        monkeypatch.setattr(homework_module, 'fan_out', SimpleNamespace(
+            shutdown=lambda: stopped.append('fan_out')))
+        poller = make_engine(homework_module, [], [], threading.Event())
+        homework_module._hand_over(
+            poller, None, None, {}, str(tmp_path / 'notified.bin'),
+            SimpleNamespace(stop=lambda: stopped.append('ingress')),
+            SimpleNamespace(stop=lambda: stopped.append('updater')))
+        assert stopped == ['updater', 'ingress', 'fan_out']
+
+    def test_cycle_drain_has_deadline(self, homework_module, monkeypatch):
+        monkeypatch.setattr(homework_module, 'DRAIN_TIMEOUT', 0.2)
+        shutdown = GracefulShutdown()
+        stuck = SimpleNamespace(drain=lambda timeout: time.sleep(timeout))
+        started = time.monotonic()
+        assert not homework_module._drain_cycle(stuck, ShutdownClock(shutdown))
+        assert time.monotonic() - started < 1
+        shutdown.request()
+        with pytest.raises(exceptions.ShutdownRequested):
+            homework_module._drain_cycle(stuck, ShutdownClock(shutdown))
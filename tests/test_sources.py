@@ -0,0 +1,92 @@
+import pytest
+
+import clock
+import config
+import engine
+import exceptions
+import sources
+
+REVIEW_STATES = {
+    'APPROVED': 'Изменения одобрены',
+    'CHANGES_REQUESTED': 'Нужны исправления',
+}
+
+
+def register(registry):
+    registry.register(
+        'pull_requests',
+        fetch=lambda tenant, since: {
+            'reviews': [{'id': 7, 'state': 'APPROVED', 'status': 'approved',
+                         'submitted_at': since + 10}],
+            'next': since + 60,
+        },
+        validate=lambda response: response['reviews'],
+        parse=lambda review: REVIEW_STATES[review['state']],
+        cursor=lambda response, since: response['next'],
+    )
+
+
+def make_engine(registry, notified):
+    return engine.Engine(
+        fetch=lambda tenant, timestamp: {
+            'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+            'current_date': 5,
+        },
+        validate=lambda response: response['homeworks'],
+        parse=lambda homework: f'Практикум: {homework["status"]}',
+        notify=lambda tenant, message: notified.append(
+            (tenant.name, message)),
+        period=600,
+        clock=clock.VirtualClock(),
+        sources=registry,
+    )
+
+
+class TestSourceRegistry:
+    def test_plugin_registers_source(self):
+        registry = sources.SourceRegistry(transport='shared-pool')
+        registry.load_plugins([__name__])
+        assert 'pull_requests' in registry
+        assert registry.transport == 'shared-pool'
+        with pytest.raises(ValueError):
+            register(registry)
+
+    def test_tenants_of_different_sources_share_engine(self):
+        registry = sources.SourceRegistry()
+        register(registry)
+        notified = []
+        poller = make_engine(registry, notified)
+        practicum = engine.Tenant('student', 'token', [1])
+        reviews = engine.Tenant(
+            'pr', 'token', [2], source='pull_requests')
+        poller.add_tenant(practicum)
+        poller.add_tenant(reviews)
+        poller.run(duration=0)
+        assert sorted(notified) == [
+            ('pr', 'Изменения одобрены'), ('student', 'Практикум: approved')]
+        assert practicum.state['timestamp'] == 5
+        assert reviews.state['timestamp'] == 60
+
+
+class TestSourceConfig:
+    def test_unknown_source_is_rejected(self):
+        registry = sources.SourceRegistry()
+        raw = {'tenants': [{'name': 'a', 'practicum_token': 'token',
+                            'chat_ids': ['1'], 'source': 'gitlab'}]}
+        with pytest.raises(exceptions.InvalidConfig):
+            config.parse(raw, 'tenants.json', 600, registry)
+        register(registry)
+        raw['tenants'][0]['source'] = 'pull_requests'
+        parsed = config.parse(raw, 'tenants.json', 600, registry)
+        assert parsed.tenants['a'].source == 'pull_requests'
+
+    def test_token_is_required_only_for_practicum(self):
+        registry = sources.SourceRegistry()
+        register(registry)
+        raw = {'tenants': [{'name': 'a', 'chat_ids': ['1'],
+                            'source': 'pull_requests'}]}
+        parsed = config.parse(raw, 'tenants.json', 600, registry)
+        assert parsed.tenants['a'].token is None
+        del raw['tenants'][0]['source']
+        with pytest.raises(exceptions.InvalidConfig):
+            config.parse(raw, 'tenants.json', 600, registry)
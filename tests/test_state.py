@@ -0,0 +1,56 @@
+import pytest
+import requests
+import telegram
+
+import state
+import utils
+
+
+class TestState:
+    def test_missing_file_gives_initial_state(self, tmp_path):
+        assert state.load(tmp_path / 'state.json') == state.initial()
+
+    def test_save_and_load(self, tmp_path):
+        path = tmp_path / 'state.json'
+        saved = {**state.initial(), 'timestamp': 123}
+        state.save(path, saved)
+        assert state.load(path) == saved
+        assert [p.name for p in tmp_path.iterdir()] == ['state.json']
+
+
+class TestRunOnce:
+    def test_cursor_is_persisted(self, monkeypatch, tmp_path,
+                                 random_timestamp, homework_module,
+                                 data_with_new_hw_status):
+        path = tmp_path / 'state.json'
+        monkeypatch.setattr(homework_module, 'STATE_FILE', str(path))
+        monkeypatch.setattr(homework_module, 'NOTIFIED_FILE',
+                            str(tmp_path / 'notified.bin'))
+        sent = []
+
+        class Bot(utils.MockTelegramBot):
+            def send_message(self, chat_id=None, text=None, **kwargs):
+                sent.append(text)
+
+        requested = []
+
+        def mock_get(*args, params=None, **kwargs):
+            requested.append(params['from_date'])
+            return utils.MockResponseGET(data=data_with_new_hw_status)
+
+        monkeypatch.setattr(telegram, 'Bot', Bot)
+        monkeypatch.setattr(requests, 'get', mock_get)
+
+        assert homework_module.run_once() == 0
+        assert homework_module.run_once() == 0
+        assert requested == [0, random_timestamp]
+        assert len(sent) == 1
+        assert state.load(path)['timestamp'] == random_timestamp
+
+    def test_invalid_setting_exits_before_polling(self, monkeypatch,
+                                                  homework_module):
+        monkeypatch.setattr(homework_module, 'HTTP_TRANSPORT', 'curl')
+        monkeypatch.setattr(
+            requests, 'get',
+            lambda *args, **kwargs: pytest.fail('API запрошен'))
+        assert homework_module.run_once() == 1
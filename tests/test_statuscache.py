@@ -0,0 +1,83 @@
+import multiprocessing
+import os
+
+import pytest
+
+import clock
+import engine
+import statuscache
+from metrics import Metrics
+
+HOMEWORK = {'id': 123, 'homework_name': 'hw', 'status': 'approved',
+            'date_updated': '2022-01-01T10:00:00Z'}
+
+
+@pytest.fixture
+def cache():
+    cache = statuscache.StatusCache(
+        f'hwsc-test-{os.getpid()}', capacity=8, create=True,
+        metrics=Metrics())
+    yield cache
+    cache.close()
+    cache.unlink()
+
+
+def write_from_child(name, tenant, homework):
+    cache = statuscache.StatusCache.open(name)
+    cache.put_homework(tenant, homework)
+    cache.close()
+
+
+class TestStatusCache:
+    def test_put_and_get(self, cache):
+        assert cache.get('ivanov') is None
+        assert cache.put_homework('ivanov', HOMEWORK)
+        assert cache.get('ivanov') == (123, 'approved', 1641031200)
+        assert cache.matches('ivanov', HOMEWORK)
+        assert not cache.matches(
+            'ivanov', {**HOMEWORK, 'status': 'rejected'})
+        cache.put('ivanov', 123, 'rejected', 1641031300)
+        assert cache.get('ivanov').status == 'rejected'
+
+    def test_full_cache_refuses_new_tenants(self, cache):
+        for number in range(cache.capacity):
+            assert cache.put(f'tenant{number}', number, 'reviewing', 1)
+        assert not cache.put('extra', 1, 'reviewing', 1)
+        assert cache.metrics.counter('status_cache_full') == 1
+        assert cache.get('tenant7') == (7, 'reviewing', 1)
+
+    def test_other_process_sees_writes(self, cache):
+        context = multiprocessing.get_context('spawn')
+        child = context.Process(
+            target=write_from_child, args=(cache.name, 'petrov', HOMEWORK))
+        child.start()
+        child.join(10)
+        assert child.exitcode == 0
+        assert cache.matches('petrov', HOMEWORK)
+
+    def test_attach_reads_capacity_from_header(self, cache):
+        attached = statuscache.StatusCache.open(cache.name, capacity=1024)
+        try:
+            assert attached.capacity == cache.capacity == 8
+            cache.put_homework('ivanov', HOMEWORK)
+            assert attached.matches('ivanov', HOMEWORK)
+        finally:
+            attached.close()
+
+
+class TestEngineWithStatusCache:
+    def test_workers_do_not_repeat_notifications(self, cache):
+        notified = []
+
+        def make_engine():
+            return engine.Engine(
+                fetch=lambda tenant, timestamp: {
+                    'homeworks': [HOMEWORK], 'current_date': 1},
+                validate=lambda response: response['homeworks'],
+                parse=lambda homework: homework['status'],
+                notify=lambda tenant, message: notified.append(message),
+                period=600, clock=clock.VirtualClock(), status_cache=cache)
+
+        for worker in (make_engine(), make_engine()):
+            worker.poll(engine.Tenant('ivanov', 'token', [1]))
+        assert notified == ['approved']
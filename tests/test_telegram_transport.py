@@ -0,0 +1,29 @@
+import telegram
+
+import telegram_transport
+import utils
+
+
+class TestTelegramTransport:
+    def test_pool_size_and_timeouts(self):
+        request = telegram_transport.build_request(16, 3, 7)
+        assert request.con_pool_size == 16
+        assert request._connect_timeout == 3
+        request.stop()
+
+    def test_shared_request_is_reused(self):
+        try:
+            first = telegram_transport.shared_request(4, 5, 5)
+            assert telegram_transport.shared_request(8, 5, 5) is first
+        finally:
+            telegram_transport.close()
+
+    def test_attach_replaces_default_pool(self):
+        request = telegram_transport.build_request(8, 5, 5)
+        bot = telegram.Bot(token='1234:abcdefg')
+        assert telegram_transport.attach(bot, request).request is request
+        request.stop()
+
+    def test_attach_ignores_objects_without_transport(self):
+        bot = utils.MockTelegramBot()
+        assert telegram_transport.attach(bot, object()) is bot
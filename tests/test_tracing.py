@@ -0,0 +1,105 @@
+import logging
+from datetime import datetime, timezone
+
+import clock
+import engine
+import metrics
+import pipeline
+import tracing
+
+UPDATED_AT = datetime(2024, 5, 1, 10, 0, tzinfo=timezone.utc)
+
+
+def make_engine(homework_module, timer, registry, log=None, failed=()):
+    def fetch(tenant, timestamp):
+        timer.advance(2)
+        return {
+            'homeworks': [{'homework_name': 'hw1', 'status': 'approved',
+                           'date_updated': '2024-05-01T10:00:00Z'}],
+            'current_date': 1,
+        }
+
+    return engine.Engine(
+        fetch=fetch,
+        validate=homework_module.check_response,
+        parse=homework_module.parse_status,
+        notify=lambda tenant, message: timer.advance(3) or list(failed),
+        period=600,
+        clock=timer,
+        tracer=tracing.Tracer(registry, log),
+    )
+
+
+def quantile(registry, stage):
+    return registry.quantiles(
+        'notification_latency_seconds', stage=stage)[0.5]
+
+
+class TestTrace:
+    def test_stages_need_both_marks(self):
+        timer = clock.VirtualClock(100)
+        trace = tracing.Trace(timer)
+        trace.mark(tracing.FETCH_STARTED)
+        timer.advance(1)
+        trace.mark(tracing.FETCH_DONE)
+        assert trace.stages() == {'upstream': 1}
+
+    def test_clock_skew_is_clamped(self):
+        trace = tracing.Trace(clock.VirtualClock(0))
+        trace.mark_updated({'date_updated': '2024-05-01T10:00:00Z'})
+        trace.mark(tracing.FETCH_STARTED)
+        assert trace.stages() == {'detect': 0.0}
+
+    def test_parse_date(self):
+        assert clock.parse_date(
+            '2024-05-01T10:00:00Z') == UPDATED_AT.timestamp()
+        assert clock.parse_date(
+            '2024-05-01T10:00:00') == UPDATED_AT.timestamp()
+        assert clock.parse_date(
+            '2024-05-01T13:00:00+03:00') == UPDATED_AT.timestamp()
+        assert clock.parse_date('вчера') is None
+        assert clock.parse_date(None) is None
+        assert clock.parse_date(5) is None
+
+
+class TestNotificationTracing:
+    def test_poll_records_stage_latencies(self, homework_module, caplog):
+        timer = clock.VirtualClock(UPDATED_AT.timestamp() + 60)
+        registry = metrics.Metrics()
+        log = logging.getLogger('test_tracing')
+        poller = make_engine(homework_module, timer, registry, log)
+        tenant = engine.Tenant('student', 'token', [1])
+
+        with caplog.at_level(logging.INFO, 'test_tracing'):
+            assert poller.poll(tenant)
+
+        assert quantile(registry, 'detect') == 60
+        assert quantile(registry, 'upstream') == 2
+        assert quantile(registry, 'telegram') == 3
+        assert quantile(registry, 'total') == 65
+        assert 'Задержка уведомления student' in caplog.text
+
+    def test_failed_send_is_not_recorded(self, homework_module):
+        timer = clock.VirtualClock(UPDATED_AT.timestamp())
+        registry = metrics.Metrics()
+        poller = make_engine(homework_module, timer, registry, failed=[1])
+        assert poller.poll(engine.Tenant('student', 'token', [1]))
+        assert not registry.quantiles(
+            'notification_latency_seconds', stage='total')
+
+    def test_pipeline_records_queue_wait(self, homework_module):
+        timer = clock.VirtualClock(UPDATED_AT.timestamp())
+        registry = metrics.Metrics()
+        poller = make_engine(homework_module, timer, registry)
+        poller.add_tenant(engine.Tenant('student', 'token', [1]))
+        stages = pipeline.Pipeline(
+            poller, fetch_workers=1, validate_workers=1, notify_workers=1,
+            metrics=metrics.Metrics())
+        stages.start()
+        stages.submit('student')
+        assert stages.drain(1)
+        stages.stop()
+
+        assert quantile(registry, 'upstream') == 2
+        assert quantile(registry, 'queue') == 0
+        assert quantile(registry, 'total') == 5
@@ -0,0 +1,64 @@
+import gzip
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import metrics
+
+PAYLOAD = json.dumps({
+    'homeworks': [{'homework_name': f'hw{n}', 'status': 'approved',
+                   'reviewer_comment': 'Всё нравится' * 10}
+                  for n in range(50)],
+    'current_date': 1000,
+}).encode()
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = PAYLOAD
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def local_endpoint(monkeypatch, homework_module):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(homework_module, 'ENDPOINT',
+                        f'http://127.0.0.1:{server.server_port}/')
+    monkeypatch.setattr(homework_module, 'metrics', metrics.Metrics())
+    yield homework_module.metrics
+    server.shutdown()
+
+
+class TestTransferAccounting:
+    def test_compressed_response_is_accounted(self, local_endpoint,
+                                              homework_module):
+        response = homework_module._request_api(0, {}, 'ivanov')
+        assert len(response['homeworks']) == 50
+        labels = {'tenant': 'ivanov', 'from_date': 'full'}
+        wire = local_endpoint.counter('api_response_wire_bytes', **labels)
+        decoded = local_endpoint.counter('api_response_bytes', **labels)
+        assert decoded == len(PAYLOAD)
+        assert 0 < wire < decoded
+        assert local_endpoint.counter(
+            'api_compressed_responses', **labels) == 1
+        assert local_endpoint.counter('api_request_bytes', **labels) > 0
+
+    def test_incremental_requests_are_labelled(self, local_endpoint,
+                                               homework_module):
+        homework_module._request_api(1000, {}, 'ivanov')
+        assert local_endpoint.counter(
+            'api_requests', tenant='ivanov', from_date='incremental') == 1
@@ -0,0 +1,99 @@
+import pytest
+
+import clock
+import engine
+import exceptions
+import validation
+
+VERDICTS = {'approved': 'Ура!', 'rejected': 'Есть замечания.'}
+
+
+@pytest.fixture
+def validate():
+    return validation.compile_response_validator()
+
+
+@pytest.fixture
+def parse():
+    return validation.compile_status_parser(
+        VERDICTS, 'Работа "{name}". {verdict}')
+
+
+class TestResponseValidator:
+    def test_valid_response(self, validate):
+        records = [{'homework_name': 'hw', 'status': 'approved'}]
+        result = validate({'homeworks': records, 'current_date': 5})
+        assert result == (records, 5, None)
+
+    def test_empty_homeworks_is_not_an_error(self, validate):
+        assert validate({'homeworks': [], 'current_date': 5}) == ([], 5, None)
+
+    @pytest.mark.parametrize('response, kind, key, error', [
+        ([], validation.WRONG_TYPE, None, TypeError),
+        ({'homeworks': []}, validation.MISSING, 'current_date',
+         exceptions.KeyNotFound),
+        ({'current_date': 5}, validation.MISSING, 'homeworks',
+         exceptions.KeyNotFound),
+        ({'homeworks': {}, 'current_date': 5}, validation.WRONG_TYPE,
+         'homeworks', TypeError),
+        ({'homeworks': [{'status': 'approved'}, 'junk'], 'current_date': 5},
+         validation.WRONG_TYPE, 'homeworks', TypeError),
+    ])
+    def test_issues(self, validate, response, kind, key, error):
+        records, cursor, issue = validate(response)
+        assert records is None and cursor is None
+        assert (issue.kind, issue.key) == (kind, key)
+        assert isinstance(issue.exception(), error)
+
+
+class TestStatusParser:
+    def test_message_follows_template(self, parse):
+        for status, verdict in VERDICTS.items():
+            parsed = parse({'homework_name': 'hw1', 'status': status})
+            assert parsed == (f'Работа "hw1". {verdict}', None)
+
+    @pytest.mark.parametrize('record, error', [
+        ({'status': 'approved'}, exceptions.KeyNotFound),
+        ({'homework_name': 'hw1'}, exceptions.KeyNotFound),
+        ({'homework_name': 'hw1', 'status': 'unknown'},
+         exceptions.UnexpectedStatus),
+        ('junk', TypeError),
+        (None, TypeError),
+    ])
+    def test_issues(self, parse, record, error):
+        message, issue = parse(record)
+        assert message is None
+        assert isinstance(issue.exception(), error)
+
+
+class TestBotValidation:
+    def test_check_response_accepts_empty_homeworks(self, homework_module):
+        response = {'homeworks': [], 'current_date': 5}
+        assert homework_module.check_response(response) == []
+
+
+class TestEngineInspect:
+    def make(self, validate, parse):
+        def refuse(response):
+            raise AssertionError('validate must not be called')
+
+        return engine.Engine(
+            fetch=None, validate=refuse,
+            parse=lambda record: parse(record)[0], notify=None,
+            period=600, clock=clock.VirtualClock(), inspect=validate)
+
+    def test_cursor_comes_from_inspect(self, validate, parse):
+        poller = self.make(validate, parse)
+        tenant = engine.Tenant('student', 'token', [1])
+        found = poller.check(tenant, {
+            'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+            'current_date': 7})
+        assert found[1] == 'Работа "hw". Ура!'
+        assert tenant.state['timestamp'] == 7
+
+    def test_issue_is_raised_for_reporting(self, validate, parse):
+        poller = self.make(validate, parse)
+        tenant = engine.Tenant('student', 'token', [1])
+        with pytest.raises(exceptions.KeyNotFound):
+            poller.check(tenant, {'homeworks': []})
+        assert tenant.state['timestamp'] == 0
@@ -0,0 +1,84 @@
+from clock import parse_date
+from metrics import registry
+
+UPDATED = "updated"
+FETCH_STARTED = "fetch_started"
+FETCH_DONE = "fetch_done"
+PARSED = "parsed"
+QUEUED = "queued"
+SENDING = "sending"
+ACCEPTED = "accepted"
+
+STAGES = (
+    ("detect", UPDATED, FETCH_STARTED),
+    ("upstream", FETCH_STARTED, FETCH_DONE),
+    ("parse", FETCH_DONE, PARSED),
+    ("queue", QUEUED, SENDING),
+    ("telegram", SENDING, ACCEPTED),
+    ("total", UPDATED, ACCEPTED),
+)
+
+
+class Trace:
+    """Отметки времени пути одного уведомления от ревьюера до чата.
+
+    updated — date_updated работы из API, fetch_started и fetch_done —
+    начало и конец запроса, который увидел новый статус, parsed — разбор
+    статуса, queued — постановка уведомления в очередь отправки, sending
+    и accepted — начало отправки и её приём Telegram во всех чатах.
+    """
+
+    __slots__ = ("clock", "times")
+
+    def __init__(self, clock):
+        """Констуктор."""
+        self.clock = clock
+        self.times = {}
+
+    def mark(self, point):
+        """Отмечает текущее время для точки пути."""
+        self.times[point] = self.clock.time()
+
+    def mark_updated(self, homework):
+        """Отмечает время смены статуса из date_updated записи API."""
+        if (updated := parse_date(homework.get("date_updated"))):
+            self.times[UPDATED] = updated
+
+    def stages(self):
+        """Длительности этапов, для которых известны обе отметки.
+
+        Отрицательная длительность из-за расхождения часов с API
+        считается нулевой.
+        """
+        return {
+            stage: max(0.0, self.times[end] - self.times[start])
+            for stage, start, end in STAGES
+            if start in self.times and end in self.times
+        }
+
+
+class Tracer:
+    """Собирает задержки этапов уведомлений в метрики и лог.
+
+    Распределения пишутся в notification_latency_seconds с меткой stage:
+    detect — ожидание опроса после смены статуса (период и отставание
+    расписания), upstream — ответ API, parse — проверка и разбор,
+    queue — очередь отправки, telegram — отправка, total — весь путь.
+    """
+
+    def __init__(self, metrics=registry, log=None):
+        """Констуктор."""
+        self.metrics = metrics
+        self.log = log
+
+    def record(self, tenant, trace):
+        """Учитывает трассу уведомления, принятого во всех чатах."""
+        stages = trace.stages()
+        for stage, seconds in stages.items():
+            self.metrics.observe(
+                "notification_latency_seconds", seconds, stage=stage)
+        if self.log is not None:
+            self.log.info(
+                f"Задержка уведомления {tenant.name}: " + ", ".join(
+                    f"{stage} {seconds:.3f} с"
+                    for stage, seconds in stages.items()))
@@ -0,0 +1,85 @@
+from collections import namedtuple
+
+import exceptions
+
+MISSING = "missing"
+WRONG_TYPE = "type"
+UNKNOWN_STATUS = "status"
+
+
+class Issue(namedtuple("Issue", ("kind", "key", "value", "expected"))):
+    """Нарушение схемы ответа API: что и где не так.
+
+    Исключение из проблемы создаётся только по запросу, поэтому
+    проверка некорректного ответа не требует raise/except.
+    """
+
+    __slots__ = ()
+
+    def exception(self):
+        """Исключение, которое раньше выбрасывала проверка ответа."""
+        if self.kind == MISSING:
+            return exceptions.KeyNotFound(self.key, self.value)
+        if self.kind == WRONG_TYPE:
+            return TypeError(self.value, self.expected)
+        return exceptions.UnexpectedStatus(self.value)
+
+
+def compile_response_validator(records_key="homeworks",
+                               cursor_key="current_date"):
+    """Собирает проверку ответа API со списком записей и курсором.
+
+    Возвращаемая функция за один проход проверяет ответ и возвращает
+    кортеж (records, cursor, issue); при нарушении схемы records и
+    cursor равны None, а issue описывает первое нарушение. Пустой
+    список записей — корректный ответ без новых статусов; записи,
+    не являющиеся словарями, — нарушение WRONG_TYPE.
+    """
+    def validate(response):
+        if not isinstance(response, dict):
+            return None, None, Issue(WRONG_TYPE, None, response, dict)
+        cursor = response.get(cursor_key)
+        if not cursor:
+            return None, None, Issue(MISSING, cursor_key, response, None)
+        records = response.get(records_key)
+        if records is None:
+            return None, None, Issue(MISSING, records_key, response, None)
+        if not isinstance(records, list):
+            return None, None, Issue(WRONG_TYPE, records_key, records, list)
+        for record in records:
+            if not isinstance(record, dict):
+                return None, None, Issue(
+                    WRONG_TYPE, records_key, record, dict)
+        return records, cursor, None
+
+    return validate
+
+
+def compile_status_parser(verdicts, template):
+    """Собирает разбор записи о работе в текст уведомления.
+
+    template — строка с полями {name} и {verdict}; её части для каждого
+    статуса из verdicts подставляются заранее, и при разборе остаётся
+    склеить их с названием работы. Функция возвращает
+    кортеж (message, issue).
+    """
+    prefix, _, suffix = template.partition("{name}")
+    suffixes = {
+        status: suffix.format(verdict=verdict)
+        for status, verdict in verdicts.items()
+    }
+
+    def parse(record):
+        if not isinstance(record, dict):
+            return None, Issue(WRONG_TYPE, None, record, dict)
+        name = record.get("homework_name")
+        if not name:
+            return None, Issue(MISSING, "homework_name", record, None)
+        status = record.get("status")
+        if not status:
+            return None, Issue(MISSING, "status", record, None)
+        if (tail := suffixes.get(status)) is None:
+            return None, Issue(UNKNOWN_STATUS, "status", status, None)
+        return f"{prefix}{name}{tail}", None
+
+    return parse